@@ -0,0 +1,114 @@
+"""Per-request cost of the default response path vs model_response, per route model.
+
+For each route converted to model_response, builds a representative model and
+times two in-process FastAPI routes that return it. One uses response_model
+with the stdlib JSONResponse (the previous behaviour). The other returns
+model_response(model) under the app's default response class. No database is
+involved, so the difference is the serialization work saved per request.
+
+    python bench_responses.py [--requests 2000]
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from fast_responses import FAST_JSON_RESPONSE, model_response
+from server import (
+    CompatibilityBatchResponse, CompatibilityBatchResult, CompatibilityReport, Modality, PartnerProfile, QuestionnaireAnswer, QuestionnaireResult, User, ZodiacSign,
+    QUESTIONNAIRE_QUESTIONS, calculate_enhanced_compatibility
+)
+
+def sample_models() -> Dict[str, Tuple[str, BaseModel]]:
+    """route -> (response model name, instance) with realistic sizes"""
+    answers = [
+        QuestionnaireAnswer(question_id=question["id"], answer=question["options"][0]["answer"], score=3)
+        for question in QUESTIONNAIRE_QUESTIONS
+    ]
+    user = User(name="Ana Souza", email="ana@example.com", zodiac_sign=ZodiacSign.ARIES, birth_date="1990-04-01", badges=["profile_created", "questionnaire_completed"])
+    enhanced = calculate_enhanced_compatibility("Ana Souza", ZodiacSign.ARIES, "Bruno Lima", ZodiacSign.CANCER)
+    enhanced.user_id, enhanced.partner_id = user.id, "partner-1"
+    batch = CompatibilityBatchResponse(
+        user_id=user.id,
+        results=[
+            CompatibilityBatchResult(id=f"user-{i}", kind="user", name=f"Perfil {i}", zodiac_sign=sign, compatibility_score=70, general_affinity="Médio")
+            for i, sign in enumerate(list(ZodiacSign) * 40)
+        ],
+        not_found=[]
+    )
+    return {
+        "create_user / get_user / lookup": ("User", user),
+        "submit_questionnaire": ("QuestionnaireResult", QuestionnaireResult(user_id=user.id, answers=answers, dominant_modality=Modality.CARDINAL, secondary_modality=Modality.FIXED)),
+        "generate_compatibility_report": ("CompatibilityReport", CompatibilityReport(
+            user1_id=user.id, user2_id="user-2", compatibility_score=80,
+            strengths=["Texto de exemplo com acentuação"] * 3, challenges=["Desafio"] * 3,
+            recommendations=["Recomendação"] * 3, premium_insights=["Insight"] * 6
+        )),
+        "create_partner": ("PartnerProfile", PartnerProfile(
+            user_id=user.id, name="Bruno Lima", birth_date="1990-07-01", questionnaire_answers=answers,
+            zodiac_sign=ZodiacSign.CANCER, temperament="Fleumático", element="Água", quality="Cardinal"
+        )),
+        "generate/get enhanced compatibility": ("EnhancedCompatibilityReport", enhanced),
+        "batch_compatibility (480 results)": ("CompatibilityBatchResponse", batch),
+    }
+
+def build_app(model: BaseModel) -> FastAPI:
+    app = FastAPI(default_response_class=FAST_JSON_RESPONSE)
+
+    @app.get("/validated", response_model=type(model), response_class=JSONResponse)
+    async def validated():
+        return model
+
+    @app.get("/trusted", response_model=type(model))
+    async def trusted():
+        return model_response(model)
+
+    return app
+
+async def call(app: FastAPI, path: str) -> bytes:
+    """One GET straight through the ASGI app, without an HTTP client in the way"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": [],
+        "client": ("127.0.0.1", 0), "server": ("testserver", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+async def time_requests(app: FastAPI, path: str, requests: int) -> float:
+    for _ in range(min(100, requests)):
+        await call(app, path)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app, path)
+    return (time.perf_counter() - start) / requests * 1e6
+
+async def run(requests: int):
+    print(f"Response class: {FAST_JSON_RESPONSE.__name__}, {requests} requests per path")
+    print(f"{'route':40} {'model':30} {'before µs':>10} {'after µs':>10} {'saved µs':>10}")
+    for route, (model_name, model) in sample_models().items():
+        app = build_app(model)
+        assert json.loads(await call(app, "/validated")) == json.loads(await call(app, "/trusted"))
+        before = await time_requests(app, "/validated", requests)
+        after = await time_requests(app, "/trusted", requests)
+        print(f"{route:40} {model_name:30} {before:10.1f} {after:10.1f} {before - after:10.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark response serialization per route")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
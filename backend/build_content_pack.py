@@ -0,0 +1,56 @@
+"""Validate the content pack and stamp its manifest with the section digests and version.
+
+Every section in content/ is parsed against the server's CONTENT_SCHEMA, then
+checked for what the schema cannot express (duplicate IDs, missing modalities,
+malformed question options, unknown traits in the compatibility matrices).
+The manifest is only written when the whole pack is valid. With --check nothing
+is written, and the exit status says whether the manifest is stale.
+
+    python build_content_pack.py [--content-dir content] [--check]
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from content_pack import MANIFEST_FILE, ContentPack, ContentPackError, write_manifest
+from server import CONTENT_DIR, CONTENT_SCHEMA, ContentLibrary
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("build_content_pack")
+
+def build(content_dir: Path, check: bool) -> bool:
+    try:
+        pack = ContentPack.from_sources(content_dir, CONTENT_SCHEMA)
+        problems = ContentLibrary(pack).problems()
+    except (ContentPackError, ValueError) as e:
+        # json.JSONDecodeError and pydantic's ValidationError are both ValueErrors
+        error = str(e).replace("\n", " ") if not isinstance(e, ValidationError) else f"{e.title}: {e}"
+        logger.error(f"Invalid content pack: {error}")
+        return False
+    if problems:
+        for problem in problems:
+            logger.error(problem)
+        return False
+    
+    manifest_path = content_dir / MANIFEST_FILE
+    current = json.loads(manifest_path.read_bytes()) if manifest_path.is_file() else None
+    if current == pack.manifest:
+        logger.info(f"Content pack {pack.version} is up to date")
+        return True
+    if check:
+        logger.error(f"Manifest is stale; the sources build to version {pack.version}")
+        return False
+    write_manifest(content_dir, pack.manifest)
+    logger.info(f"Wrote content pack {pack.version} ({', '.join(pack.section_names)})")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate content/ and write its manifest")
+    parser.add_argument("--content-dir", type=Path, default=CONTENT_DIR)
+    parser.add_argument("--check", action="store_true", help="Only verify that the manifest matches the sources")
+    args = parser.parse_args()
+    sys.exit(0 if build(args.content_dir, args.check) else 1)
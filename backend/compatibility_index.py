@@ -0,0 +1,82 @@
+"""In-process index of each user's zodiac sign and dominant modality codes.
+
+Backs the "most compatible users" query. Scoring every indexed user is a single
+NumPy gather into a precomputed score matrix, and argpartition picks the top K,
+so a request does no users scan and no per-pair Python work. Each worker process
+keeps its own copy. It is loaded at startup and updated by the routes that set a
+user's sign or modality.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+UNKNOWN = -1
+
+class UserCodeIndex:
+    """Parallel arrays of sign/modality codes, one row per user id"""
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._signs = np.full(initial_capacity, UNKNOWN, dtype=np.int8)
+        self._modalities = np.full(initial_capacity, UNKNOWN, dtype=np.int8)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._rows
+
+    def _row(self, user_id: str) -> int:
+        row = self._rows.get(user_id)
+        if row is None:
+            row = len(self._ids)
+            if row == len(self._signs):
+                # Amortized growth: double the arrays instead of resizing per insert
+                padding = np.full(len(self._signs), UNKNOWN, dtype=np.int8)
+                self._signs = np.concatenate([self._signs, padding])
+                self._modalities = np.concatenate([self._modalities, padding])
+            self._ids.append(user_id)
+            self._rows[user_id] = row
+        return row
+
+    # Resolve the row first: growing replaces the arrays
+    def set_sign(self, user_id: str, sign_code: int):
+        row = self._row(user_id)
+        self._signs[row] = sign_code
+
+    def set_modality(self, user_id: str, modality_code: int):
+        row = self._row(user_id)
+        self._modalities[row] = modality_code
+
+    def codes(self, user_id: str) -> Optional[Tuple[int, int]]:
+        row = self._rows.get(user_id)
+        if row is None:
+            return None
+        return int(self._signs[row]), int(self._modalities[row])
+
+    def top_k(self, user_id: str, k: int, score_matrix: np.ndarray) -> List[Tuple[str, int]]:
+        """Best `k` (user_id, score) pairs for `user_id`, highest score first.
+
+        `score_matrix[sign1, modality1, sign2, modality2]` holds the pair score. Users
+        missing a sign or modality are skipped; so is `user_id` itself.
+        """
+        row = self._rows[user_id]
+        user_sign, user_modality = self._signs[row], self._modalities[row]
+        if user_sign == UNKNOWN or user_modality == UNKNOWN or k <= 0:
+            return []
+
+        count = len(self._ids)
+        signs = self._signs[:count]
+        modalities = self._modalities[:count]
+        eligible = (signs != UNKNOWN) & (modalities != UNKNOWN)
+        eligible[row] = False
+        candidates = np.flatnonzero(eligible)
+        if not len(candidates):
+            return []
+
+        scores = score_matrix[user_sign, user_modality][signs[candidates], modalities[candidates]]
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self._ids[candidates[i]], int(scores[i])) for i in top]
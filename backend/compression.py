@@ -0,0 +1,157 @@
+"""Negotiated gzip/brotli response compression.
+
+CompressionMiddleware compresses dynamic responses of a compressible type once
+they reach COMPRESSION_MINIMUM_SIZE, picking brotli over gzip when the client
+accepts both. Streaming responses are compressed chunk by chunk and flushed
+after each one, so NDJSON exports still arrive incrementally. Responses that
+already carry a Content-Encoding pass through untouched, which is how
+StaticPayload serves the variants it compressed once per content version. Brotli is
+optional: without the brotli package only gzip is offered.
+"""
+import zlib
+from typing import Dict, FrozenSet, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Below this size the encoding overhead outweighs the bytes saved
+COMPRESSION_MINIMUM_SIZE = 1024
+# Dynamic responses trade ratio for latency; precompressed payloads use the maximum
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+def accepted_encodings(accept_encoding: Optional[str]) -> FrozenSet[str]:
+    """Codings from an Accept-Encoding header with a non-zero q-value"""
+    if not accept_encoding:
+        return frozenset()
+    accepted, refused = set(), set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        (accepted if quality > 0 else refused).add(coding)
+    if "*" in accepted:
+        accepted.update(coding for coding in SUPPORTED_ENCODINGS if coding not in refused)
+    return frozenset(accepted)
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Preferred supported coding the client accepts, or None for identity"""
+    accepted = accepted_encodings(accept_encoding)
+    return next((coding for coding in SUPPORTED_ENCODINGS if coding in accepted), None)
+
+class StreamCompressor:
+    """Incremental gzip or brotli encoder; every chunk is flushed so it can be decoded on arrival"""
+    __slots__ = ("encoding", "_compressor")
+
+    def __init__(self, encoding: str, best: bool = False):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=11 if best else BROTLI_QUALITY)
+        else:
+            # wbits=31 selects the gzip container rather than raw zlib
+            self._compressor = zlib.compressobj(9 if best else GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    return StreamCompressor(encoding, best).finish(body)
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """Every supported encoding of body at maximum ratio, or {} when it is too small to bother"""
+    if len(body) < COMPRESSION_MINIMUM_SIZE:
+        return {}
+    return {encoding: compress(body, encoding, best=True) for encoding in SUPPORTED_ENCODINGS}
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Optional[Send] = None
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[StreamCompressor] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk decides whether to compress
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            )
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self.send(start_message)
+                await self.send(message)
+                return
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            self.compressor = StreamCompressor(self.encoding)
+            if more_body:
+                del headers["Content-Length"]
+                message["body"] = self.compressor.chunk(body)
+            else:
+                message["body"] = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(message["body"]))
+            await self.send(start_message)
+            await self.send(message)
+            return
+
+        if not self.passthrough:
+            message["body"] = self.compressor.chunk(body) if more_body else self.compressor.finish(body)
+        await self.send(message)
@@ -0,0 +1,148 @@
+"""Versioned content pack: the copy and matrices the API serves, kept out of the code.
+
+A pack is a directory with one JSON file per section plus manifest.json. The
+manifest records each section's SHA-256 and a pack version derived from them.
+build_content_pack.py validates every section against the server's schema and
+writes the manifest, so editing the copy means editing JSON and rebuilding.
+
+Sections are read on first use, not at import, and each file is checked
+against its manifest digest when read. A mismatch means the file was edited
+without a rebuild: it still loads (it is validated when the server parses it),
+but the version would be stale, so a warning is logged (strict packs refuse
+it instead). Without a manifest at all, one is computed from the files on disk.
+pin() reads every section's bytes up front while leaving parsing lazy, so a
+pack keeps serving its own version after newer files land on disk.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+PACK_FORMAT = 1
+
+class ContentPackError(Exception):
+    pass
+
+def section_digest(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+def pack_version(digests: Dict[str, str]) -> str:
+    """Order-independent fingerprint of all section digests"""
+    canonical = json.dumps(sorted(digests.items()), separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+class ContentPack:
+    def __init__(self, directory: Path, strict: bool = False):
+        self.directory = Path(directory)
+        self.strict = strict
+        self._manifest: Dict[str, Any] = {}
+        self._sections: Dict[str, Any] = {}
+        self._raw: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_sources(cls, directory: Path, names: Iterable[str]) -> "ContentPack":
+        """Pack over the section files as they are now, with a manifest built in memory"""
+        pack = cls(directory)
+        pack._manifest = build_manifest(read_sources(directory, names))
+        return pack
+
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        if not self._manifest:
+            path = self.directory / MANIFEST_FILE
+            try:
+                manifest = json.loads(path.read_bytes())
+            except FileNotFoundError:
+                # Unbuilt pack (e.g. the first build): digest the files as they are
+                logger.warning(f"No content pack manifest at {path}; run build_content_pack.py")
+                names = sorted(source.stem for source in self.directory.glob("*.json") if source.name != MANIFEST_FILE)
+                manifest = build_manifest(read_sources(self.directory, names))
+            check_manifest(manifest, path)
+            self._manifest = manifest
+        return self._manifest
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    @property
+    def section_names(self) -> Iterable[str]:
+        return self.manifest["sections"].keys()
+
+    def pin(self) -> "ContentPack":
+        """Read the manifest and every section's bytes now; parsing still happens on first use"""
+        with self._lock:
+            for name in self.section_names:
+                if name not in self._sections and name not in self._raw:
+                    self._raw[name] = self._read_raw(name)
+        return self
+
+    def section(self, name: str) -> Any:
+        """Parsed JSON of one section, read from disk the first time it is asked for"""
+        if name in self._sections:
+            return self._sections[name]
+        with self._lock:
+            if name not in self._sections:
+                self._sections[name] = self._read_section(name)
+        return self._sections[name]
+
+    def _read_section(self, name: str) -> Any:
+        raw = self._raw.pop(name, None)
+        return json.loads(raw if raw is not None else self._read_raw(name))
+
+    def _read_raw(self, name: str) -> bytes:
+        entry = self.manifest["sections"].get(name)
+        if entry is None:
+            raise ContentPackError(f"Content pack {self.directory} has no section {name!r}")
+        raw = (self.directory / entry["file"]).read_bytes()
+        if section_digest(raw) != entry["sha256"]:
+            if self.strict:
+                raise ContentPackError(f"Content section {name} does not match the manifest of pack {self.version}")
+            logger.warning(f"Content section {name} changed since the pack was built; run build_content_pack.py")
+        return raw
+
+def check_manifest(manifest: Any, path: Path):
+    """Raise ContentPackError unless the manifest has the shape build_manifest writes"""
+    if not isinstance(manifest, dict) or manifest.get("format") != PACK_FORMAT:
+        found = manifest.get("format") if isinstance(manifest, dict) else None
+        raise ContentPackError(f"Unsupported content pack format {found!r} in {path}")
+    if not isinstance(manifest.get("version"), str):
+        raise ContentPackError(f"Content pack manifest {path} has no version")
+    sections = manifest.get("sections")
+    if not isinstance(sections, dict):
+        raise ContentPackError(f"Content pack manifest {path} has no sections")
+    for name, entry in sections.items():
+        if not isinstance(entry, dict) or not all(isinstance(entry.get(key), str) for key in ("file", "sha256")):
+            raise ContentPackError(f"Content pack manifest {path} has a malformed entry for section {name!r}")
+
+def read_sources(directory: Path, names: Iterable[str]) -> Dict[str, bytes]:
+    """Raw bytes of each section file, for validation before a manifest is written"""
+    directory = Path(directory)
+    missing = [name for name in names if not (directory / f"{name}.json").is_file()]
+    if missing:
+        raise ContentPackError(f"Missing content sections in {directory}: {', '.join(missing)}")
+    return {name: (directory / f"{name}.json").read_bytes() for name in names}
+
+def build_manifest(sources: Dict[str, bytes]) -> Dict[str, Any]:
+    digests = {name: section_digest(raw) for name, raw in sources.items()}
+    return {
+        "format": PACK_FORMAT,
+        "version": pack_version(digests),
+        "sections": {name: {"file": f"{name}.json", "sha256": digest} for name, digest in digests.items()},
+    }
+
+def write_manifest(directory: Path, manifest: Dict[str, Any]):
+    """Replace the manifest atomically; running servers poll it to pick up new versions"""
+    path = Path(directory) / MANIFEST_FILE
+    staging = path.with_suffix(".json.tmp")
+    with open(staging, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    os.replace(staging, path)
@@ -0,0 +1,82 @@
+"""Hot-reloadable content behind one atomically swapped snapshot reference.
+
+A snapshot is everything derived from one content pack version, built by the
+factory the registry is given. Requests take the current snapshot once and use
+it throughout, so a reload never changes content under a request that already
+started. reload() builds and prepares the next snapshot in a worker thread, and
+swapping it in is a single reference assignment: no request sees a half-built
+snapshot, and a pack that fails to load or validate leaves the current one in
+place.
+
+The manifest is the commit point. build_content_pack.py writes it last, so a
+new version is only picked up once all of its section files are in place.
+Sections read during a reload must match the manifest digests exactly.
+"""
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Generic, Optional, TypeVar
+
+from content_pack import ContentPack, ContentPackError
+
+logger = logging.getLogger(__name__)
+
+Snapshot = TypeVar("Snapshot")
+
+# What a bad pack can raise (JSON and schema errors are ValueErrors); build() wraps anything else
+RELOAD_ERRORS = (ContentPackError, ValueError, OSError)
+
+class ContentRegistry(Generic[Snapshot]):
+    def __init__(self, directory: Path, factory: Callable[[ContentPack], Snapshot]):
+        self.directory = Path(directory)
+        self._factory = factory
+        self._current: Optional[Snapshot] = None
+        self._first_build = threading.Lock()
+        self._reload_lock = asyncio.Lock()
+
+    @property
+    def current(self) -> Snapshot:
+        """The snapshot new requests should use; the first one is built on demand, with lazy views"""
+        snapshot = self._current
+        if snapshot is None:
+            with self._first_build:
+                if self._current is None:
+                    # Parsing stays lazy, but the bytes must be this version's, whatever lands on disk later
+                    self._current = self._factory(ContentPack(self.directory).pin())
+                snapshot = self._current
+        return snapshot
+
+    def build(self) -> Snapshot:
+        """A fully prepared snapshot of the pack on disk, checked against its manifest"""
+        try:
+            snapshot = self._factory(ContentPack(self.directory, strict=True))
+            snapshot.prepare()
+        except RELOAD_ERRORS:
+            raise
+        except Exception as e:
+            # Valid sections a derived view still cannot use (e.g. a manifest not written by build_content_pack.py)
+            raise ContentPackError(f"Content pack in {self.directory} could not be prepared: {e!r}") from e
+        return snapshot
+
+    async def reload(self, force: bool = False) -> bool:
+        """Install the pack on disk if its version changed; True when a new snapshot was swapped in"""
+        async with self._reload_lock:
+            if not force and ContentPack(self.directory).version == self.current.version:
+                return False
+            snapshot = await asyncio.to_thread(self.build)
+            previous, self._current = self.current.version, snapshot
+        logger.info(f"Content pack {previous} -> {snapshot.version}")
+        return True
+
+    async def watch(self, interval: float):
+        """Poll the manifest and reload when its version changes; runs until cancelled, whatever a reload raises"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload()
+            except RELOAD_ERRORS as e:
+                error = str(e).replace("\n", " ")
+                logger.error(f"Content reload failed, keeping the current pack: {error}")
+            except Exception:
+                logger.exception("Content reload failed unexpectedly, keeping the current pack")
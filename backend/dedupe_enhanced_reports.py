@@ -0,0 +1,81 @@
+"""Deduplicate enhanced compatibility reports and make (user_id, partner_id) unique.
+
+Before reports were upserted, generating one appended a document, and the
+upsert itself could race before the index was unique. For each pair this keeps
+the newest report (the one reads already return) and deletes the rest, then
+replaces the non-unique user_id_partner_id index with the unique one from
+INDEX_SPECS. Safe to re-run; run it before deploying the unique index.
+
+    python dedupe_enhanced_reports.py [--batch-size 1000] [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
+
+from mongo_codec import CODEC_OPTIONS
+from server import INDEX_SPECS
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("dedupe_enhanced_reports")
+
+COLLECTION = "enhanced_compatibility_reports"
+LEGACY_INDEX = "user_id_partner_id"
+
+async def delete_duplicates(collection, batch_size: int, dry_run: bool) -> dict:
+    stats = {"pairs": 0, "deleted": 0}
+    pipeline = [
+        {"$sort": {"created_at": -1, "_id": -1}},
+        {"$group": {"_id": {"user_id": "$user_id", "partner_id": "$partner_id"}, "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ]
+    stale = []
+    async for group in collection.aggregate(pipeline, allowDiskUse=True):
+        stats["pairs"] += 1
+        # The first id is the newest report, which stays
+        stale.extend(group["ids"][1:])
+    for start in range(0, len(stale), batch_size):
+        batch = stale[start:start + batch_size]
+        if dry_run:
+            stats["deleted"] += len(batch)
+        else:
+            result = await collection.delete_many({"_id": {"$in": batch}})
+            stats["deleted"] += result.deleted_count
+    return stats
+
+async def main(batch_size: int, dry_run: bool):
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client.get_database(os.environ.get('DB_NAME', 'temperamentos_db'), codec_options=CODEC_OPTIONS)
+    collection = db[COLLECTION]
+    try:
+        stats = await delete_duplicates(collection, batch_size, dry_run)
+        logger.info(f"{COLLECTION}: {stats}")
+        if dry_run:
+            return
+        # A unique index cannot be built beside a non-unique one on the same keys
+        if LEGACY_INDEX in await collection.index_information():
+            await collection.drop_index(LEGACY_INDEX)
+            logger.info(f"Dropped index {LEGACY_INDEX}")
+        try:
+            names = await collection.create_indexes(INDEX_SPECS[COLLECTION])
+            logger.info(f"Indexes in place: {names}")
+        except OperationFailure as e:
+            # Reports generated between the cleanup and the index build; run again
+            logger.error(f"Could not create the unique index, re-run to clean up new duplicates: {str(e)}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicate enhanced compatibility reports per user/partner pair")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted without writing")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.dry_run))
@@ -0,0 +1,80 @@
+"""Resolve duplicate user emails so the unique, case-insensitive email index can be built.
+
+Before emails were unique, registering an address again created another user
+(the old API tester did it on every run). For each address, compared with the
+same collation as the index, this keeps the oldest account for login and moves
+the others aside: their email becomes <id>@duplicate.invalid and the original
+goes to duplicate_email, so no profile or the data linked to it is deleted.
+Then it builds the indexes in INDEX_SPECS["users"]. Safe to re-run; run it (after
+migrate_datetimes.py, so accounts compare by date) before deploying the index.
+
+    python dedupe_user_emails.py [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+from mongo_codec import CODEC_OPTIONS
+from repository import EMAIL_COLLATION
+from server import INDEX_SPECS
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("dedupe_user_emails")
+
+DUPLICATE_DOMAIN = "duplicate.invalid"
+
+async def move_duplicates(users, dry_run: bool) -> dict:
+    stats = {"emails": 0, "moved": 0}
+    pipeline = [
+        {"$sort": {"created_at": 1, "_id": 1}},
+        {"$group": {"_id": "$email", "users": {"$push": {"_id": "$_id", "id": "$id", "email": "$email"}}}},
+        {"$match": {"users.1": {"$exists": True}}},
+    ]
+    operations = []
+    # The collation makes $group treat addresses that differ only in case as one
+    async for group in users.aggregate(pipeline, collation=EMAIL_COLLATION, allowDiskUse=True):
+        stats["emails"] += 1
+        kept, duplicates = group["users"][0], group["users"][1:]
+        for duplicate in duplicates:
+            logger.info(f"{duplicate['email']}: keeping {kept['id']}, moving {duplicate['id']} aside")
+            operations.append(UpdateOne(
+                {"_id": duplicate["_id"]},
+                {"$set": {"email": f"{duplicate['id']}@{DUPLICATE_DOMAIN}", "duplicate_email": duplicate["email"]}}
+            ))
+    stats["moved"] = len(operations)
+    if operations and not dry_run:
+        await users.bulk_write(operations, ordered=False)
+    return stats
+
+async def main(dry_run: bool):
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client.get_database(os.environ.get('DB_NAME', 'temperamentos_db'), codec_options=CODEC_OPTIONS)
+    try:
+        stats = await move_duplicates(db.users, dry_run)
+        logger.info(f"users: {stats}")
+        if dry_run:
+            return
+        try:
+            names = await db.users.create_indexes(INDEX_SPECS["users"])
+            logger.info(f"Indexes in place: {names}")
+        except OperationFailure as e:
+            # Users registered between the cleanup and the index build; run again
+            logger.error(f"Could not create the users indexes, re-run to clean up new duplicates: {str(e)}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move users with duplicate emails aside and build the unique email index")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run))
@@ -0,0 +1,26 @@
+"""Response classes for the API's hot paths.
+
+FAST_JSON_RESPONSE is the app-wide default response class. It uses orjson when
+installed and falls back to the stdlib encoder, and both produce the same
+compact UTF-8 JSON.
+
+Routes whose handler already builds its response model can return
+model_response(model). That skips FastAPI's second validation pass against
+response_model and the jsonable_encoder walk: pydantic-core serializes the model
+straight to bytes. Keep response_model on the route decorator so the OpenAPI
+schema stays the same.
+"""
+from pydantic import BaseModel
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ORJSONResponse imports without orjson and only fails when rendering, so pick on the module
+FAST_JSON_RESPONSE = ORJSONResponse if orjson is not None else JSONResponse
+
+def model_response(model: BaseModel, status_code: int = 200) -> Response:
+    """Serialize a trusted model once, without response_model re-validation"""
+    return Response(content=model.model_dump_json(), status_code=status_code, media_type="application/json")
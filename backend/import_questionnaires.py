@@ -0,0 +1,191 @@
+"""Bulk import of completed questionnaires from partner organizations.
+
+Streams submissions from NDJSON or CSV and scores each chunk in one vectorized
+pass with the same rules as POST /api/questionnaire/submit. Each chunk is then
+written with one unordered insert_many for the results and one unordered
+bulk_write for the badges. Rows that cannot be imported are reported one JSON
+object per line with their input line number, and the rest of the file goes on.
+A badge update that fails is reported the same way but counted as badge_failed,
+since the result itself was stored.
+
+NDJSON: one {"user_id": ..., "answers": [{"question_id", "answer", "score"}]} per line.
+CSV: header user_id,question_id,answer,score with one answer per row. Consecutive
+rows with the same user_id form one submission.
+
+    python import_questionnaires.py submissions.ndjson [--format csv] [--chunk-size 1000] [--errors errors.ndjson] [--dry-run]
+
+API workers load dominant modalities for the top-K index at startup, so restart
+them after a large import.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from mongo_codec import CODEC_OPTIONS
+from server import BadgeType, QuestionnaireResult, QuestionnaireSubmission, badge_update, score_questionnaire_batch
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("import_questionnaires")
+
+CSV_FIELDS = ["user_id", "question_id", "answer", "score"]
+
+# (input line, raw submission); raw is the ValueError when the line could not be decoded
+Row = Tuple[int, Any]
+
+def read_ndjson(stream) -> Iterator[Row]:
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"JSON inválido: {e.msg}")
+
+def read_csv(stream) -> Iterator[Row]:
+    reader = csv.DictReader(stream)
+    missing = set(CSV_FIELDS) - set(reader.fieldnames or [])
+    if missing:
+        raise SystemExit(f"CSV header is missing columns: {', '.join(sorted(missing))}")
+    # reader.line_num is the line just read, so it is captured per row before grouping
+    numbered = ((reader.line_num, row) for row in reader)
+    for user_id, rows in groupby(numbered, key=lambda item: item[1]["user_id"]):
+        rows = list(rows)
+        answers = [{field: row[field] for field in CSV_FIELDS[1:]} for _, row in rows]
+        yield rows[0][0], {"user_id": user_id, "answers": answers}
+
+def chunked(rows: Iterator[Row], size: int) -> Iterator[List[Row]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def import_chunk(db, chunk: List[Row], dry_run: bool, report_error) -> Dict[str, int]:
+    stats = {"imported": 0, "failed": 0, "badge_failed": 0}
+
+    def fail(line_number: int, user_id: Any, error: str):
+        stats["failed"] += 1
+        report_error({"line": line_number, "user_id": user_id, "error": error})
+
+    valid: List[Tuple[int, QuestionnaireSubmission]] = []
+    for line_number, raw in chunk:
+        if isinstance(raw, Exception):
+            fail(line_number, None, str(raw))
+            continue
+        try:
+            valid.append((line_number, QuestionnaireSubmission(**raw)))
+        except (TypeError, ValidationError) as e:
+            fail(line_number, raw.get("user_id") if isinstance(raw, dict) else None, str(e).replace("\n", " "))
+
+    # One read for the whole chunk instead of one per submission
+    user_ids = list({submission.user_id for _, submission in valid})
+    existing = {user["id"] async for user in db.users.find({"id": {"$in": user_ids}}, {"_id": 0, "id": 1})}
+    submissions = []
+    for line_number, submission in valid:
+        if submission.user_id in existing:
+            submissions.append((line_number, submission))
+        else:
+            fail(line_number, submission.user_id, "Usuário não encontrado")
+    if not submissions:
+        return stats
+
+    modalities = score_questionnaire_batch([submission.answers for _, submission in submissions])
+    results = [
+        QuestionnaireResult(
+            user_id=submission.user_id,
+            answers=submission.answers,
+            dominant_modality=dominant,
+            secondary_modality=secondary
+        ).dict()
+        for (_, submission), (dominant, secondary) in zip(submissions, modalities)
+    ]
+    if dry_run:
+        stats["imported"] += len(results)
+        return stats
+
+    failed_indexes = set()
+    try:
+        await db.questionnaire_results.insert_many(results, ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            failed_indexes.add(write_error["index"])
+            line_number, submission = submissions[write_error["index"]]
+            fail(line_number, submission.user_id, write_error.get("errmsg", "Erro de escrita"))
+
+    # user_id -> input lines of its inserted results, in first-seen order for the badge writes
+    inserted: Dict[str, List[int]] = {}
+    for index, (line_number, submission) in enumerate(submissions):
+        if index not in failed_indexes:
+            inserted.setdefault(submission.user_id, []).append(line_number)
+    stats["imported"] += len(submissions) - len(failed_indexes)
+    if inserted:
+        update = badge_update(BadgeType.QUESTIONNAIRE_COMPLETED, progress_percentage=50)
+        user_ids = list(inserted)
+        try:
+            await db.users.bulk_write([UpdateOne({"id": user_id}, update) for user_id in user_ids], ordered=False)
+        except BulkWriteError as e:
+            # The results are already stored, so these rows count as imported without their badge
+            for write_error in e.details.get("writeErrors", []):
+                user_id = user_ids[write_error["index"]]
+                for line_number in inserted[user_id]:
+                    stats["badge_failed"] += 1
+                    report_error({
+                        "line": line_number, "user_id": user_id,
+                        "error": f"Resultado importado, mas a conquista não foi atribuída: {write_error.get('errmsg', 'Erro de escrita')}"
+                    })
+    return stats
+
+async def main(path: str, input_format: str, chunk_size: int, errors_path: str, dry_run: bool):
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client.get_database(os.environ.get('DB_NAME', 'temperamentos_db'), codec_options=CODEC_OPTIONS)
+    source = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    errors = sys.stderr if errors_path == "-" else open(errors_path, "w", encoding="utf-8")
+    totals = {"imported": 0, "failed": 0, "badge_failed": 0}
+
+    def report_error(error: Dict[str, Any]):
+        errors.write(json.dumps(error, ensure_ascii=False) + "\n")
+
+    try:
+        rows = read_csv(source) if input_format == "csv" else read_ndjson(source)
+        for chunk in chunked(rows, chunk_size):
+            stats = await import_chunk(db, chunk, dry_run, report_error)
+            for key, value in stats.items():
+                totals[key] += value
+            logger.info(f"Progress: {totals}")
+    finally:
+        client.close()
+        if source is not sys.stdin:
+            source.close()
+        if errors is not sys.stderr:
+            errors.close()
+    logger.info(f"Done{' (dry run)' if dry_run else ''}: {totals}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import completed questionnaires")
+    parser.add_argument("path", help="NDJSON or CSV file, or - for stdin")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="Defaults to the file extension (ndjson for stdin)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--errors", default="-", help="Where to write per-row errors as NDJSON (default: stderr)")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and score without writing")
+    args = parser.parse_args()
+    input_format = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    asyncio.run(main(args.path, input_format, args.chunk_size, args.errors, args.dry_run))
@@ -0,0 +1,86 @@
+"""Online migration of ISO-string timestamps to native BSON dates.
+
+Walks each collection in _id order, converting the fields listed in
+mongo_codec.DATETIME_FIELDS in bounded batches. Each update only applies if the
+field still holds the string that was read, so it is safe to run while the API
+is serving traffic and can be re-run until it reports nothing left to convert.
+
+    python migrate_datetimes.py [--batch-size 1000] [--collection users] [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, UpdateOne
+
+from mongo_codec import CODEC_OPTIONS, DATETIME_FIELDS, parse_datetime
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("migrate_datetimes")
+
+async def migrate_collection(collection, fields, batch_size: int, dry_run: bool) -> dict:
+    stats = {"scanned": 0, "converted": 0, "unparseable": 0}
+    string_filter = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+    last_id = None
+
+    while True:
+        query = dict(string_filter)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await collection.find(query, projection).sort("_id", ASCENDING).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        operations = []
+        for doc in batch:
+            stats["scanned"] += 1
+            match = {"_id": doc["_id"]}
+            updates = {}
+            for field in fields:
+                value = doc.get(field)
+                if not isinstance(value, str):
+                    continue
+                parsed = parse_datetime(value)
+                if parsed is None:
+                    stats["unparseable"] += 1
+                    logger.warning(f"{collection.name} {doc['_id']}: cannot parse {field}={value!r}")
+                    continue
+                match[field] = value
+                updates[field] = parsed
+            if updates:
+                operations.append(UpdateOne(match, {"$set": updates}))
+
+        if operations and not dry_run:
+            result = await collection.bulk_write(operations, ordered=False)
+            stats["converted"] += result.modified_count
+        elif operations:
+            stats["converted"] += len(operations)
+
+    return stats
+
+async def main(batch_size: int, collections, dry_run: bool):
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client.get_database(os.environ.get('DB_NAME', 'temperamentos_db'), codec_options=CODEC_OPTIONS)
+    try:
+        for collection_name in collections:
+            stats = await migrate_collection(db[collection_name], DATETIME_FIELDS[collection_name], batch_size, dry_run)
+            logger.info(f"{collection_name}: {stats}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert ISO-string timestamps to BSON dates")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--collection", action="append", choices=sorted(DATETIME_FIELDS), help="Limit to these collections (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.collection or list(DATETIME_FIELDS), args.dry_run))
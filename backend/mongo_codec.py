@@ -0,0 +1,38 @@
+"""BSON codec settings shared by the API and the maintenance scripts.
+
+Timestamps are stored as native BSON dates. Reading through CODEC_OPTIONS returns
+them as timezone-aware UTC datetimes, so no handler has to parse or format them.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from bson.codec_options import CodecOptions
+
+CODEC_OPTIONS = CodecOptions(tz_aware=True, tzinfo=timezone.utc)
+
+# Datetime fields per collection; older documents may still hold ISO strings here
+DATETIME_FIELDS: Dict[str, List[str]] = {
+    "users": ["created_at"],
+    "questionnaire_results": ["completed_at"],
+    "compatibility_reports": ["created_at"],
+    "partners": ["created_at"],
+    "enhanced_compatibility_reports": ["created_at"],
+    "self_knowledge_results": ["completed_at"],
+    "user_missions": ["completed_at"],
+    "user_progress": ["last_activity"],
+    "exercise_progress": ["completed_at", "created_at"],
+    "personalized_reports": ["generated_at"],
+    "payment_transactions": ["created_at", "updated_at"],
+}
+
+def parse_datetime(value: Any) -> Optional[datetime]:
+    """Convert a legacy ISO-8601 string to an aware datetime (naive values are taken as UTC)"""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
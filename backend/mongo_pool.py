@@ -0,0 +1,113 @@
+"""Motor connection pool configuration, warm-up and metrics.
+
+Pool settings come from the environment so they can be sized against the number
+of uvicorn workers:
+
+    MONGO_MAX_POOL_SIZE                 connections per worker (default 100)
+    MONGO_MIN_POOL_SIZE                 connections kept open and pre-opened at startup (default 0)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS         max wait for a free connection (default: driver default, unbounded)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS   (default 30000)
+    MONGO_CONNECT_TIMEOUT_MS            (default 20000)
+    MONGO_COMPRESSORS                   comma separated, e.g. "zstd,zlib" (default: none)
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from pymongo import monitoring
+
+def pool_options_from_env() -> Dict[str, Any]:
+    options = {
+        "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+        "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+        "serverSelectionTimeoutMS": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '30000')),
+        "connectTimeoutMS": int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '20000')),
+    }
+    if os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS'):
+        options["waitQueueTimeoutMS"] = int(os.environ['MONGO_WAIT_QUEUE_TIMEOUT_MS'])
+    if os.environ.get('MONGO_COMPRESSORS'):
+        options["compressors"] = os.environ['MONGO_COMPRESSORS']
+    return options
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Tracks open/in-use connections and how long requests wait to check one out.
+
+    Motor runs driver calls on a thread pool, so counters are guarded by a lock and
+    the checkout start time is kept per thread (start and end fire on the same thread).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open_connections = 0
+            self.in_use = 0
+            self.max_in_use = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open_connections": self.open_connections,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+            }
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        wait_ms = (time.perf_counter() - getattr(self._local, "started", time.perf_counter())) * 1000
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(0, self.open_connections - 1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+async def warm_up_pool(client, connections: int):
+    """Open `connections` sockets up front by running that many pings concurrently"""
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(max(1, connections))))
@@ -0,0 +1,82 @@
+"""Recompute the insights stored on self_knowledge_results after the copy changes.
+
+Walks the collection in _id order. Each batch is scored in one pass with
+self_knowledge_insights_batch, and only documents whose insights actually
+changed are rewritten, with one unordered bulk_write per batch. Each update
+only applies if the insights are still the ones that were read, so the job is
+safe to run while the API is serving traffic.
+
+    python regenerate_self_knowledge_insights.py [--batch-size 1000] [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import ValidationError
+from pymongo import ASCENDING, UpdateOne
+
+from mongo_codec import CODEC_OPTIONS
+from server import SelfKnowledgeAnswer, self_knowledge_insights_batch
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("regenerate_self_knowledge_insights")
+
+async def regenerate(collection, batch_size: int, dry_run: bool) -> dict:
+    stats = {"scanned": 0, "updated": 0, "unchanged": 0, "invalid": 0}
+    last_id = None
+
+    while True:
+        query = {} if last_id is None else {"_id": {"$gt": last_id}}
+        batch = await collection.find(query, {"answers": 1, "insights": 1}).sort("_id", ASCENDING).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+        stats["scanned"] += len(batch)
+
+        documents, submissions = [], []
+        for doc in batch:
+            try:
+                submissions.append([SelfKnowledgeAnswer(**answer) for answer in doc.get("answers", [])])
+                documents.append(doc)
+            except (TypeError, ValidationError) as e:
+                stats["invalid"] += 1
+                error = str(e).replace("\n", " ")
+                logger.warning(f"{doc['_id']}: cannot read answers: {error}")
+
+        operations = []
+        for doc, insights in zip(documents, self_knowledge_insights_batch(submissions)):
+            if insights == doc.get("insights"):
+                stats["unchanged"] += 1
+                continue
+            operations.append(UpdateOne({"_id": doc["_id"], "insights": doc.get("insights")}, {"$set": {"insights": insights}}))
+
+        if operations and not dry_run:
+            result = await collection.bulk_write(operations, ordered=False)
+            stats["updated"] += result.modified_count
+        elif operations:
+            stats["updated"] += len(operations)
+
+    return stats
+
+async def main(batch_size: int, dry_run: bool):
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client.get_database(os.environ.get('DB_NAME', 'temperamentos_db'), codec_options=CODEC_OPTIONS)
+    try:
+        stats = await regenerate(db.self_knowledge_results, batch_size, dry_run)
+        logger.info(f"self_knowledge_results{' (dry run)' if dry_run else ''}: {stats}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute stored self-knowledge insights from the current insight table")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.dry_run))
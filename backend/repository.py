@@ -0,0 +1,182 @@
+"""Read-side data access for the API.
+
+Every query the routes issue goes through here so that each one fetches only the
+fields its caller uses, and so batch sizes and server-side time limits are tuned
+in a single place.
+"""
+import os
+from typing import Any, Dict, List, Optional, TypedDict
+
+from pymongo.collation import Collation
+
+# Query tuning
+MAX_TIME_MS = int(os.environ.get('MONGO_MAX_TIME_MS', '5000'))
+BATCH_SIZE = int(os.environ.get('MONGO_BATCH_SIZE', '100'))
+
+# Emails are matched case-insensitively (strength 2 ignores case, not accents)
+EMAIL_COLLATION = Collation(locale="en", strength=2)
+
+# Projections (the key field is always included so a match is never an empty dict)
+FULL_DOCUMENT = {"_id": 0}
+USER_BADGES = {"_id": 0, "id": 1, "badges": 1}
+USER_PREMIUM = {"_id": 0, "id": 1, "is_premium": 1}
+USER_PROFILE = {"_id": 0, "id": 1, "name": 1, "zodiac_sign": 1}
+USER_SIGN = {"_id": 0, "id": 1, "zodiac_sign": 1}
+PARTNER_PROFILE = {"_id": 0, "id": 1, "name": 1, "zodiac_sign": 1}
+DOMINANT_MODALITY = {"_id": 0, "user_id": 1, "dominant_modality": 1}
+PROGRESS_SUMMARY = {"_id": 0, "user_id": 1, "total_points": 1, "current_level": 1}
+MISSION_STATUS = {"_id": 0, "mission_id": 1, "completed": 1, "completed_at": 1}
+EXERCISE_STATUS = {"_id": 0, "exercise_title": 1, "difficulty_level": 1, "completed": 1, "feedback": 1, "completed_at": 1}
+TRANSACTION_STATUS = {"_id": 0, "session_id": 1, "user_id": 1, "processed": 1}
+
+# Return shapes
+class UserBadges(TypedDict, total=False):
+    id: str
+    badges: List[str]
+
+class UserPremiumStatus(TypedDict, total=False):
+    id: str
+    is_premium: bool
+
+class UserProfileFields(TypedDict, total=False):
+    id: str
+    name: str
+    zodiac_sign: str
+
+class PartnerProfileFields(TypedDict, total=False):
+    id: str
+    name: str
+    zodiac_sign: str
+
+class DominantModality(TypedDict, total=False):
+    user_id: str
+    dominant_modality: str
+
+class ProgressSummary(TypedDict, total=False):
+    user_id: str
+    total_points: int
+    current_level: int
+
+class MissionStatus(TypedDict, total=False):
+    mission_id: str
+    completed: bool
+    completed_at: Any
+
+class ExerciseStatus(TypedDict, total=False):
+    exercise_title: str
+    difficulty_level: int
+    completed: bool
+    feedback: Optional[str]
+    completed_at: Any
+
+class TransactionStatus(TypedDict, total=False):
+    session_id: str
+    user_id: str
+    processed: bool
+
+async def _find_one(collection, query: Dict[str, Any], projection: Dict[str, int], **kwargs) -> Optional[Dict[str, Any]]:
+    return await collection.find_one(query, projection, max_time_ms=MAX_TIME_MS, **kwargs)
+
+async def _find_all(collection, query: Dict[str, Any], projection: Dict[str, int]) -> List[Dict[str, Any]]:
+    cursor = collection.find(query, projection, max_time_ms=MAX_TIME_MS, batch_size=BATCH_SIZE)
+    return await cursor.to_list(length=None)
+
+# Users
+async def find_user(db, user_id: str) -> Optional[Dict[str, Any]]:
+    return await _find_one(db.users, {"id": user_id}, FULL_DOCUMENT)
+
+async def find_user_by_email(db, email: str) -> Optional[Dict[str, Any]]:
+    return await _find_one(db.users, {"email": email}, FULL_DOCUMENT, collation=EMAIL_COLLATION)
+
+async def find_user_badges(db, user_id: str) -> Optional[UserBadges]:
+    return await _find_one(db.users, {"id": user_id}, USER_BADGES)
+
+async def find_user_premium_status(db, user_id: str) -> Optional[UserPremiumStatus]:
+    return await _find_one(db.users, {"id": user_id}, USER_PREMIUM)
+
+async def find_user_profile(db, user_id: str) -> Optional[UserProfileFields]:
+    return await _find_one(db.users, {"id": user_id}, USER_PROFILE)
+
+async def find_user_profiles(db, user_ids: List[str]) -> List[UserProfileFields]:
+    return await _find_all(db.users, {"id": {"$in": user_ids}}, USER_PROFILE)
+
+def find_users(db, query: Dict[str, Any], sort: Optional[List] = None, batch_size: int = BATCH_SIZE, max_time_ms: Optional[int] = MAX_TIME_MS):
+    """Cursor over full user documents; callers decide whether to page or stream it.
+
+    maxTimeMS covers every getMore of the cursor, so streams over the whole
+    collection pass max_time_ms=None rather than dying partway through.
+    """
+    cursor = db.users.find(query, FULL_DOCUMENT, max_time_ms=max_time_ms, batch_size=batch_size)
+    if sort:
+        cursor = cursor.sort(sort)
+    return cursor
+
+def iter_user_signs(db, batch_size: int = 1000):
+    """Cursor over every user's sign, for building in-memory indexes"""
+    return db.users.find({}, USER_SIGN, batch_size=batch_size)
+
+# Questionnaire results
+async def find_questionnaire_result(db, user_id: str) -> Optional[Dict[str, Any]]:
+    return await _find_one(db.questionnaire_results, {"user_id": user_id}, FULL_DOCUMENT)
+
+async def find_dominant_modality(db, user_id: str) -> Optional[DominantModality]:
+    # Latest result wins, as in iter_dominant_modalities
+    return await _find_one(db.questionnaire_results, {"user_id": user_id}, DOMINANT_MODALITY, sort=[("completed_at", -1)])
+
+def iter_dominant_modalities(db, batch_size: int = 1000):
+    """Cursor over every questionnaire result's modality, oldest first"""
+    return db.questionnaire_results.find({}, DOMINANT_MODALITY, batch_size=batch_size, allow_disk_use=True).sort("completed_at", 1)
+
+# Progress
+async def find_user_progress(db, user_id: str) -> Optional[Dict[str, Any]]:
+    return await _find_one(db.user_progress, {"user_id": user_id}, FULL_DOCUMENT)
+
+async def find_progress_summary(db, user_id: str) -> Optional[ProgressSummary]:
+    return await _find_one(db.user_progress, {"user_id": user_id}, PROGRESS_SUMMARY)
+
+# Missions
+async def find_mission_status(db, user_id: str, mission_id: str) -> Optional[MissionStatus]:
+    return await _find_one(db.user_missions, {"user_id": user_id, "mission_id": mission_id}, MISSION_STATUS)
+
+async def find_mission_statuses(db, user_id: str, mission_ids: List[str]) -> Dict[str, MissionStatus]:
+    missions = await _find_all(db.user_missions, {"user_id": user_id, "mission_id": {"$in": mission_ids}}, MISSION_STATUS)
+    return {mission["mission_id"]: mission for mission in missions}
+
+# Exercises
+async def find_exercise_status(db, user_id: str, exercise_title: str) -> Optional[ExerciseStatus]:
+    return await _find_one(db.exercise_progress, {"user_id": user_id, "exercise_title": exercise_title}, EXERCISE_STATUS)
+
+async def find_exercise_statuses(db, user_id: str) -> List[ExerciseStatus]:
+    return await _find_all(db.exercise_progress, {"user_id": user_id}, EXERCISE_STATUS)
+
+# Daily advice
+async def find_daily_advice(db, user_id: str, date: str) -> Optional[Dict[str, Any]]:
+    return await _find_one(db.daily_advice, {"user_id": user_id, "date": date}, FULL_DOCUMENT)
+
+# Partners
+async def count_partners(db, user_id: str) -> int:
+    return await db.partners.count_documents({"user_id": user_id}, maxTimeMS=MAX_TIME_MS)
+
+async def find_partners(db, user_id: str) -> List[Dict[str, Any]]:
+    return await _find_all(db.partners, {"user_id": user_id}, FULL_DOCUMENT)
+
+async def find_partner_profile(db, partner_id: str) -> Optional[PartnerProfileFields]:
+    return await _find_one(db.partners, {"id": partner_id}, PARTNER_PROFILE)
+
+async def find_partner_profiles(db, user_id: str, partner_ids: List[str]) -> List[PartnerProfileFields]:
+    return await _find_all(db.partners, {"user_id": user_id, "id": {"$in": partner_ids}}, PARTNER_PROFILE)
+
+# Compatibility reports
+async def find_compatibility_report(db, report_id: str) -> Optional[Dict[str, Any]]:
+    return await _find_one(db.compatibility_reports, {"id": report_id}, FULL_DOCUMENT)
+
+async def find_enhanced_compatibility_report(db, user_id: str, partner_id: str) -> Optional[Dict[str, Any]]:
+    # Newest first, for databases not yet deduplicated by dedupe_enhanced_reports.py
+    return await _find_one(
+        db.enhanced_compatibility_reports, {"user_id": user_id, "partner_id": partner_id}, FULL_DOCUMENT,
+        sort=[("created_at", -1)]
+    )
+
+# Payments
+async def find_transaction_status(db, session_id: str) -> Optional[TransactionStatus]:
+    return await _find_one(db.payment_transactions, {"session_id": session_id}, TRANSACTION_STATUS)
@@ -1,32 +1,122 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Depends, Header, Query
 from dotenv import load_dotenv
+from fastapi.responses import StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
 import os
+import asyncio
+import json
+import base64
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import List, Optional, Dict, Any, Mapping, NamedTuple, Tuple
+from types import MappingProxyType
+from functools import cached_property
+from typing_extensions import TypedDict
+import itertools
+import hashlib
+import numpy as np
 import uuid
-from datetime import datetime, timezone
+import secrets
+from datetime import date, datetime, timezone
 from enum import Enum
+import repository
+from mongo_codec import CODEC_OPTIONS
+from compatibility_index import UNKNOWN as UNKNOWN_CODE, UserCodeIndex
+from compression import COMPRESSION_MINIMUM_SIZE, CompressionMiddleware
+from content_pack import ContentPack
+from content_registry import RELOAD_ERRORS, ContentRegistry
+from fast_responses import FAST_JSON_RESPONSE, model_response
+from mongo_pool import PoolMetricsListener, pool_options_from_env, warm_up_pool
+from static_payloads import StaticPayload
+from text_templates import TemplateRegistry
 from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection settings; the client itself is created per worker in lifespan()
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
 db_name = os.environ.get('DB_NAME', 'temperamentos_db')
-db = client[db_name]
+pool_options = pool_options_from_env()
+pool_metrics = PoolMetricsListener()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Created inside the running event loop, so importing this module opens no
+    # sockets and forked workers never share a pool
+    client = AsyncIOMotorClient(mongo_url, event_listeners=[pool_metrics], **pool_options)
+    app.state.mongo_client = client
+    app.state.db = client.get_database(db_name, codec_options=CODEC_OPTIONS)
+    app.state.compatibility_index = UserCodeIndex()
+    app.state.content = CONTENT_REGISTRY
+    content_watcher = asyncio.create_task(CONTENT_REGISTRY.watch(CONTENT_RELOAD_INTERVAL)) if CONTENT_RELOAD_INTERVAL > 0 else None
+    
+    # Independent steps: a failed warm-up must not skip creating the indexes
+    try:
+        # Pay connection setup before the first request instead of during it
+        await warm_up_pool(client, pool_options["minPoolSize"])
+        logger.info(f"MongoDB pool warmed up: {pool_metrics.snapshot()}")
+    except PyMongoError as e:
+        logger.warning(f"MongoDB pool warm-up failed: {str(e)}")
+    try:
+        await ensure_indexes(app.state.db)
+    except PyMongoError as e:
+        logger.error(f"MongoDB index creation failed: {str(e)}")
+    try:
+        await load_compatibility_index(app.state.db, app.state.compatibility_index)
+        logger.info(f"Compatibility index loaded: {len(app.state.compatibility_index)} users")
+    except PyMongoError as e:
+        logger.warning(f"Compatibility index load failed: {str(e)}")
+    
+    try:
+        yield
+    finally:
+        if content_watcher:
+            content_watcher.cancel()
+        client.close()
+
+def get_mongo_client(request: Request) -> AsyncIOMotorClient:
+    return request.app.state.mongo_client
+
+def get_db(request: Request) -> AsyncIOMotorDatabase:
+    return request.app.state.db
+
+def get_compatibility_index(request: Request) -> UserCodeIndex:
+    return request.app.state.compatibility_index
+
+def get_content_registry(request: Request) -> ContentRegistry:
+    return request.app.state.content
+
+def get_content(request: Request) -> "ContentLibrary":
+    """The content snapshot for this request; a reload mid-request does not change it"""
+    return request.app.state.content.current
+
+def get_static_payloads(content: "ContentLibrary" = Depends(get_content)) -> Dict[str, StaticPayload]:
+    return content.static_payloads
+
+# Upper bound on any single page of users returned by the API
+MAX_USERS_PAGE_SIZE = 100
+MAX_BATCH_CANDIDATES = 5000
+MAX_BATCH_EXPAND = 20
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=FAST_JSON_RESPONSE)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Operational endpoints (index stats, user listings) are restricted to admins
+def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Guard for operational endpoints; requires the ADMIN_API_KEY header"""
+    admin_key = os.environ.get('ADMIN_API_KEY')
+    if not admin_key or not x_admin_key or not secrets.compare_digest(x_admin_key, admin_key):
+        raise HTTPException(status_code=403, detail="Acesso restrito a administradores")
+
 # Enums
 class ZodiacSign(str, Enum):
     ARIES = "aries"
@@ -137,6 +227,26 @@ class EnhancedCompatibilityReport(BaseModel):
     recommendations: List[str]
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class CompatibilityBatchRequest(BaseModel):
+    user_id: str
+    partner_ids: List[str] = []
+    user_ids: List[str] = []
+    expand: List[str] = []  # Candidate IDs that should come back with the full report
+
+class CompatibilityBatchResult(BaseModel):
+    id: str
+    kind: str  # partner, user
+    name: str
+    zodiac_sign: ZodiacSign
+    compatibility_score: int
+    general_affinity: str
+    report: Optional[EnhancedCompatibilityReport] = None
+
+class CompatibilityBatchResponse(BaseModel):
+    user_id: str
+    results: List[CompatibilityBatchResult]
+    not_found: List[str]
+
 # Payment Models
 class PaymentTransaction(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -373,562 +483,349 @@ ZODIAC_DATA = {
     }
 }
 
-# Enhanced Detailed Temperament Profiles
-TEMPERAMENT_PROFILES = {
-    Modality.CARDINAL: TemperamentProfile(
-        modality=Modality.CARDINAL,
-        title="Temperamento Cardinal - O Iniciador",
-        description="Pessoas com temperamento Cardinal são líderes naturais, iniciadores e pioneiros. Elas têm uma energia direcionada para começar projetos, tomar decisões rápidas e liderar mudanças. São movidas pela ação e pelo desejo de criar algo novo.",
-        communication_style="Diretos e assertivos na comunicação. Preferem conversas objetivas e focadas em soluções. Podem parecer impacientes com discussões longas sem direcionamento claro.",
-        conflict_resolution="Enfrentam conflitos de frente, preferindo resolver rapidamente. Tendem a tomar a liderança na busca por soluções práticas e imediatas.",
-        intimacy_approach="Na intimidade, são apaixonados e intensos. Gostam de tomar a iniciativa e criar momentos especiais. Valorizam parceiros que acompanhem sua energia.",
-        decision_making="Tomam decisões rapidamente, baseadas na intuição e na urgência do momento. Preferem agir a ficar analisando por muito tempo.",
-        strengths=["Liderança natural", "Iniciativa", "Coragem para mudanças", "Energia motivadora", "Visão de futuro"],
-        challenges=["Impaciência", "Dificuldade em delegar", "Pode ser dominante", "Ansiedade por resultados", "Falta de persistência em projetos longos"],
-        growth_tips=["Pratique a paciência e a escuta ativa", "Aprenda a delegar responsabilidades", "Desenvolva persistência em projetos de longo prazo", "Equilibre ação com reflexão"],
-        emotional_triggers=[
-            "Lentidão ou indecisão dos outros",
-            "Falta de progresso visível",
-            "Microgerenciamento ou controle excessivo",
-            "Rotinas muito rígidas sem espaço para inovação",
-            "Críticas à sua capacidade de liderança"
-        ],
-        growth_strategies=[
-            "Desenvolva técnicas de respiração profunda para moments de impaciência",
-            "Pratique meditação de 10 minutos diários para cultivar paciência",
-            "Crie um sistema de delegação progressiva - comece com tarefas pequenas",
-            "Estabeleça metas intermediárias para projetos longos",
-            "Pratique ouvir sem interromper por 5 minutos em cada conversa"
-        ],
-        daily_practices=[
-            "Manhã: Defina 3 prioridades principais do dia",
-            "Tarde: Pare 10 minutos para reflexão sobre o progresso",
-            "Noite: Identifique uma lição aprendida e uma gratidão",
-            "Semanal: Reserve 1h para planejamento estratégico pessoal"
-        ],
-        relationship_dynamics={
-            "with_cardinal": "Parceria dinâmica mas pode gerar competição. Definam áreas de liderança específicas.",
-            "with_fixed": "Complementaridade poderosa. O Fixo oferece estabilidade, o Cardinal traz movimento.",
-            "with_mutable": "Combinação criativa. O Cardinal inicia, o Mutável adapta e aperfeiçoa."
-        }
-    ),
-    Modality.FIXED: TemperamentProfile(
-        modality=Modality.FIXED,
-        title="Temperamento Fixo - O Estabilizador",
-        description="Pessoas com temperamento Fixo são conhecidas pela estabilidade, lealdade e determinação. Elas valorizam segurança, consistência e profundidade nas relações. São o alicerce sólido em qualquer relacionamento.",
-        communication_style="Comunicação calma e ponderada. Preferem conversas profundas e significativas. Podem levar tempo para expressar sentimentos, mas quando o fazem, é com sinceridade.",
-        conflict_resolution="Evitam conflitos desnecessários, mas quando enfrentam problemas, mantêm sua posição com firmeza. Preferem estabilidade a mudanças drásticas.",
-        intimacy_approach="Na intimidade, são leais e dedicados. Constroem conexões profundas e duradouras. Valorizam rituais e tradições no relacionamento.",
-        decision_making="Tomam decisões cuidadosamente, considerando todas as implicações. Preferem manter o que já está funcionando bem.",
-        strengths=["Lealdade inabalável", "Estabilidade emocional", "Determinação", "Confiabilidade", "Profundidade nas relações"],
-        challenges=["Resistência a mudanças", "Teimosia", "Dificuldade para se adaptar", "Possessividade", "Rigidez de pensamento"],
-        growth_tips=["Pratique a flexibilidade em situações menores", "Abra-se para novas experiências", "Aprenda a expressar sentimentos mais abertamente", "Desenvolva tolerância a mudanças"],
-        emotional_triggers=[
-            "Mudanças bruscas ou inesperadas",
-            "Pressão para tomar decisões rápidas",
-            "Questionamento da sua lealdade ou compromisso",
-            "Instabilidade financeira ou emocional",
-            "Traição ou quebra de confiança"
-        ],
-        growth_strategies=[
-            "Comece com micro-mudanças diárias (novo caminho para o trabalho, comida diferente)",
-            "Pratique o exercício '3 opções': sempre considere 3 alternativas antes de decidir",
-            "Desenvolva um ritual de 'abertura' - 5 min diários pensando em uma novidade para experimentar",
-            "Crie um 'fundo de mudança' - reserve 10% do tempo para experimentos",
-            "Pratique yoga ou tai chi para desenvolver flexibilidade física e mental"
-        ],
-        daily_practices=[
-            "Manhã: Faça uma pequena mudança na rotina matinal",
-            "Tarde: Identifique uma crença ou opinião e questione-a gentilmente",
-            "Noite: Reflita sobre algo novo que aprendeu hoje",
-            "Semanal: Experimente uma atividade completamente nova"
-        ],
-        relationship_dynamics={
-            "with_cardinal": "O Cardinal acelera, o Fixo estabiliza. Negocie o ritmo das mudanças.",
-            "with_fixed": "Relacionamento sólido mas pode estagnar. Introduzam novidades juntos regularmente.",
-            "with_mutable": "O Fixo oferece âncora, o Mutável traz variedade. Equilibrem estabilidade e mudança."
-        }
-    ),
-    Modality.MUTABLE: TemperamentProfile(
-        modality=Modality.MUTABLE,
-        title="Temperamento Mutável - O Adaptador",
-        description="Pessoas com temperamento Mutável são flexíveis, adaptáveis e versáteis. Elas se ajustam facilmente a mudanças e são excelentes mediadoras. São como água, fluindo e se moldando às circunstâncias.",
-        communication_style="Comunicação flexível e empática. Adaptam seu estilo conforme a situação e a pessoa. São bons ouvintes e mediadores naturais.",
-        conflict_resolution="Preferem evitar conflitos através de compromissos e adaptações. São excelentes em encontrar soluções que agradem a todos.",
-        intimacy_approach="Na intimidade, são adaptáveis e atenciosos às necessidades do parceiro. Criam harmonia e evitam tensões desnecessárias.",
-        decision_making="Consideram múltiplas perspectivas antes de decidir. Podem mudar de opinião conforme novas informações surgem.",
-        strengths=["Adaptabilidade", "Empatia", "Versatilidade", "Capacidade de mediação", "Flexibilidade mental"],
-        challenges=["Indecisão", "Falta de direção clara", "Dificuldade em manter posições", "Evitação de conflitos necessários", "Inconsistência"],
-        growth_tips=["Desenvolva maior assertividade", "Pratique a tomada de decisões firmes", "Aprenda a manter posições importantes", "Equilibre adaptabilidade com consistência"],
-        emotional_triggers=[
-            "Pressão para tomar posições rígidas",
-            "Ambientes muito estruturados ou inflexíveis",
-            "Conflitos diretos e confrontos agressivos",
-            "Críticas à sua 'falta de consistência'",
-            "Situações que exigem compromisso de longo prazo imediato"
-        ],
-        growth_strategies=[
-            "Desenvolva o 'núcleo firme': identifique 3 valores inegociáveis pessoais",
-            "Pratique a técnica 'sim decidido': tome uma decisão pequena por dia e mantenha-a",
-            "Crie rituais de consistência: 3 hábitos pequenos que pratica diariamente",
-            "Desenvolva assertividade com o exercício 'opinião própria': expresse sua visão antes de ouvir outros",
-            "Use o 'método das âncoras': estabeleça pontos fixos na rotina para criar estabilidade"
-        ],
-        daily_practices=[
-            "Manhã: Defina uma prioridade pessoal que não será negociada hoje",
-            "Tarde: Pratique expressar uma opinião própria antes de pedir outras perspectivas",
-            "Noite: Identifique uma decisão que tomou e manteve durante o dia",
-            "Semanal: Escolha um compromisso pequeno e cumpra-o por 7 dias seguidos"
-        ],
-        relationship_dynamics={
-            "with_cardinal": "O Cardinal dirige, o Mutável refina. Estabeleçam momentos para que o Mutável também lidere.",
-            "with_fixed": "O Fixo oferece estrutura, o Mutável traz leveza. Respeitem os ritmos diferentes.",
-            "with_mutable": "Grande harmonia mas pode faltar direção. Definam metas claras e prazos juntos."
-        }
-    )
-}
+# Content pack
+# Profiles, questions, exercises, journey levels, advice and the compatibility
+# matrices live in content/ (see content_pack). build_content_pack.py validates
+# the pack once; a worker parses each section into CONTENT_SCHEMA's types and
+# indexes it the first time it is used. CONTENT_REGISTRY swaps
+# in new pack versions while serving (see content_registry); polling every
+# CONTENT_RELOAD_INTERVAL seconds, 0 to disable.
+CONTENT_DIR = Path(os.environ.get('CONTENT_DIR', ROOT_DIR / 'content'))
+CONTENT_RELOAD_INTERVAL = float(os.environ.get('CONTENT_RELOAD_INTERVAL', '30'))
+
+class DailyAdviceTemplate(TypedDict):
+    advice: str
+    reflection: str
+    action: str
+    category: str
 
-# Self-Knowledge Questions
-SELF_KNOWLEDGE_QUESTIONS = [
-    SelfKnowledgeQuestion(
-        id=1,
-        question="Como você reage quando sente que não é ouvido em uma discussão?",
-        category="communication",
-        options=[
-            {"answer": "Falo mais alto e insisto no meu ponto de vista", "modality": "cardinal", "score": 3},
-            {"answer": "Me calo e espero o momento certo para ser ouvido", "modality": "fixed", "score": 3},
-            {"answer": "Tento encontrar uma forma diferente de me expressar", "modality": "mutable", "score": 3}
-        ]
-    ),
-    SelfKnowledgeQuestion(
-        id=2,
-        question="Quando seu parceiro está passando por um momento difícil, você:",
-        category="intimacy",
-        options=[
-            {"answer": "Tomo a iniciativa para resolver o problema rapidamente", "modality": "cardinal", "score": 3},
-            {"answer": "Ofereço apoio constante e estável", "modality": "fixed", "score": 3},
-            {"answer": "Me adapto às necessidades dele no momento", "modality": "mutable", "score": 3}
-        ]
-    ),
-    SelfKnowledgeQuestion(
-        id=3,
-        question="Em situações de conflito no relacionamento, sua tendência é:",
-        category="conflict",
-        options=[
-            {"answer": "Enfrentar diretamente e buscar solução imediata", "modality": "cardinal", "score": 3},
-            {"answer": "Manter minha posição e esperar que o tempo resolva", "modality": "fixed", "score": 3},
-            {"answer": "Procurar um meio-termo que satisfaça ambos", "modality": "mutable", "score": 3}
-        ]
-    ),
-    SelfKnowledgeQuestion(
-        id=4,
-        question="Quando precisam tomar uma decisão importante juntos, você:",
-        category="decision_making",
-        options=[
-            {"answer": "Lidero o processo e tomo a decisão rapidamente", "modality": "cardinal", "score": 3},
-            {"answer": "Analiso profundamente e mantenho uma posição clara", "modality": "fixed", "score": 3},
-            {"answer": "Considero todas as opções e me adapto à melhor escolha", "modality": "mutable", "score": 3}
-        ]
-    ),
-    SelfKnowledgeQuestion(
-        id=5,
-        question="O que mais te incomoda em um relacionamento?",
-        category="communication",
-        options=[
-            {"answer": "Falta de ação e decisão do parceiro", "modality": "cardinal", "score": 3},
-            {"answer": "Instabilidade e mudanças constantes", "modality": "fixed", "score": 3},
-            {"answer": "Rigidez e falta de flexibilidade", "modality": "mutable", "score": 3}
-        ]
-    ),
-    SelfKnowledgeQuestion(
-        id=6,
-        question="Como você demonstra amor no relacionamento?",
-        category="intimacy",
-        options=[
-            {"answer": "Através de gestos grandiosos e iniciativas românticas", "modality": "cardinal", "score": 3},
-            {"answer": "Com lealdade, consistência e dedicação diária", "modality": "fixed", "score": 3},
-            {"answer": "Adaptando-me às necessidades e desejos do parceiro", "modality": "mutable", "score": 3}
-        ]
-    )
-]
+class TemperamentPairCompatibility(TypedDict):
+    affinity: str
+    score: int
+    conflicts: List[str]
+    strengths: List[str]
+    weaknesses: List[str]
 
-# Premium Couple Exercises
-COUPLE_EXERCISES = [
-    CoupleExercise(
-        title="Ritual de Conexão Diária",
-        category="communication",
-        description="Um exercício simples para manter a conexão emocional forte todos os dias",
-        instructions=[
-            "Reservem 15 minutos no final do dia, sem distrações (celular, TV, etc.)",
-            "Sentem-se de frente um para o outro, mantendo contato visual",
-            "Compartilhem 3 coisas: 1 gratidão, 1 desafio do dia, 1 expectativa para amanhã",
-            "Ouçam sem interromper, apenas fazendo perguntas de esclarecimento",
-            "Terminem com um abraço de 20 segundos (tempo necessário para liberar ocitocina)"
-        ],
-        duration_minutes=15,
-        difficulty_level=1,
-        required_materials=["Ambiente tranquilo", "15 minutos livres"],
-        expected_outcomes=["Maior intimidade emocional", "Melhor comunicação", "Conexão diária fortalecida"],
-        follow_up_questions=[
-            "Como vocês se sentiram durante o exercício?",
-            "Que diferenças notaram na qualidade da conexão?",
-            "Quais ajustes fariam para a próxima vez?"
-        ]
-    ),
-    CoupleExercise(
-        title="Roleplay de Resolução de Conflitos",
-        category="conflict_resolution",
-        description="Pratiquem resolver conflitos de forma construtiva através de representação",
-        instructions=[
-            "Escolham um conflito menor recente (não resolvido completamente)",
-            "Definam quem será 'Person A' e 'Person B' primeiro",
-            "Person A expressa seu ponto de vista por 3 minutos sem interrupção",
-            "Person B reflete o que ouviu antes de responder ('Entendi que você sente...')",
-            "Troquem de papéis e repitam o processo",
-            "Juntos, identifiquem pelo menos 2 pontos de acordo",
-            "Criem um plano de ação com pequenos passos concretos"
-        ],
-        duration_minutes=30,
-        difficulty_level=3,
-        required_materials=["Timer", "Papel para anotações"],
-        expected_outcomes=["Melhores habilidades de escuta", "Resolução construtiva", "Maior empatia mútua"],
-        follow_up_questions=[
-            "O que descobriram sobre o estilo de comunicação um do outro?",
-            "Que estratégias funcionaram melhor?",
-            "Como podem aplicar isso em conflitos futuros?"
-        ]
-    ),
-    CoupleExercise(
-        title="Mapa da Intimidade",
-        category="intimacy",
-        description="Explorem e compartilhem suas necessidades e desejos de intimidade física e emocional",
-        instructions=[
-            "Em papéis separados, desenhem/escrevam sobre 4 tipos de intimidade que valorizam:",
-            "1. Intimidade Física (toque, proximidade)",
-            "2. Intimidade Emocional (sentimentos, vulnerabilidade)",  
-            "3. Intimidade Intelectual (ideias, sonhos)",
-            "4. Intimidade Espiritual (valores, propósito)",
-            "Compartilhem seus 'mapas' um de cada vez, explicando cada área",
-            "Identifiquem áreas de sobreposição e diferenças",
-            "Criem um 'plano de intimidade' incluindo elementos importantes para ambos"
-        ],
-        duration_minutes=45,
-        difficulty_level=4,
-        required_materials=["Papel", "Canetas coloridas", "Ambiente privado"],
-        expected_outcomes=["Melhor compreensão das necessidades", "Intimidade mais profunda", "Plano personalizado"],
-        follow_up_questions=[
-            "Que descobertas surpreenderam vocês?",
-            "Em que áreas gostariam de crescer mais?",
-            "Como vão implementar o plano nas próximas semanas?"
-        ]
-    ),
-    CoupleExercise(
-        title="Arquitetura da Vida Compartilhada",
-        category="intimacy",
-        description="Desenhem juntos a arquitetura completa do relacionamento que desejam construir nos próximos 5-10 anos",
-        instructions=[
-            "Criem um ambiente cerimonial: velas, música suave, sem distrações por 90 minutos",
-            "Dividam uma cartolina grande em 6 áreas: Amor & Intimidade, Crescimento Pessoal, Família & Filhos, Carreira & Dinheiro, Aventuras & Sonhos, Legado & Propósito",
-            "Em cada área, escrevam/desenhem: Onde estamos hoje? Onde queremos chegar? Quais são nossos medos? Quais são nossas esperanças?",
-            "Para cada área, definam 3 valores inegociáveis e 3 sonhos compartilhados",
-            "Criem um 'Contrato de Crescimento': prometam apoiar ativamente o crescimento um do outro, mesmo quando for desconfortável",
-            "Estabeleçam rituais trimestrais para revisar e ajustar esta 'arquitetura'",
-            "Terminem criando uma declaração de missão do relacionamento (1-2 frases poderosas)",
-            "Assinem juntos e guardem como documento sagrado do relacionamento"
-        ],
-        duration_minutes=90,
-        difficulty_level=5,
-        required_materials=["Cartolina grande", "Canetas coloridas", "Velas", "Ambiente íntimo", "90 minutos ininterruptos"],
-        expected_outcomes=["Visão compartilhada profunda", "Alinhamento de valores e sonhos", "Compromisso consciente de crescimento mútuo", "Rituais de conexão estabelecidos"],
-        follow_up_questions=[
-            "Que diferenças entre suas visões individuais mais os surpreenderam?",
-            "Quais compromissos vão exigir mais coragem e crescimento de cada um?",
-            "Como pretendem honrar este 'contrato sagrado' nos momentos difíceis?",
-            "Que rituais específicos vão implementar para manter viva esta visão?"
-        ]
-    )
-]
+class ElementPairCompatibility(TypedDict):
+    multiplier: float
+    description: str
 
-# Journey Levels System
-JOURNEY_LEVELS = [
-    JourneyLevel(
-        level=1,
-        title="Despertar - Descoberta Pessoal",
-        description="Compreenda profundamente seu próprio temperamento e padrões",
-        unlock_requirements={"profile_created": True, "questionnaire_completed": True},
-        content_unlocked=["Perfil detalhado", "Gatilhos emocionais", "Práticas diárias"],
-        exercises_available=["Ritual de Conexão Diária"],
-        estimated_duration_days=7
-    ),
-    JourneyLevel(
-        level=2,
-        title="Conexão - Dinâmica do Casal",
-        description="Explore como vocês interagem e se complementam",
-        unlock_requirements={"level_1_completed": True, "compatibility_report": True},
-        content_unlocked=["Dinâmicas de relacionamento", "Exercícios de comunicação"],
-        exercises_available=["Roleplay de Resolução de Conflitos", "Ritual de Conexão Diária"],
-        estimated_duration_days=14
-    ),
-    JourneyLevel(
-        level=3,
-        title="Profundidade - Intimidade Avançada",
-        description="Desenvolvam intimidade em múltiplas dimensões",
-        unlock_requirements={"level_2_completed": True, "exercises_completed": 3},
-        content_unlocked=["Mapa da Intimidade", "Conselheiro Virtual Avançado"],
-        exercises_available=["Mapa da Intimidade", "Todos os exercícios anteriores"],
-        estimated_duration_days=21
-    ),
-    JourneyLevel(
-        level=4,
-        title="Maestria - Crescimento Contínuo",
-        description="Mantenham e aprofundem continuamente sua conexão",
-        unlock_requirements={"level_3_completed": True, "weeks_active": 4},
-        content_unlocked=["Conselhos personalizados", "Relatórios mensais", "Exercícios avançados"],
-        exercises_available=["Todos + exercícios personalizados"],
-        estimated_duration_days=30
-    )
-]
+class QualityPairCompatibility(TypedDict):
+    adjustment: int
+    note: str
+
+class CompatibilityMatrices(TypedDict):
+    """Each matrix maps first trait -> second trait -> entry; lookups are order-independent"""
+    temperament: Dict[str, Dict[str, TemperamentPairCompatibility]]
+    element: Dict[str, Dict[str, ElementPairCompatibility]]
+    quality: Dict[str, Dict[str, QualityPairCompatibility]]
+
+CONTENT_SCHEMA = {
+    "temperament_profiles": TypeAdapter(Dict[Modality, TemperamentProfile]),
+    "self_knowledge_questions": TypeAdapter(List[SelfKnowledgeQuestion]),
+    "couple_exercises": TypeAdapter(List[CoupleExercise]),
+    "journey_levels": TypeAdapter(List[JourneyLevel]),
+    "advanced_self_knowledge": TypeAdapter(List[AdvancedSelfKnowledgeQuestion]),
+    "daily_advice_templates": TypeAdapter(Dict[Modality, List[DailyAdviceTemplate]]),
+    "compatibility": TypeAdapter(CompatibilityMatrices),
+}
 
-# Advanced Self-Knowledge Questions
-ADVANCED_SELF_KNOWLEDGE = [
-    AdvancedSelfKnowledgeQuestion(
-        id=1,
-        question="Quando você se sente mais autêntico e verdadeiro consigo mesmo?",
-        category="identity",
-        reflection_prompt="Pense em momentos específicos quando você sentiu que estava sendo completamente você mesmo, sem máscaras ou pretensões.",
-        follow_up_questions=[
-            "O que estava acontecendo ao seu redor nesses momentos?",
-            "Quais pessoas estavam presentes?",
-            "Que atividades você estava fazendo?",
-            "Como você pode criar mais desses momentos na sua vida?"
-        ],
-        interpretation_guide="A autenticidade está ligada ao alinhamento entre valores internos e ações externas. Pessoas Cardinais se sentem autênticas liderando, Fixas mantendo valores, Mutáveis adaptando-se genuinamente."
-    ),
-    AdvancedSelfKnowledgeQuestion(
-        id=2,
-        question="Qual é o legado emocional que você gostaria de deixar no seu relacionamento?",
-        category="purpose",
-        reflection_prompt="Imagine seu parceiro descrevendo o impacto emocional que você teve na vida dele. O que você gostaria que fosse dito?",
-        follow_up_questions=[
-            "Que qualidades emocionais você mais valoriza?",
-            "Como você quer ser lembrado pelo seu parceiro?",
-            "Que diferença você quer fazer na vida dele?",
-            "Que passos você pode dar hoje para construir esse legado?"
-        ],
-        interpretation_guide="O legado emocional reflete seus valores mais profundos. Cardinais querem inspirar, Fixos querem oferecer segurança, Mutáveis querem proporcionar crescimento."
-    )
+def _pair_table(matrix: Dict[str, Dict[str, Any]]) -> Dict[tuple, Any]:
+    return {(first, second): entry for first, row in matrix.items() for second, entry in row.items()}
+
+def _duplicates(values) -> List[Any]:
+    seen, duplicates = set(), []
+    for value in values:
+        if value in seen:
+            duplicates.append(value)
+        seen.add(value)
+    return duplicates
+
+class ContentLibrary:
+    """One content pack version: typed, indexed views and everything derived from them.
+
+    Each view is built on first access, or all at once by prepare() for a
+    snapshot about to be swapped in. Instances are never modified after that,
+    so a request can hold one while a newer version is swapped in.
+    """
+
+    def __init__(self, pack: ContentPack):
+        self.pack = pack
+    
+    @property
+    def version(self) -> str:
+        return self.pack.version
+    
+    def _load(self, name: str) -> Any:
+        return CONTENT_SCHEMA[name].validate_python(self.pack.section(name))
+    
+    @cached_property
+    def temperament_profiles(self) -> Dict[Modality, TemperamentProfile]:
+        return self._load("temperament_profiles")
+    
+    @cached_property
+    def self_knowledge_questions(self) -> List[SelfKnowledgeQuestion]:
+        return self._load("self_knowledge_questions")
+    
+    @cached_property
+    def self_knowledge_answer_index(self) -> Mapping[Tuple[int, str], Tuple[str, int]]:
+        return build_answer_index((q.id, q.options) for q in self.self_knowledge_questions)
+    
+    @cached_property
+    def couple_exercises(self) -> List[CoupleExercise]:
+        return self._load("couple_exercises")
+    
+    @cached_property
+    def couple_exercises_by_id(self) -> Dict[str, CoupleExercise]:
+        return {exercise.id: exercise for exercise in self.couple_exercises}
+    
+    @cached_property
+    def couple_exercises_by_title(self) -> Dict[str, CoupleExercise]:
+        return {exercise.title: exercise for exercise in self.couple_exercises}
+    
+    @cached_property
+    def first_exercise_by_level(self) -> Dict[int, CoupleExercise]:
+        index = {}
+        for exercise in self.couple_exercises:
+            index.setdefault(exercise.difficulty_level, exercise)
+        return index
+    
+    @cached_property
+    def journey_levels(self) -> List[JourneyLevel]:
+        return self._load("journey_levels")
+    
+    @cached_property
+    def advanced_self_knowledge(self) -> List[AdvancedSelfKnowledgeQuestion]:
+        return self._load("advanced_self_knowledge")
+    
+    @cached_property
+    def daily_advice_templates(self) -> Dict[Modality, List[DailyAdviceTemplate]]:
+        return self._load("daily_advice_templates")
+    
+    @cached_property
+    def _compatibility(self) -> CompatibilityMatrices:
+        return self._load("compatibility")
+    
+    @cached_property
+    def temperament_compatibility(self) -> Dict[tuple, TemperamentPairCompatibility]:
+        return _pair_table(self._compatibility["temperament"])
+    
+    @cached_property
+    def element_compatibility(self) -> Dict[tuple, ElementPairCompatibility]:
+        return _pair_table(self._compatibility["element"])
+    
+    @cached_property
+    def quality_compatibility(self) -> Dict[tuple, QualityPairCompatibility]:
+        return _pair_table(self._compatibility["quality"])
+    
+    @cached_property
+    def _enhanced(self) -> Tuple[Mapping[tuple, "EnhancedCompatibilityTemplate"], TemplateRegistry]:
+        # Sign-pair texts are registered in a copy of the shared templates, so
+        # snapshots never see each other's copy. Their IDs are positional, so
+        # stored reports are only rendered by a snapshot with the same
+        # enhanced_table_version (see render_enhanced_report)
+        text_templates = TEXT_TEMPLATES.copy()
+        return build_enhanced_compatibility_table(self, text_templates), text_templates
+    
+    @property
+    def enhanced_table(self) -> Mapping[tuple, "EnhancedCompatibilityTemplate"]:
+        return self._enhanced[0]
+    
+    @property
+    def text_templates(self) -> TemplateRegistry:
+        return self._enhanced[1]
+    
+    @cached_property
+    def enhanced_score_matrices(self) -> "EnhancedScoreMatrices":
+        return build_enhanced_score_matrices(self)
+    
+    @cached_property
+    def enhanced_table_version(self) -> str:
+        return enhanced_table_version(self)
+    
+    @cached_property
+    def static_payloads(self) -> Dict[str, StaticPayload]:
+        return build_static_payloads(self)
+    
+    def prepare(self) -> "ContentLibrary":
+        """Parse every section and build every view, so a bad pack fails here and not in a request.
+
+        The cross-checks in problems() are left to build_content_pack.py, which
+        only writes a manifest for a pack that passes them.
+        """
+        for view in ("temperament_profiles", "self_knowledge_questions", "couple_exercises", "journey_levels",
+                     "advanced_self_knowledge", "daily_advice_templates", "_compatibility", "self_knowledge_answer_index",
+                     "couple_exercises_by_id", "first_exercise_by_level", "_enhanced", "enhanced_score_matrices", "enhanced_table_version", "static_payloads"):
+            getattr(self, view)
+        return self
+    
+    def problems(self) -> List[str]:
+        """Load every section (schema errors raise) and list cross-references the schema cannot check"""
+        problems = []
+        for modality in Modality:
+            profile = self.temperament_profiles.get(modality)
+            if profile is None:
+                problems.append(f"temperament_profiles: missing {modality.value}")
+            elif profile.modality != modality:
+                problems.append(f"temperament_profiles: {modality.value} profile has modality {profile.modality.value}")
+            if not self.daily_advice_templates.get(modality):
+                problems.append(f"daily_advice_templates: no advice for {modality.value}")
+        
+        for section, values in (
+            ("self_knowledge_questions", [q.id for q in self.self_knowledge_questions]),
+            ("advanced_self_knowledge", [q.id for q in self.advanced_self_knowledge]),
+            ("couple_exercises", [exercise.id for exercise in self.couple_exercises]),
+            ("couple_exercises", [exercise.title for exercise in self.couple_exercises]),
+            ("journey_levels", [level.level for level in self.journey_levels]),
+        ):
+            problems.extend(f"{section}: duplicate {value!r}" for value in _duplicates(values))
+        
+        modalities = {modality.value for modality in Modality}
+        for question in self.self_knowledge_questions:
+            for option in question.options:
+                if not isinstance(option.get("answer"), str) or option.get("modality") not in modalities or not isinstance(option.get("score"), int):
+                    problems.append(f"self_knowledge_questions: question {question.id} has a malformed option {option!r}")
+        
+        for matrix, known in (
+            (self.temperament_compatibility, TEMPERAMENT_DESCRIPTIONS),
+            (self.element_compatibility, ELEMENT_CODES),
+            (self.quality_compatibility, QUALITY_CODES),
+        ):
+            for pair in matrix:
+                unknown = [trait for trait in pair if trait not in known]
+                if unknown:
+                    problems.append(f"compatibility: unknown trait {unknown[0]!r} in {pair}")
+        return problems
+
+CONTENT_REGISTRY: ContentRegistry[ContentLibrary] = ContentRegistry(CONTENT_DIR, ContentLibrary)
+
+# Zodiac lookup by birth date
+SIGN_CODES = {sign: code for code, sign in enumerate(ZodiacSign)}
+SIGNS_BY_CODE = list(ZodiacSign)
+
+# First day of each sign, in calendar order (Capricorn wraps around the new year)
+ZODIAC_START_DATES = [
+    (1, 20, ZodiacSign.AQUARIUS),
+    (2, 19, ZodiacSign.PISCES),
+    (3, 21, ZodiacSign.ARIES),
+    (4, 20, ZodiacSign.TAURUS),
+    (5, 21, ZodiacSign.GEMINI),
+    (6, 21, ZodiacSign.CANCER),
+    (7, 23, ZodiacSign.LEO),
+    (8, 23, ZodiacSign.VIRGO),
+    (9, 23, ZodiacSign.LIBRA),
+    (10, 23, ZodiacSign.SCORPIO),
+    (11, 22, ZodiacSign.SAGITTARIUS),
+    (12, 22, ZodiacSign.CAPRICORN),
 ]
 
-# Daily Advice Templates
-DAILY_ADVICE_TEMPLATES = {
-    Modality.CARDINAL: [
-        {
-            "advice": "Hoje, pratique liderar através do exemplo ao invés de palavras. Sua energia natural inspira mais do que direcionamentos verbais.",
-            "reflection": "Em que situação hoje você pode influenciar positivamente alguém apenas sendo você mesmo?",
-            "action": "Escolha uma área para liderar pelo exemplo durante todo o dia.",
-            "category": "leadership"
-        },
-        {
-            "advice": "Sua impaciência pode ser transformada em urgência produtiva. Canal essa energia para uma prioridade importante.",
-            "reflection": "Qual projeto ou objetivo está esperando sua energia de iniciação?",
-            "action": "Dedique 30 minutos para dar o primeiro passo em algo importante que estava adiando.",
-            "category": "productivity"
-        }
-    ],
-    Modality.FIXED: [
-        {
-            "advice": "Sua estabilidade é um presente para outros. Hoje, seja conscientemente uma âncora emocional para alguém.",
-            "reflection": "Quem ao seu redor poderia se beneficiar da sua presença estável e confiável?",
-            "action": "Ofereça apoio consistente a uma pessoa que está passando por mudanças.",
-            "category": "support"
-        },
-        {
-            "advice": "Experimente algo pequeno e novo hoje. Sua zona de conforto pode se expandir com passos gentis.",
-            "reflection": "Que mudança pequena e segura você poderia experimentar hoje?",
-            "action": "Faça uma escolha diferente em algo rotineiro (caminho, comida, atividade).",
-            "category": "growth"
-        }
-    ],
-    Modality.MUTABLE: [
-        {
-            "advice": "Sua adaptabilidade é uma força. Hoje, use-a conscientemente para trazer harmonia a uma situação tensa.",
-            "reflection": "Onde sua capacidade de mediar e adaptar pode fazer diferença hoje?",
-            "action": "Identifique um conflito menor e atue como mediador pacífico.",
-            "category": "harmony"
-        },
-        {
-            "advice": "Pratique manter uma posição firme em algo importante para você. Sua flexibilidade não significa ausência de convicções.",
-            "reflection": "Sobre que valores ou princípios você não deveria ser flexível?",
-            "action": "Identifique uma situação onde você precisa ser firme e pratique essa firmeza gentil.",
-            "category": "assertiveness"
-        }
-    ]
-}
+# Days are indexed on a leap-year calendar so 29/02 has its own slot
+DAYS_IN_MONTH = np.array([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+DAYS_BEFORE_MONTH = np.concatenate([[0], np.cumsum(DAYS_IN_MONTH[1:])])
+
+def _build_zodiac_by_day() -> Tuple[ZodiacSign, ...]:
+    signs = []
+    for month in range(1, 13):
+        for day in range(1, DAYS_IN_MONTH[month] + 1):
+            sign = ZodiacSign.CAPRICORN
+            for start_month, start_day, start_sign in ZODIAC_START_DATES:
+                if (month, day) >= (start_month, start_day):
+                    sign = start_sign
+            signs.append(sign)
+    return tuple(signs)
+
+ZODIAC_BY_DAY_OF_YEAR = _build_zodiac_by_day()
+ZODIAC_CODE_BY_DAY_OF_YEAR = np.array([SIGN_CODES[sign] for sign in ZODIAC_BY_DAY_OF_YEAR], dtype=np.int8)
+
+class InvalidBirthDate(ValueError):
+    pass
+
+def parse_birth_date(birth_date_str: str) -> Tuple[int, int]:
+    """Strict YYYY-MM-DD parse returning (month, day); raises InvalidBirthDate"""
+    if not isinstance(birth_date_str, str) or len(birth_date_str) != 10 or birth_date_str[4] != "-" or birth_date_str[7] != "-":
+        raise InvalidBirthDate(f"Data de nascimento inválida: {birth_date_str!r}")
+    year, month, day = birth_date_str[:4], birth_date_str[5:7], birth_date_str[8:]
+    if not (year.isascii() and year.isdigit() and month.isascii() and month.isdigit() and day.isascii() and day.isdigit()):
+        raise InvalidBirthDate(f"Data de nascimento inválida: {birth_date_str!r}")
+    try:
+        parsed = date(int(year), int(month), int(day))
+    except ValueError:
+        raise InvalidBirthDate(f"Data de nascimento inválida: {birth_date_str!r}")
+    return parsed.month, parsed.day
 
-# Advanced Compatibility Matrix
-TEMPERAMENT_COMPATIBILITY = {
-    ("Colérico", "Colérico"): {
-        "affinity": "Médio",
-        "score": 65,
-        "conflicts": ["Disputas pelo controle", "Ambos querem liderar", "Conflitos de ego"],
-        "strengths": ["Alta energia", "Objetivos claros", "Decisões rápidas"],
-        "weaknesses": ["Competitividade excessiva", "Falta de paciência mútua", "Tendência ao confronto"]
-    },
-    ("Colérico", "Sanguíneo"): {
-        "affinity": "Alto",
-        "score": 85,
-        "conflicts": ["Colérico pode achar Sanguíneo desorganizado", "Sanguíneo pode se sentir pressionado"],
-        "strengths": ["Complementaridade perfeita", "Energia + Entusiasmo", "Liderança + Carisma"],
-        "weaknesses": ["Diferentes ritmos de trabalho", "Colérico muito sério vs Sanguíneo muito casual"]
-    },
-    ("Colérico", "Melancólico"): {
-        "affinity": "Médio",
-        "score": 70,
-        "conflicts": ["Ritmos diferentes", "Colérico impaciente vs Melancólico cauteloso"],
-        "strengths": ["Liderança + Análise", "Ação + Reflexão", "Objetivos + Qualidade"],
-        "weaknesses": ["Colérico pode ser muito direto", "Melancólico pode ser muito crítico"]
-    },
-    ("Colérico", "Fleumático"): {
-        "affinity": "Baixo",
-        "score": 55,
-        "conflicts": ["Colérico frustrado com lentidão", "Fleumático sobrecarregado pela intensidade"],
-        "strengths": ["Liderança + Estabilidade", "Ação + Paciência"],
-        "weaknesses": ["Ritmos completamente diferentes", "Comunicação pode ser difícil"]
-    },
-    ("Sanguíneo", "Sanguíneo"): {
-        "affinity": "Alto",
-        "score": 80,
-        "conflicts": ["Desorganização dupla", "Dificuldade para tomar decisões sérias"],
-        "strengths": ["Diversão garantida", "Sociabilidade", "Otimismo mútuo"],
-        "weaknesses": ["Falta de praticidade", "Podem se distrair facilmente"]
-    },
-    ("Sanguíneo", "Melancólico"): {
-        "affinity": "Médio",
-        "score": 75,
-        "conflicts": ["Sanguíneo muito casual vs Melancólico muito sério", "Diferentes abordagens sociais"],
-        "strengths": ["Equilíbrio perfeito", "Espontaneidade + Planejamento", "Social + Profundo"],
-        "weaknesses": ["Sanguíneo pode cansar Melancólico", "Melancólico pode frustrar Sanguíneo"]
-    },
-    ("Sanguíneo", "Fleumático"): {
-        "affinity": "Alto",
-        "score": 85,
-        "conflicts": ["Sanguíneo pode achar Fleumático passivo", "Diferentes níveis de energia"],
-        "strengths": ["Harmonia natural", "Sanguíneo anima, Fleumático acalma", "Complementaridade social"],
-        "weaknesses": ["Sanguíneo pode dominar as decisões", "Fleumático pode se sentir negligenciado"]
-    },
-    ("Melancólico", "Melancólico"): {
-        "affinity": "Médio",
-        "score": 70,
-        "conflicts": ["Críticas mútuas", "Pessimismo duplo", "Perfeccionismo excessivo"],
-        "strengths": ["Compreensão profunda", "Valores similares", "Lealdade mútua"],
-        "weaknesses": ["Podem se isolar socialmente", "Dificuldade para relaxar juntos"]
-    },
-    ("Melancólico", "Fleumático"): {
-        "affinity": "Alto",
-        "score": 90,
-        "conflicts": ["Melancólico pode ser muito crítico", "Fleumático pode evitar discussões necessárias"],
-        "strengths": ["Relacionamento estável", "Respeito mútuo", "Crescimento gradual"],
-        "weaknesses": ["Podem ser muito cautelosos", "Falta de espontaneidade"]
-    },
-    ("Fleumático", "Fleumático"): {
-        "affinity": "Médio",
-        "score": 65,
-        "conflicts": ["Falta de iniciativa", "Decisões podem demorar muito", "Passividade dupla"],
-        "strengths": ["Paz e harmonia", "Evitam conflitos", "Relacionamento tranquilo"],
-        "weaknesses": ["Falta de dinamismo", "Podem estagnar", "Dificuldade para mudanças"]
-    }
+def determine_zodiac_from_birth_date(birth_date_str: str) -> ZodiacSign:
+    """Determine zodiac sign from birth date; raises InvalidBirthDate for malformed dates"""
+    month, day = parse_birth_date(birth_date_str)
+    return ZODIAC_BY_DAY_OF_YEAR[DAYS_BEFORE_MONTH[month - 1] + day - 1]
+
+def determine_zodiac_codes(birth_dates) -> np.ndarray:
+    """Sign codes (SIGN_CODES order) for a list/array/Series of YYYY-MM-DD strings in one pass; -1 marks malformed dates"""
+    values = np.asarray(birth_dates, dtype=object).astype(str)
+    if values.size == 0:
+        return np.empty(0, dtype=np.int8)
+    
+    well_formed = np.char.str_len(values) == 10
+    chars = np.where(well_formed, values, "0000-00-00").astype("U10").view("U1").reshape(-1, 10)
+    digit_chars = chars[:, [0, 1, 2, 3, 5, 6, 8, 9]]
+    is_digit = np.isin(digit_chars, list("0123456789"))
+    well_formed &= (chars[:, 4] == "-") & (chars[:, 7] == "-") & is_digit.all(axis=1)
+    
+    digits = np.where(is_digit, digit_chars, "0").astype(np.int64)
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 4] * 10 + digits[:, 5]
+    day = digits[:, 6] * 10 + digits[:, 7]
+    
+    valid_month = (month >= 1) & (month <= 12)
+    safe_month = np.where(valid_month, month, 1)
+    is_leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_length = DAYS_IN_MONTH[safe_month] - ((safe_month == 2) & ~is_leap)
+    valid = well_formed & (year >= 1) & valid_month & (day >= 1) & (day <= month_length)
+    
+    day_index = np.where(valid, DAYS_BEFORE_MONTH[safe_month - 1] + day - 1, 0)
+    return np.where(valid, ZODIAC_CODE_BY_DAY_OF_YEAR[day_index], -1).astype(np.int8)
+
+# Report copy, rendered from template IDs (see text_templates)
+TEXT_TEMPLATES = TemplateRegistry()
+
+# Fallback for temperament combinations missing from the temperament compatibility matrix
+DEFAULT_TEMPERAMENT_COMPATIBILITY = {
+    "affinity": "Médio",
+    "score": 70,
+    "conflicts": ["Necessária análise mais detalhada"],
+    "strengths": ["Potencial para crescimento mútuo"],
+    "weaknesses": ["Requer trabalho de comunicação"]
 }
 
-ELEMENT_COMPATIBILITY = {
-    ("Fogo", "Fogo"): {"multiplier": 1.1, "description": "Energia intensa, mas pode queimar"},
-    ("Fogo", "Ar"): {"multiplier": 1.3, "description": "Ar alimenta o fogo - combinação poderosa"},
-    ("Fogo", "Terra"): {"multiplier": 0.8, "description": "Terra pode sufocar o fogo"},
-    ("Fogo", "Água"): {"multiplier": 0.6, "description": "Água apaga o fogo - opostos"},
-    ("Ar", "Ar"): {"multiplier": 1.1, "description": "Conexão mental forte"},
-    ("Ar", "Terra"): {"multiplier": 0.7, "description": "Ar dispersa, Terra fixa"},
-    ("Ar", "Água"): {"multiplier": 0.8, "description": "Diferentes formas de fluidez"},
-    ("Terra", "Terra"): {"multiplier": 1.2, "description": "Base sólida e estável"},
-    ("Terra", "Água"): {"multiplier": 1.4, "description": "Água nutre a Terra - complementaridade perfeita"},
-    ("Água", "Água"): {"multiplier": 1.1, "description": "Profundidade emocional intensa"}
-}
+class EnhancedCompatibilityTemplate(NamedTuple):
+    """Precomputed enhanced report for one sign pair; texts are template IDs rendered with {name1}/{name2}"""
+    score: int
+    affinity: str
+    potential_conflicts: Tuple[str, ...]
+    strength_points: Tuple[str, ...]
+    weakness_points: Tuple[str, ...]
+    detailed_analysis: Mapping[str, str]
+    recommendations: Tuple[str, ...]
 
-QUALITY_COMPATIBILITY = {
-    ("Cardinal", "Cardinal"): {"adjustment": -5, "note": "Ambos querem liderar"},
-    ("Cardinal", "Fixo"): {"adjustment": 10, "note": "Cardinal inicia, Fixo sustenta"},
-    ("Cardinal", "Mutável"): {"adjustment": 5, "note": "Cardinal dirige, Mutável adapta"},
-    ("Fixo", "Fixo"): {"adjustment": 5, "note": "Muito estável, mas pode estagnar"},
-    ("Fixo", "Mutável"): {"adjustment": 15, "note": "Fixo oferece base, Mutável traz mudança"},
-    ("Mutável", "Mutável"): {"adjustment": -10, "note": "Falta de direção clara"}
-}
+ENHANCED_TEXT_FIELDS = ("potential_conflicts", "strength_points", "weakness_points", "detailed_analysis", "recommendations")
 
-def determine_zodiac_from_birth_date(birth_date_str: str) -> ZodiacSign:
-    """Determine zodiac sign from birth date"""
-    from datetime import datetime
-    
-    try:
-        birth_date = datetime.strptime(birth_date_str, "%Y-%m-%d")
-        month = birth_date.month
-        day = birth_date.day
-        
-        # Zodiac sign determination logic
-        if (month == 3 and day >= 21) or (month == 4 and day <= 19):
-            return ZodiacSign.ARIES
-        elif (month == 4 and day >= 20) or (month == 5 and day <= 20):
-            return ZodiacSign.TAURUS
-        elif (month == 5 and day >= 21) or (month == 6 and day <= 20):
-            return ZodiacSign.GEMINI
-        elif (month == 6 and day >= 21) or (month == 7 and day <= 22):
-            return ZodiacSign.CANCER
-        elif (month == 7 and day >= 23) or (month == 8 and day <= 22):
-            return ZodiacSign.LEO
-        elif (month == 8 and day >= 23) or (month == 9 and day <= 22):
-            return ZodiacSign.VIRGO
-        elif (month == 9 and day >= 23) or (month == 10 and day <= 22):
-            return ZodiacSign.LIBRA
-        elif (month == 10 and day >= 23) or (month == 11 and day <= 21):
-            return ZodiacSign.SCORPIO
-        elif (month == 11 and day >= 22) or (month == 12 and day <= 21):
-            return ZodiacSign.SAGITTARIUS
-        elif (month == 12 and day >= 22) or (month == 1 and day <= 19):
-            return ZodiacSign.CAPRICORN
-        elif (month == 1 and day >= 20) or (month == 2 and day <= 18):
-            return ZodiacSign.AQUARIUS
-        else:  # Pisces
-            return ZodiacSign.PISCES
-            
-    except Exception:
-        return ZodiacSign.ARIES  # Default fallback
+def _symmetric_lookup(table: Dict[tuple, Any], first: str, second: str) -> Optional[Any]:
+    return table.get((first, second), table.get((second, first)))
 
-def calculate_enhanced_compatibility(user_profile: Dict, partner_profile: Dict) -> EnhancedCompatibilityReport:
-    """Calculate comprehensive compatibility between two profiles"""
-    
-    # Get temperament compatibility
-    temp_key = (user_profile["temperament"], partner_profile["temperament"])
-    temp_compat = TEMPERAMENT_COMPATIBILITY.get(temp_key, TEMPERAMENT_COMPATIBILITY.get((temp_key[1], temp_key[0])))
-    
+def _enhanced_pair_entry(content: "ContentLibrary", text_templates: TemplateRegistry, sign1: ZodiacSign, sign2: ZodiacSign) -> EnhancedCompatibilityTemplate:
+    sign1_data, sign2_data = ZODIAC_DATA[sign1], ZODIAC_DATA[sign2]
+    temp_compat = _symmetric_lookup(content.temperament_compatibility, sign1_data["temperament"], sign2_data["temperament"])
     if not temp_compat:
-        # Fallback for missing combinations
-        temp_compat = {
-            "affinity": "Médio",
-            "score": 70,
-            "conflicts": ["Necessária análise mais detalhada"],
-            "strengths": ["Potencial para crescimento mútuo"],
-            "weaknesses": ["Requer trabalho de comunicação"]
-        }
+        temp_compat = DEFAULT_TEMPERAMENT_COMPATIBILITY
     
     base_score = temp_compat["score"]
     
     # Apply element compatibility multiplier
-    element_key = (user_profile["element_pt"], partner_profile["element_pt"])
-    element_compat = ELEMENT_COMPATIBILITY.get(element_key, ELEMENT_COMPATIBILITY.get((element_key[1], element_key[0])))
-    
+    element_compat = _symmetric_lookup(content.element_compatibility, sign1_data["element_pt"], sign2_data["element_pt"])
     if element_compat:
         base_score = int(base_score * element_compat["multiplier"])
     
     # Apply quality compatibility adjustment
-    quality_key = (user_profile["quality"], partner_profile["quality"])
-    quality_compat = QUALITY_COMPATIBILITY.get(quality_key, QUALITY_COMPATIBILITY.get((quality_key[1], quality_key[0])))
-    
+    quality_compat = _symmetric_lookup(content.quality_compatibility, sign1_data["quality"], sign2_data["quality"])
     if quality_compat:
         base_score += quality_compat["adjustment"]
     
@@ -939,39 +836,161 @@ def calculate_enhanced_compatibility(user_profile: Dict, partner_profile: Dict)
     if final_score >= 80:
         general_affinity = "Alto"
     elif final_score >= 60:
-        general_affinity = "Médio"  
+        general_affinity = "Médio"
     else:
         general_affinity = "Baixo"
     
-    # Generate detailed analysis
     detailed_analysis = {
-        "temperament_analysis": f"Combinação {user_profile['temperament']} + {partner_profile['temperament']}: {temp_compat['affinity']} potencial de harmonia",
-        "element_analysis": f"Elementos {user_profile['element_pt']} + {partner_profile['element_pt']}: {element_compat['description'] if element_compat else 'Necessita análise específica'}",
-        "quality_analysis": f"Qualidades {user_profile['quality']} + {partner_profile['quality']}: {quality_compat['note'] if quality_compat else 'Dinâmica neutra'}"
+        "temperament_analysis": f"Combinação {sign1_data['temperament']} + {sign2_data['temperament']}: {temp_compat['affinity']} potencial de harmonia",
+        "element_analysis": f"Elementos {sign1_data['element_pt']} + {sign2_data['element_pt']}: {element_compat['description'] if element_compat else 'Necessita análise específica'}",
+        "quality_analysis": f"Qualidades {sign1_data['quality']} + {sign2_data['quality']}: {quality_compat['note'] if quality_compat else 'Dinâmica neutra'}"
     }
     
-    # Enhanced recommendations
-    recommendations = [
-        f"{user_profile['name']}: Desenvolva {TEMPERAMENT_DESCRIPTIONS[user_profile['temperament']]['traits'][0].lower()}",
-        f"{partner_profile['name']}: Trabalhe em {TEMPERAMENT_DESCRIPTIONS[partner_profile['temperament']]['traits'][1].lower()}",
+    recommendations = (
+        "{name1}: Desenvolva " + TEMPERAMENT_DESCRIPTIONS[sign1_data["temperament"]]["traits"][0].lower(),
+        "{name2}: Trabalhe em " + TEMPERAMENT_DESCRIPTIONS[sign2_data["temperament"]]["traits"][1].lower(),
         "Pratiquem comunicação baseada na compreensão dos temperamentos",
         "Usem as diferenças como complementaridade, não como obstáculos"
-    ]
+    )
+    
+    prefix = f"enhanced.{sign1.value}.{sign2.value}"
+    return EnhancedCompatibilityTemplate(
+        score=final_score,
+        affinity=general_affinity,
+        potential_conflicts=text_templates.register_all(f"{prefix}.conflicts", temp_compat["conflicts"]),
+        strength_points=text_templates.register_all(f"{prefix}.strengths", temp_compat["strengths"]),
+        weakness_points=text_templates.register_all(f"{prefix}.weaknesses", temp_compat["weaknesses"]),
+        detailed_analysis=MappingProxyType({
+            key: text_templates.register(f"{prefix}.{key}", text) for key, text in detailed_analysis.items()
+        }),
+        recommendations=text_templates.register_all(f"{prefix}.recommendations", recommendations)
+    )
+
+def build_enhanced_compatibility_table(content: "ContentLibrary", text_templates: TemplateRegistry) -> Mapping[tuple, EnhancedCompatibilityTemplate]:
+    """Score, affinity and analysis for all 144 sign pairs, derived from the compatibility matrices"""
+    return MappingProxyType({
+        (sign1, sign2): _enhanced_pair_entry(content, text_templates, sign1, sign2)
+        for sign1, sign2 in itertools.product(ZodiacSign, ZodiacSign)
+    })
+
+def enhanced_table_version(content: "ContentLibrary") -> str:
+    """Fingerprint of every input the sign-pair table is built from"""
+    sign_traits = [(sign.value, data["temperament"], data["element_pt"], data["quality"]) for sign, data in ZODIAC_DATA.items()]
+    sources = (content.temperament_compatibility, content.element_compatibility, content.quality_compatibility, TEMPERAMENT_DESCRIPTIONS, sign_traits)
+    return hashlib.sha256(repr(sources).encode("utf-8")).hexdigest()[:16]
+
+def enhanced_report_inputs_hash(user_data: Dict, partner_data: Dict, content: Optional["ContentLibrary"] = None) -> str:
+    """Everything a stored enhanced report depends on; unchanged hash means the report is still valid"""
+    content = content or CONTENT_REGISTRY.current
+    inputs = [content.enhanced_table_version, user_data["name"], user_data["zodiac_sign"], partner_data["name"], partner_data["zodiac_sign"]]
+    return hashlib.sha256(json.dumps(inputs, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+# Vectorized compatibility scoring
+# Small integer codes for each trait, used to index the score matrices below
+TEMPERAMENT_CODES = {temperament: code for code, temperament in enumerate(TEMPERAMENT_DESCRIPTIONS)}
+ELEMENT_CODES = {"Fogo": 0, "Terra": 1, "Ar": 2, "Água": 3}
+QUALITY_CODES = {"Cardinal": 0, "Fixo": 1, "Mutável": 2}
+
+class EnhancedScoreMatrices(NamedTuple):
+    """Pairwise matrices indexed by trait codes, plus each sign's (temperament, element, quality) codes"""
+    temperament_score: np.ndarray
+    element_multiplier: np.ndarray
+    quality_adjustment: np.ndarray
+    sign_traits: np.ndarray
+
+def _pair_matrix(table: Dict[tuple, Dict], codes: Dict[str, int], field: str, default, dtype) -> np.ndarray:
+    matrix = np.full((len(codes), len(codes)), default, dtype=dtype)
+    for first, first_code in codes.items():
+        for second, second_code in codes.items():
+            entry = _symmetric_lookup(table, first, second)
+            if entry:
+                matrix[first_code, second_code] = entry[field]
+    return matrix
+
+def build_enhanced_score_matrices(content: "ContentLibrary") -> EnhancedScoreMatrices:
+    """Same inputs and defaults as _enhanced_pair_entry, laid out for NumPy fancy indexing"""
+    sign_traits = np.array([
+        (
+            TEMPERAMENT_CODES[ZODIAC_DATA[sign]["temperament"]],
+            ELEMENT_CODES[ZODIAC_DATA[sign]["element_pt"]],
+            QUALITY_CODES[ZODIAC_DATA[sign]["quality"]],
+        )
+        for sign in SIGNS_BY_CODE
+    ], dtype=np.intp)
+    return EnhancedScoreMatrices(
+        temperament_score=_pair_matrix(content.temperament_compatibility, TEMPERAMENT_CODES, "score", DEFAULT_TEMPERAMENT_COMPATIBILITY["score"], np.int64),
+        element_multiplier=_pair_matrix(content.element_compatibility, ELEMENT_CODES, "multiplier", 1.0, np.float64),
+        quality_adjustment=_pair_matrix(content.quality_compatibility, QUALITY_CODES, "adjustment", 0, np.int64),
+        sign_traits=sign_traits
+    )
+
+def score_sign_codes(user_sign_code: int, candidate_sign_codes: np.ndarray, content: Optional["ContentLibrary"] = None) -> np.ndarray:
+    """Enhanced compatibility scores of one sign against an array of sign codes"""
+    matrices = (content or CONTENT_REGISTRY.current).enhanced_score_matrices
+    user_traits = matrices.sign_traits[user_sign_code]
+    candidate_traits = matrices.sign_traits[candidate_sign_codes]
+    
+    scores = matrices.temperament_score[user_traits[0], candidate_traits[:, 0]]
+    # int() in the scalar path truncates; scores are positive so this matches
+    scores = (scores * matrices.element_multiplier[user_traits[1], candidate_traits[:, 1]]).astype(np.int64)
+    scores += matrices.quality_adjustment[user_traits[2], candidate_traits[:, 2]]
+    return np.clip(scores, 1, 100)
+
+def affinity_for_scores(scores: np.ndarray) -> np.ndarray:
+    return np.select([scores >= 80, scores >= 60], ["Alto", "Médio"], default="Baixo")
+
+def build_compatibility_profile(name: str, sign: ZodiacSign) -> Dict[str, str]:
+    """Profile summary stored alongside enhanced compatibility reports"""
+    zodiac_data = ZODIAC_DATA[sign]
+    return {
+        "name": name,
+        "zodiac_sign": zodiac_data["name"],
+        "temperament": zodiac_data["temperament"],
+        "element_pt": zodiac_data["element_pt"],
+        "quality": zodiac_data["quality"]
+    }
+
+def calculate_enhanced_compatibility(user_name: str, user_sign: ZodiacSign, partner_name: str, partner_sign: ZodiacSign, content: Optional["ContentLibrary"] = None) -> EnhancedCompatibilityReport:
+    """Calculate comprehensive compatibility between two profiles"""
+    content = content or CONTENT_REGISTRY.current
+    entry = content.enhanced_table[(user_sign, partner_sign)]
+    names = {"name1": user_name, "name2": partner_name}
     
     return EnhancedCompatibilityReport(
         user_id="",  # Will be set by caller
         partner_id="",  # Will be set by caller
-        user_profile=user_profile,
-        partner_profile=partner_profile,
-        general_affinity=general_affinity,
-        compatibility_score=final_score,
-        potential_conflicts=temp_compat["conflicts"],
-        strength_points=temp_compat["strengths"],
-        weakness_points=temp_compat["weaknesses"],
-        detailed_analysis=detailed_analysis,
-        recommendations=recommendations
+        user_profile=build_compatibility_profile(user_name, user_sign),
+        partner_profile=build_compatibility_profile(partner_name, partner_sign),
+        general_affinity=entry.affinity,
+        compatibility_score=entry.score,
+        **content.text_templates.hydrate({"text_templates": enhanced_template_ids(entry), "text_params": names})
     )
 
+def enhanced_template_ids(entry: EnhancedCompatibilityTemplate) -> Dict[str, Any]:
+    return {field: getattr(entry, field) for field in ENHANCED_TEXT_FIELDS}
+
+SIGNS_BY_NAME = {data["name"]: sign for sign, data in ZODIAC_DATA.items()}
+
+def render_enhanced_report(report_data: Dict[str, Any], content: Optional["ContentLibrary"] = None) -> EnhancedCompatibilityReport:
+    """Stored enhanced report as of the given content.
+
+    Template IDs only mean the same text under the table version that stored
+    them. A report stored under another version (or before versions were
+    recorded) is recalculated from its profiles, so score, affinity and copy
+    always come from one table. Reports stored as rendered text pass through.
+    """
+    content = content or CONTENT_REGISTRY.current
+    if "text_templates" not in report_data or report_data.get("table_version") == content.enhanced_table_version:
+        return EnhancedCompatibilityReport(**content.text_templates.hydrate(report_data))
+    user_profile, partner_profile = report_data["user_profile"], report_data["partner_profile"]
+    report = calculate_enhanced_compatibility(
+        user_profile["name"], SIGNS_BY_NAME[user_profile["zodiac_sign"]],
+        partner_profile["name"], SIGNS_BY_NAME[partner_profile["zodiac_sign"]],
+        content
+    )
+    stored = {key: report_data[key] for key in ("id", "user_id", "partner_id", "created_at") if key in report_data}
+    return EnhancedCompatibilityReport(**{**report.dict(), **stored})
+
 # Weekly Missions
 WEEKLY_MISSIONS_TEMPLATE = [
     WeeklyMission(
@@ -1057,15 +1076,25 @@ QUESTIONNAIRE_QUESTIONS = [
     }
 ]
 
+def build_answer_index(questions) -> Mapping[Tuple[int, str], Tuple[str, int]]:
+    """Map (question_id, answer) to (modality, score) from (question_id, options) pairs"""
+    index = {}
+    for question_id, options in questions:
+        for option in options:
+            # First matching option wins, as with the previous linear scan
+            index.setdefault((question_id, option["answer"]), (option["modality"], option["score"]))
+    return MappingProxyType(index)
+
+QUESTIONNAIRE_ANSWER_INDEX = build_answer_index((q["id"], q["options"]) for q in QUESTIONNAIRE_QUESTIONS)
+
 def calculate_modality_scores(answers: List[QuestionnaireAnswer]) -> Dict[str, int]:
     scores = {"cardinal": 0, "fixed": 0, "mutable": 0}
     
     for answer in answers:
-        question = next((q for q in QUESTIONNAIRE_QUESTIONS if q["id"] == answer.question_id), None)
-        if question:
-            option = next((opt for opt in question["options"] if opt["answer"] == answer.answer), None)
-            if option:
-                scores[option["modality"]] += option["score"]
+        option = QUESTIONNAIRE_ANSWER_INDEX.get((answer.question_id, answer.answer))
+        if option:
+            modality, score = option
+            scores[modality] += score
     
     return scores
 
@@ -1075,183 +1104,355 @@ def get_dominant_modality(scores: Dict[str, int]) -> tuple:
     secondary = sorted_scores[1][0] if len(sorted_scores) > 1 and sorted_scores[1][1] > 0 else None
     return dominant, secondary
 
-def calculate_compatibility(user1: User, user2: User, result1: QuestionnaireResult, result2: QuestionnaireResult) -> CompatibilityReport:
-    # Enhanced compatibility logic
-    sign1_data = ZODIAC_DATA[user1.zodiac_sign]
-    sign2_data = ZODIAC_DATA[user2.zodiac_sign]
-    
-    base_score = 50
-    
-    # Same modality bonus/penalty
-    if result1.dominant_modality == result2.dominant_modality:
-        base_score += 15
-    
-    # Element compatibility (enhanced)
-    element_compatibility = {
-        ("fire", "air"): 20,    # Fire needs air
-        ("earth", "water"): 20, # Earth needs water
-        ("fire", "fire"): 15,   # High energy
-        ("air", "air"): 15,     # Mental connection
-        ("earth", "earth"): 15, # Stable foundation
-        ("water", "water"): 15, # Emotional depth
-        ("fire", "earth"): 8,   # Complementary but challenging
-        ("air", "water"): 8,    # Different approaches
-        ("fire", "water"): 5,   # Steam - can work with effort
-        ("earth", "air"): 5,    # Different priorities
-    }
-    
-    element_pair = (sign1_data["element"], sign2_data["element"])
-    if element_pair in element_compatibility:
-        base_score += element_compatibility[element_pair]
-    elif (element_pair[1], element_pair[0]) in element_compatibility:
-        base_score += element_compatibility[(element_pair[1], element_pair[0])]
-    
-    base_score = max(15, min(100, base_score))
-    
-    # Generate detailed insights based on modalities
-    strengths = []
-    challenges = []
-    recommendations = []
-    dynamics = []
-    
-    modality1 = result1.dominant_modality
-    modality2 = result2.dominant_modality
-    
-    if modality1 == Modality.CARDINAL and modality2 == Modality.CARDINAL:
-        strengths.extend([
+# Column order matches calculate_modality_scores, which is also the tie-break order
+MODALITY_SCORE_COLUMNS = [Modality.CARDINAL, Modality.FIXED, Modality.MUTABLE]
+
+def score_questionnaire_batch(submissions: List[List[QuestionnaireAnswer]]) -> List[Tuple[Modality, Optional[Modality]]]:
+    """Vectorized calculate_modality_scores + get_dominant_modality for many submissions"""
+    columns = {modality.value: column for column, modality in enumerate(MODALITY_SCORE_COLUMNS)}
+    rows, cols, values = [], [], []
+    for row, answers in enumerate(submissions):
+        for answer in answers:
+            option = QUESTIONNAIRE_ANSWER_INDEX.get((answer.question_id, answer.answer))
+            if option:
+                rows.append(row)
+                cols.append(columns[option[0]])
+                values.append(option[1])
+    
+    scores = np.zeros((len(submissions), len(MODALITY_SCORE_COLUMNS)), dtype=np.int64)
+    np.add.at(scores, (rows, cols), values)
+    
+    # Stable descending sort keeps column order on ties, like sorted(..., reverse=True)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    has_secondary = scores[np.arange(len(submissions)), order[:, 1]] > 0
+    return [
+        (MODALITY_SCORE_COLUMNS[dominant], MODALITY_SCORE_COLUMNS[secondary] if keep else None)
+        for dominant, secondary, keep in zip(order[:, 0].tolist(), order[:, 1].tolist(), has_secondary.tolist())
+    ]
+
+# Self-knowledge insights per (category, dominant modality)
+SELF_KNOWLEDGE_INSIGHTS = {
+    ("communication", Modality.CARDINAL): "Você tem um estilo de comunicação direto e assertivo. Foque em desenvolver mais paciência e escuta ativa.",
+    ("communication", Modality.FIXED): "Sua comunicação é estável e profunda. Pratique expressar sentimentos mais abertamente.",
+    ("communication", Modality.MUTABLE): "Você se adapta bem na comunicação. Desenvolva mais assertividade quando necessário.",
+    ("conflict", Modality.CARDINAL): "Você enfrenta conflitos diretamente. Aprenda a dar tempo para o parceiro processar.",
+    ("conflict", Modality.FIXED): "Você mantém suas posições com firmeza. Pratique mais flexibilidade em questões menores.",
+    ("conflict", Modality.MUTABLE): "Você busca harmonia nos conflitos. Às vezes é preciso ser mais firme em questões importantes.",
+    ("intimacy", Modality.CARDINAL): "Você é apaixonado e intenso na intimidade. Equilibre momentos de intensidade com calma.",
+    ("intimacy", Modality.FIXED): "Você constrói intimidade através da lealdade. Explore mais espontaneidade na relação.",
+    ("intimacy", Modality.MUTABLE): "Você se adapta às necessidades do parceiro. Lembre-se de expressar suas próprias necessidades também.",
+    ("decision_making", Modality.CARDINAL): "Você toma decisões rapidamente. Às vezes vale a pena consultar mais o parceiro.",
+    ("decision_making", Modality.FIXED): "Você pondera bem as decisões. Pratique mais agilidade em decisões menores.",
+    ("decision_making", Modality.MUTABLE): "Você considera múltiplas perspectivas. Desenvolva mais confiança em suas escolhas.",
+}
+
+SELF_KNOWLEDGE_CATEGORIES = list(dict.fromkeys(category for category, _ in SELF_KNOWLEDGE_INSIGHTS))
+
+def score_self_knowledge_batch(submissions: List[List[SelfKnowledgeAnswer]], content: Optional[ContentLibrary] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Per submission, a category x modality score matrix and which categories were answered"""
+    answer_index = (content or CONTENT_REGISTRY.current).self_knowledge_answer_index
+    categories = {category: row for row, category in enumerate(SELF_KNOWLEDGE_CATEGORIES)}
+    columns = {modality.value: column for column, modality in enumerate(MODALITY_SCORE_COLUMNS)}
+    scores = np.zeros((len(submissions), len(categories), len(columns)), dtype=np.int64)
+    answered = np.zeros((len(submissions), len(categories)), dtype=bool)
+    
+    for row, answers in enumerate(submissions):
+        for answer in answers:
+            category = categories.get(answer.category)
+            if category is None:
+                continue  # Unknown categories never had an insight
+            answered[row, category] = True
+            # The submitted score is what counts; the option only gives the modality
+            option = answer_index.get((answer.question_id, answer.answer))
+            if option:
+                scores[row, category, columns[option[0]]] += answer.score
+    return scores, answered
+
+def self_knowledge_insights_batch(submissions: List[List[SelfKnowledgeAnswer]], content: Optional[ContentLibrary] = None) -> List[Dict[str, str]]:
+    """Insight per answered category for many submissions; ties go to the first modality, like max()"""
+    scores, answered = score_self_knowledge_batch(submissions, content)
+    dominant = scores.argmax(axis=2)
+    return [
+        {
+            category: SELF_KNOWLEDGE_INSIGHTS[(category, MODALITY_SCORE_COLUMNS[dominant[row, index]])]
+            for index, category in enumerate(SELF_KNOWLEDGE_CATEGORIES)
+            if answered[row, index]
+        }
+        for row in range(len(submissions))
+    ]
+
+# Modality Compatibility Table
+# Element affinity used by calculate_compatibility (order-independent)
+MODALITY_ELEMENT_COMPATIBILITY = {
+    ("fire", "air"): 20,    # Fire needs air
+    ("earth", "water"): 20, # Earth needs water
+    ("fire", "fire"): 15,   # High energy
+    ("air", "air"): 15,     # Mental connection
+    ("earth", "earth"): 15, # Stable foundation
+    ("water", "water"): 15, # Emotional depth
+    ("fire", "earth"): 8,   # Complementary but challenging
+    ("air", "water"): 8,    # Different approaches
+    ("fire", "water"): 5,   # Steam - can work with effort
+    ("earth", "air"): 5,    # Different priorities
+}
+
+# Insights per modality pair. Mixed pairs refer to each person by role:
+# {cardinal_name}, {fixed_name} or {mutable_name}. "dynamics" is not part of the report yet.
+MODALITY_PAIR_INSIGHTS = {
+    (Modality.CARDINAL, Modality.CARDINAL): {
+        "strengths": [
             "Ambos são líderes naturais com visão de futuro",
             "Energia alta e motivação mútua para conquistas",
             "Capacidade de iniciar projetos juntos rapidamente"
-        ])
-        challenges.extend([
+        ],
+        "challenges": [
             "Competição por liderança pode gerar conflitos",
             "Impaciência mútua em discussões longas",
             "Dificuldade em ouvir o outro quando ambos querem liderar"
-        ])
-        recommendations.extend([
+        ],
+        "recommendations": [
             "Dividam responsabilidades por área de expertise",
             "Estabeleçam turnos para liderar diferentes situações",
             "Pratiquem exercícios de escuta ativa diariamente"
-        ])
-        dynamics.append("Vocês tendem a resolver conflitos rapidamente, mas podem criar novos se não respeitarem o espaço de liderança de cada um.")
-        
-    elif modality1 == Modality.FIXED and modality2 == Modality.FIXED:
-        strengths.extend([
+        ],
+        "dynamics": "Vocês tendem a resolver conflitos rapidamente, mas podem criar novos se não respeitarem o espaço de liderança de cada um."
+    },
+    (Modality.FIXED, Modality.FIXED): {
+        "strengths": [
             "Relacionamento extremamente estável e duradouro",
             "Lealdade inabalável entre vocês",
             "Construção sólida de tradições e rituais de casal"
-        ])
-        challenges.extend([
+        ],
+        "challenges": [
             "Resistência mútua a mudanças necessárias",
             "Teimosia pode prolongar conflitos desnecessariamente",
             "Dificuldade para se adaptar a novos desafios juntos"
-        ])
-        recommendations.extend([
+        ],
+        "recommendations": [
             "Estabeleçam 'dias de experimentação' mensais",
             "Pratiquem pequenas mudanças gradualmente",
             "Celebrem as tradições, mas abracem novidades ocasionalmente"
-        ])
-        dynamics.append("Vocês constroem algo sólido juntos, mas precisam cultivar flexibilidade para crescer como casal.")
-        
-    elif modality1 == Modality.MUTABLE and modality2 == Modality.MUTABLE:
-        strengths.extend([
+        ],
+        "dynamics": "Vocês constroem algo sólido juntos, mas precisam cultivar flexibilidade para crescer como casal."
+    },
+    (Modality.MUTABLE, Modality.MUTABLE): {
+        "strengths": [
             "Adaptabilidade excepcional às mudanças da vida",
             "Compreensão mútua e empatia natural",
             "Flexibilidade para resolver problemas criativamente"
-        ])
-        challenges.extend([
+        ],
+        "challenges": [
             "Falta de direção clara e metas definidas",
             "Indecisão mútua pode paralisar decisões importantes",
             "Evitação de conflitos pode acumular ressentimentos"
-        ])
-        recommendations.extend([
+        ],
+        "recommendations": [
             "Definam metas trimestrais juntos",
             "Pratiquem tomar decisões em prazos definidos",
             "Abordem conflitos pequenos antes que cresçam"
-        ])
-        dynamics.append("Vocês fluem bem juntos, mas precisam criar estrutura para não se perderem em indecisões.")
-        
-    elif (modality1 == Modality.CARDINAL and modality2 == Modality.FIXED) or (modality1 == Modality.FIXED and modality2 == Modality.CARDINAL):
-        cardinal_name = user1.name if modality1 == Modality.CARDINAL else user2.name
-        fixed_name = user2.name if modality1 == Modality.CARDINAL else user1.name
-        
-        strengths.extend([
-            f"{cardinal_name} traz energia e novidades, {fixed_name} oferece estabilidade",
+        ],
+        "dynamics": "Vocês fluem bem juntos, mas precisam criar estrutura para não se perderem em indecisões."
+    },
+    (Modality.CARDINAL, Modality.FIXED): {
+        "strengths": [
+            "{cardinal_name} traz energia e novidades, {fixed_name} oferece estabilidade",
             "Combinação poderosa de iniciativa e persistência",
             "O estável apoia o iniciador, criando base sólida para projetos"
-        ])
-        challenges.extend([
-            f"{cardinal_name} pode se frustrar com o ritmo de {fixed_name}",
-            f"{fixed_name} pode se sentir pressionado pela urgência de {cardinal_name}",
+        ],
+        "challenges": [
+            "{cardinal_name} pode se frustrar com o ritmo de {fixed_name}",
+            "{fixed_name} pode se sentir pressionado pela urgência de {cardinal_name}",
             "Conflitos entre velocidade (Cardinal) e estabilidade (Fixo)"
-        ])
-        recommendations.extend([
-            f"{cardinal_name}: respeite o tempo de processamento de {fixed_name}",
-            f"{fixed_name}: tente ser mais aberto a mudanças propostas por {cardinal_name}",
+        ],
+        "recommendations": [
+            "{cardinal_name}: respeite o tempo de processamento de {fixed_name}",
+            "{fixed_name}: tente ser mais aberto a mudanças propostas por {cardinal_name}",
             "Encontrem um ritmo que honre ambas as necessidades"
-        ])
-        dynamics.append(f"{cardinal_name} inicia, {fixed_name} sustenta - uma parceria complementar que funciona quando há respeito mútuo pelos ritmos diferentes.")
-        
-    elif (modality1 == Modality.CARDINAL and modality2 == Modality.MUTABLE) or (modality1 == Modality.MUTABLE and modality2 == Modality.CARDINAL):
-        cardinal_name = user1.name if modality1 == Modality.CARDINAL else user2.name
-        mutable_name = user2.name if modality1 == Modality.CARDINAL else user1.name
-        
-        strengths.extend([
-            f"{cardinal_name} lidera com visão, {mutable_name} adapta com sabedoria",
+        ],
+        "dynamics": "{cardinal_name} inicia, {fixed_name} sustenta - uma parceria complementar que funciona quando há respeito mútuo pelos ritmos diferentes."
+    },
+    (Modality.CARDINAL, Modality.MUTABLE): {
+        "strengths": [
+            "{cardinal_name} lidera com visão, {mutable_name} adapta com sabedoria",
             "Excelente capacidade de inovação e ajuste",
             "Dinamismo equilibrado entre ação e flexibilidade"
-        ])
-        challenges.extend([
-            f"{cardinal_name} pode ver {mutable_name} como indeciso",
-            f"{mutable_name} pode se sentir pressionado pela assertividade de {cardinal_name}",
+        ],
+        "challenges": [
+            "{cardinal_name} pode ver {mutable_name} como indeciso",
+            "{mutable_name} pode se sentir pressionado pela assertividade de {cardinal_name}",
             "Ritmos diferentes podem causar desencontros"
-        ])
-        recommendations.extend([
-            f"{cardinal_name}: dê espaço para {mutable_name} processar e contribuir",
-            f"{mutable_name}: pratique ser mais direto com suas opiniões",
+        ],
+        "recommendations": [
+            "{cardinal_name}: dê espaço para {mutable_name} processar e contribuir",
+            "{mutable_name}: pratique ser mais direto com suas opiniões",
             "Combinem sessões de planejamento com momentos de espontaneidade"
-        ])
-        dynamics.append(f"{cardinal_name} propõe direções, {mutable_name} encontra os melhores caminhos - uma dupla criativa e eficiente.")
-        
-    elif (modality1 == Modality.FIXED and modality2 == Modality.MUTABLE) or (modality1 == Modality.MUTABLE and modality2 == Modality.FIXED):
-        fixed_name = user1.name if modality1 == Modality.FIXED else user2.name
-        mutable_name = user2.name if modality1 == Modality.FIXED else user1.name
-        
-        strengths.extend([
-            f"{fixed_name} oferece base sólida, {mutable_name} traz versatilidade",
+        ],
+        "dynamics": "{cardinal_name} propõe direções, {mutable_name} encontra os melhores caminhos - uma dupla criativa e eficiente."
+    },
+    (Modality.FIXED, Modality.MUTABLE): {
+        "strengths": [
+            "{fixed_name} oferece base sólida, {mutable_name} traz versatilidade",
             "Equilíbrio perfeito entre estabilidade e adaptabilidade",
             "Complementaridade natural que cobre diferentes necessidades"
-        ])
-        challenges.extend([
-            f"{fixed_name} pode ver {mutable_name} como inconsistente",
-            f"{mutable_name} pode se sentir limitado pela rigidez de {fixed_name}",
+        ],
+        "challenges": [
+            "{fixed_name} pode ver {mutable_name} como inconsistente",
+            "{mutable_name} pode se sentir limitado pela rigidez de {fixed_name}",
             "Necessidades diferentes de mudança vs. estabilidade"
-        ])
-        recommendations.extend([
-            f"{fixed_name}: aprecie a flexibilidade de {mutable_name} como um presente",
-            f"{mutable_name}: valorize a constância de {fixed_name} como segurança",
+        ],
+        "recommendations": [
+            "{fixed_name}: aprecie a flexibilidade de {mutable_name} como um presente",
+            "{mutable_name}: valorize a constância de {fixed_name} como segurança",
             "Criem rotinas flexíveis que satisfaçam ambos"
-        ])
-        dynamics.append(f"{fixed_name} é a âncora, {mutable_name} é a vela - juntos navegam com segurança e adaptabilidade.")
-    
-    # Enhanced premium insights
-    premium_insights = [
-        f"Guia personalizado de comunicação para {modality1.value}-{modality2.value}",
-        f"Exercícios específicos para fortalecer a dinâmica {user1.name}-{user2.name}",
-        "Plano de desenvolvimento do relacionamento em 90 dias",
-        "Estratégias de intimidade baseadas nos temperamentos",
-        "Toolkit de resolução de conflitos personalizado",
-        "Rituais de conexão adaptados ao perfil do casal"
-    ]
+        ],
+        "dynamics": "{fixed_name} é a âncora, {mutable_name} é a vela - juntos navegam com segurança e adaptabilidade."
+    }
+}
+
+MODALITY_PREMIUM_INSIGHTS = [
+    "Guia personalizado de comunicação para {modality1}-{modality2}",
+    "Exercícios específicos para fortalecer a dinâmica {name1}-{name2}",
+    "Plano de desenvolvimento do relacionamento em 90 dias",
+    "Estratégias de intimidade baseadas nos temperamentos",
+    "Toolkit de resolução de conflitos personalizado",
+    "Rituais de conexão adaptados ao perfil do casal"
+]
+
+class CompatibilityTemplate(NamedTuple):
+    """Precomputed report for one (sign, sign, modality, modality) combination; texts are TEXT_TEMPLATES IDs"""
+    score: int
+    strengths: Tuple[str, ...]
+    challenges: Tuple[str, ...]
+    recommendations: Tuple[str, ...]
+    premium_insights: Tuple[str, ...]
+
+def _modality_pair_templates(modality1: Modality, modality2: Modality) -> Dict[str, Tuple[str, ...]]:
+    """Resolve role placeholders to {name1}/{name2} for an ordered modality pair"""
+    insights = MODALITY_PAIR_INSIGHTS.get((modality1, modality2)) or MODALITY_PAIR_INSIGHTS[(modality2, modality1)]
+    # Same-modality texts never mention names, so role lookup only matters for mixed pairs
+    roles = {f"{modality2.value}_name": "{name2}", f"{modality1.value}_name": "{name1}"}
+    templates = {
+        key: tuple(text.format(**roles) for text in insights[key])
+        for key in ("strengths", "challenges", "recommendations")
+    }
+    templates["premium_insights"] = tuple(
+        text.format(modality1=modality1.value, modality2=modality2.value, name1="{name1}", name2="{name2}")
+        for text in MODALITY_PREMIUM_INSIGHTS
+    )
+    return templates
+
+def _compatibility_score(sign1: ZodiacSign, sign2: ZodiacSign, modality1: Modality, modality2: Modality) -> int:
+    base_score = 50
+    
+    # Same modality bonus/penalty
+    if modality1 == modality2:
+        base_score += 15
+    
+    element1 = ZODIAC_DATA[sign1]["element"]
+    element2 = ZODIAC_DATA[sign2]["element"]
+    base_score += MODALITY_ELEMENT_COMPATIBILITY.get(
+        (element1, element2), MODALITY_ELEMENT_COMPATIBILITY.get((element2, element1), 0)
+    )
+    
+    return max(15, min(100, base_score))
+
+COMPATIBILITY_TEXT_FIELDS = ("strengths", "challenges", "recommendations", "premium_insights")
+
+def build_compatibility_pair_templates() -> Mapping[tuple, Dict[str, Tuple[str, ...]]]:
+    """TEXT_TEMPLATES IDs of each field for every ordered modality pair; the texts depend on nothing else"""
+    pair_templates = {}
+    for m1, m2 in itertools.product(Modality, Modality):
+        texts = _modality_pair_templates(m1, m2)
+        pair_templates[(m1, m2)] = {
+            field: TEXT_TEMPLATES.register_all(f"compatibility.{m1.value}.{m2.value}.{field}", texts[field])
+            for field in COMPATIBILITY_TEXT_FIELDS
+        }
+    return MappingProxyType(pair_templates)
+
+COMPATIBILITY_PAIR_TEMPLATES = build_compatibility_pair_templates()
+
+def build_compatibility_table() -> Mapping[tuple, CompatibilityTemplate]:
+    """All 12 x 12 x 3 x 3 sign/modality combinations; only the names vary per request"""
+    table = {}
+    for sign1, sign2, modality1, modality2 in itertools.product(ZodiacSign, ZodiacSign, Modality, Modality):
+        templates = COMPATIBILITY_PAIR_TEMPLATES[(modality1, modality2)]
+        table[(sign1, sign2, modality1, modality2)] = CompatibilityTemplate(
+            score=_compatibility_score(sign1, sign2, modality1, modality2),
+            **templates
+        )
+    return MappingProxyType(table)
+
+COMPATIBILITY_TABLE = build_compatibility_table()
+
+MODALITY_CODES = {modality: code for code, modality in enumerate(Modality)}
+
+def build_compatibility_score_matrix() -> np.ndarray:
+    """COMPATIBILITY_TABLE scores indexed as [sign1, modality1, sign2, modality2] codes"""
+    matrix = np.zeros((len(ZodiacSign), len(Modality), len(ZodiacSign), len(Modality)), dtype=np.int16)
+    for (sign1, sign2, modality1, modality2), entry in COMPATIBILITY_TABLE.items():
+        matrix[SIGN_CODES[sign1], MODALITY_CODES[modality1], SIGN_CODES[sign2], MODALITY_CODES[modality2]] = entry.score
+    return matrix
+
+COMPATIBILITY_SCORE_MATRIX = build_compatibility_score_matrix()
+
+def compatibility_table_version() -> str:
+    """Fingerprint of every text and score in COMPATIBILITY_TABLE"""
+    texts = [(m1.value, m2.value, _modality_pair_templates(m1, m2)) for m1, m2 in itertools.product(Modality, Modality)]
+    digest = hashlib.sha256(repr(texts).encode("utf-8"))
+    digest.update(COMPATIBILITY_SCORE_MATRIX.tobytes())
+    return digest.hexdigest()[:16]
+
+# Stored with each report: its positional template IDs only mean the same text under this version
+COMPATIBILITY_TABLE_VERSION = compatibility_table_version()
+
+def lookup_compatibility(user1: User, user2: User, result1: QuestionnaireResult, result2: QuestionnaireResult) -> CompatibilityTemplate:
+    return COMPATIBILITY_TABLE[(user1.zodiac_sign, user2.zodiac_sign, result1.dominant_modality, result2.dominant_modality)]
+
+def compatibility_template_ids(entry: CompatibilityTemplate) -> Dict[str, Any]:
+    return {field: getattr(entry, field) for field in COMPATIBILITY_TEXT_FIELDS}
+
+def compatibility_table_key(user1: User, user2: User, result1: QuestionnaireResult, result2: QuestionnaireResult) -> List[str]:
+    """COMPATIBILITY_TABLE key of a report as stored values, so it can be recalculated later"""
+    return [user1.zodiac_sign.value, user2.zodiac_sign.value, result1.dominant_modality.value, result2.dominant_modality.value]
+
+def render_compatibility_report(report_data: Dict[str, Any]) -> CompatibilityReport:
+    """Stored compatibility report as of the current table.
+
+    Reports stored under another COMPATIBILITY_TABLE_VERSION are rebuilt from
+    their table key rather than rendered from IDs that may now point at other
+    lines. Reports from before the key was stored keep their score, and get
+    the current texts of the modality pair named in their template IDs.
+    Reports stored as rendered text pass through.
+    """
+    template_ids = report_data.get("text_templates")
+    if not template_ids or report_data.get("table_version") == COMPATIBILITY_TABLE_VERSION:
+        return CompatibilityReport(**TEXT_TEMPLATES.hydrate(report_data))
+    table_key = report_data.pop("table_key", None)
+    if table_key:
+        sign1, sign2, modality1, modality2 = table_key
+        entry = COMPATIBILITY_TABLE[(ZodiacSign(sign1), ZodiacSign(sign2), Modality(modality1), Modality(modality2))]
+        report_data["compatibility_score"] = entry.score
+        report_data["text_templates"] = compatibility_template_ids(entry)
+    else:
+        # IDs look like compatibility.<modality1>.<modality2>.<field>.<position>
+        parts = next(iter(template_ids.get("strengths", ())), "").split(".")
+        try:
+            pair = (Modality(parts[1]), Modality(parts[2]))
+        except (IndexError, ValueError):
+            pair = None
+        if pair:
+            report_data["text_templates"] = dict(COMPATIBILITY_PAIR_TEMPLATES[pair])
+    return CompatibilityReport(**TEXT_TEMPLATES.hydrate(report_data))
+
+def calculate_compatibility(user1: User, user2: User, result1: QuestionnaireResult, result2: QuestionnaireResult) -> CompatibilityReport:
+    entry = lookup_compatibility(user1, user2, result1, result2)
+    names = {"name1": user1.name, "name2": user2.name}
     
     return CompatibilityReport(
         user1_id=user1.id,
         user2_id=user2.id,
-        compatibility_score=base_score,
-        strengths=strengths,
-        challenges=challenges,
-        recommendations=recommendations,
-        premium_insights=premium_insights
+        compatibility_score=entry.score,
+        **TEXT_TEMPLATES.hydrate({"text_templates": compatibility_template_ids(entry), "text_params": names})
     )
 
 # API Routes
@@ -1260,50 +1461,159 @@ async def root():
     return {"message": "API de Temperamentos no Relacionamento"}
 
 @api_router.post("/users", response_model=User)
-async def create_user(user_data: UserCreate):
+async def create_user(user_data: UserCreate, index: UserCodeIndex = Depends(get_compatibility_index), db: AsyncIOMotorDatabase = Depends(get_db)):
     user_dict = user_data.dict()
+    user_dict['email'] = user_dict['email'].strip()
     user = User(**user_dict)
     user.badges.append(BadgeType.PROFILE_CREATED)
     user.progress_percentage = 25
     
     # Prepare for MongoDB
     user_mongo = user.dict()
-    user_mongo['created_at'] = user_mongo['created_at'].isoformat()
     
-    await db.users.insert_one(user_mongo)
-    return user
+    try:
+        await db.users.insert_one(user_mongo)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Já existe um perfil com este e-mail")
+    
+    index.set_sign(user.id, SIGN_CODES[user.zodiac_sign])
+    return model_response(user)
 
-@api_router.get("/users/{user_id}", response_model=User)
-async def get_user(user_id: str):
-    user_data = await db.users.find_one({"id": user_id})
+@api_router.get("/users/lookup", response_model=User)
+async def get_user_by_email(email: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    # Served by the case-insensitive unique index on users.email
+    user_data = await repository.find_user_by_email(db, email.strip())
     if not user_data:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
-    # Parse from MongoDB
-    if isinstance(user_data.get('created_at'), str):
-        user_data['created_at'] = datetime.fromisoformat(user_data['created_at'])
+    return model_response(User(**user_data))
+
+@api_router.get("/users/{user_id}", response_model=User)
+async def get_user(user_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    user_data = await repository.find_user(db, user_id)
+    if not user_data:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
-    return User(**user_data)
+    return model_response(User(**user_data))
 
-@api_router.get("/users", response_model=List[User])
-async def get_users():
-    users = await db.users.find().to_list(length=100)
-    parsed_users = []
+@api_router.get("/users", response_model=List[User], dependencies=[Depends(require_admin)])
+async def get_users(limit: int = Query(100, ge=1, le=MAX_USERS_PAGE_SIZE), db: AsyncIOMotorDatabase = Depends(get_db)):
+    users = await repository.find_users(db, {}).limit(limit).to_list(length=limit)
+    return [User(**user_data) for user_data in users]
+
+# User listing for support/analytics jobs: keyset pagination on (created_at, id).
+# Until migrate_datetimes.py has run, some created_at values are still ISO
+# strings; MongoDB sorts every string before every date, so the cursor records
+# which kind it stopped on and the query walks the rest of that bracket first.
+USERS_KEYSET_ORDER = [("created_at", ASCENDING), ("id", ASCENDING)]
+USERS_EXPORT_BATCH_SIZE = 500
+
+def encode_user_cursor(user_data: Dict[str, Any]) -> str:
+    created_at = user_data["created_at"]
+    if isinstance(created_at, datetime):
+        raw = [created_at.isoformat(), user_data["id"]]
+    else:
+        raw = [created_at, user_data["id"], "string"]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode()
+
+def decode_user_cursor(cursor: str) -> tuple:
+    """(created_at, id), with created_at a datetime, or the raw string for unmigrated users"""
+    try:
+        created_at, user_id, *kind = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if kind == ["string"]:
+            if not isinstance(created_at, str):
+                raise ValueError(created_at)
+            return created_at, user_id
+        if kind:
+            raise ValueError(kind)
+        return datetime.fromisoformat(created_at), user_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+def users_after_cursor(cursor: Optional[str]) -> Dict[str, Any]:
+    """Query matching the users strictly after the cursor in (created_at, id) order"""
+    if not cursor:
+        return {}
+    created_at, user_id = decode_user_cursor(cursor)
+    after = [
+        {"created_at": {"$gt": created_at}},
+        {"created_at": created_at, "id": {"$gt": user_id}}
+    ]
+    if isinstance(created_at, str):
+        # $gt only compares within a type, so the dates after all strings are added explicitly
+        after.append({"created_at": {"$type": "date"}})
+    return {"$or": after}
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+@api_router.get("/admin/users", dependencies=[Depends(require_admin)])
+async def get_users_page(limit: int = Query(100, ge=1, le=MAX_USERS_PAGE_SIZE), cursor: Optional[str] = None, db: AsyncIOMotorDatabase = Depends(get_db)):
+    users_cursor = repository.find_users(db, users_after_cursor(cursor), sort=USERS_KEYSET_ORDER).limit(limit)
+    users = await users_cursor.to_list(length=limit)
+    
+    next_cursor = encode_user_cursor(users[-1]) if len(users) == limit else None
+    
+    return {"users": [User(**user_data) for user_data in users], "next_cursor": next_cursor}
+
+@api_router.get("/admin/users/export", dependencies=[Depends(require_admin)])
+async def export_users(cursor: Optional[str] = None, db: AsyncIOMotorDatabase = Depends(get_db)):
+    # Walk the cursor batch by batch so memory stays bounded regardless of user count.
+    # No maxTimeMS: it spans all getMores, and a timeout would truncate a 200 response
+    users_cursor = repository.find_users(
+        db, users_after_cursor(cursor), sort=USERS_KEYSET_ORDER, batch_size=USERS_EXPORT_BATCH_SIZE, max_time_ms=None
+    )
     
-    for user_data in users:
-        # Parse from MongoDB
-        if isinstance(user_data.get('created_at'), str):
-            user_data['created_at'] = datetime.fromisoformat(user_data['created_at'])
-        parsed_users.append(User(**user_data))
+    async def ndjson_lines():
+        async for user_data in users_cursor:
+            yield json.dumps(user_data, ensure_ascii=False, default=_json_default) + "\n"
     
-    return parsed_users
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+# Static content: encoded and compressed once per content version, served with ETag/304
+def build_static_payloads(content: ContentLibrary) -> Dict[str, StaticPayload]:
+    """ETags carry the content version, so clients revalidate everything after a reload"""
+    version = content.version
+    return {
+        "questionnaire": StaticPayload({"questions": QUESTIONNAIRE_QUESTIONS}, version),
+        "zodiac_signs": StaticPayload({"signs": ZODIAC_DATA}, version),
+        "temperament_info": StaticPayload({
+            "temperaments": TEMPERAMENT_DESCRIPTIONS,
+            "zodiac_mapping": {sign.value: data for sign, data in ZODIAC_DATA.items()}
+        }, version),
+        "temperament_profiles": StaticPayload({"profiles": {k.value: v.dict() for k, v in content.temperament_profiles.items()}}, version),
+        "self_knowledge_questions": StaticPayload({"questions": [q.dict() for q in content.self_knowledge_questions]}, version),
+        "advanced_questions": StaticPayload({"questions": [q.dict() for q in content.advanced_self_knowledge]}, version),
+    }
 
 @api_router.get("/questionnaire")
-async def get_questionnaire():
-    return {"questions": QUESTIONNAIRE_QUESTIONS}
+async def get_questionnaire(if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None), payloads: Dict[str, StaticPayload] = Depends(get_static_payloads)):
+    return payloads["questionnaire"].response(if_none_match, accept_encoding)
+
+@api_router.get("/users/{user_id}/most-compatible")
+async def get_most_compatible_users(user_id: str, limit: int = Query(10, ge=1, le=MAX_USERS_PAGE_SIZE), index: UserCodeIndex = Depends(get_compatibility_index), db: AsyncIOMotorDatabase = Depends(get_db)):
+    codes = index.codes(user_id)
+    if codes is None or UNKNOWN_CODE in codes:
+        # Another worker may have handled the signup/questionnaire; read through once
+        user_data = await repository.find_user_profile(db, user_id)
+        if not user_data:
+            raise HTTPException(status_code=404, detail="Usuário não encontrado")
+        index.set_sign(user_id, SIGN_CODES[ZodiacSign(user_data["zodiac_sign"])])
+        result_data = await repository.find_dominant_modality(db, user_id)
+        if not result_data:
+            raise HTTPException(status_code=404, detail="Questionário não encontrado para este usuário")
+        index.set_modality(user_id, MODALITY_CODES[Modality(result_data["dominant_modality"])])
+    
+    matches = index.top_k(user_id, limit, COMPATIBILITY_SCORE_MATRIX)
+    return {
+        "user_id": user_id,
+        "matches": [{"user_id": match_id, "compatibility_score": score} for match_id, score in matches]
+    }
 
 @api_router.post("/questionnaire/submit", response_model=QuestionnaireResult)
-async def submit_questionnaire(submission: QuestionnaireSubmission):
+async def submit_questionnaire(submission: QuestionnaireSubmission, index: UserCodeIndex = Depends(get_compatibility_index), db: AsyncIOMotorDatabase = Depends(get_db)):
     # Calculate modality scores
     scores = calculate_modality_scores(submission.answers)
     dominant, secondary = get_dominant_modality(scores)
@@ -1316,98 +1626,71 @@ async def submit_questionnaire(submission: QuestionnaireSubmission):
     )
     
     # Update user progress and badge
-    user_data = await db.users.find_one({"id": submission.user_id})
-    if user_data:
-        badges = user_data.get('badges', [])
-        if BadgeType.QUESTIONNAIRE_COMPLETED not in badges:
-            badges.append(BadgeType.QUESTIONNAIRE_COMPLETED)
-            await db.users.update_one(
-                {"id": submission.user_id},
-                {"$set": {"badges": badges, "progress_percentage": 50}}
-            )
+    await grant_badge(db, submission.user_id, BadgeType.QUESTIONNAIRE_COMPLETED, progress_percentage=50)
     
     # Store result
     result_mongo = result.dict()
-    result_mongo['completed_at'] = result_mongo['completed_at'].isoformat()
     await db.questionnaire_results.insert_one(result_mongo)
+    index.set_modality(result.user_id, MODALITY_CODES[result.dominant_modality])
     
-    return result
+    return model_response(result)
 
 @api_router.post("/compatibility", response_model=CompatibilityReport)
-async def generate_compatibility_report(request: CompatibilityRequest):
+async def generate_compatibility_report(request: CompatibilityRequest, db: AsyncIOMotorDatabase = Depends(get_db)):
     # Get users
-    user1_data = await db.users.find_one({"id": request.user1_id})
-    user2_data = await db.users.find_one({"id": request.user2_id})
+    user1_data = await repository.find_user(db, request.user1_id)
+    user2_data = await repository.find_user(db, request.user2_id)
     
     if not user1_data or not user2_data:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
-    # Parse users
-    if isinstance(user1_data.get('created_at'), str):
-        user1_data['created_at'] = datetime.fromisoformat(user1_data['created_at'])
-    if isinstance(user2_data.get('created_at'), str):
-        user2_data['created_at'] = datetime.fromisoformat(user2_data['created_at'])
-    
     user1 = User(**user1_data)
     user2 = User(**user2_data)
     
     # Get questionnaire results
-    result1_data = await db.questionnaire_results.find_one({"user_id": request.user1_id})
-    result2_data = await db.questionnaire_results.find_one({"user_id": request.user2_id})
+    result1_data = await repository.find_questionnaire_result(db, request.user1_id)
+    result2_data = await repository.find_questionnaire_result(db, request.user2_id)
     
     if not result1_data or not result2_data:
         raise HTTPException(status_code=404, detail="Questionário não encontrado para um dos usuários")
     
-    # Parse results
-    if isinstance(result1_data.get('completed_at'), str):
-        result1_data['completed_at'] = datetime.fromisoformat(result1_data['completed_at'])
-    if isinstance(result2_data.get('completed_at'), str):
-        result2_data['completed_at'] = datetime.fromisoformat(result2_data['completed_at'])
-    
     result1 = QuestionnaireResult(**result1_data)
     result2 = QuestionnaireResult(**result2_data)
     
     # Generate compatibility report
     report = calculate_compatibility(user1, user2, result1, result2)
+    entry = lookup_compatibility(user1, user2, result1, result2)
     
     # Update user progress and badges
     for user_id in [request.user1_id, request.user2_id]:
-        user_data = await db.users.find_one({"id": user_id})
-        if user_data:
-            badges = user_data.get('badges', [])
-            if BadgeType.REPORT_GENERATED not in badges:
-                badges.append(BadgeType.REPORT_GENERATED)
-                await db.users.update_one(
-                    {"id": user_id},
-                    {"$set": {"badges": badges, "progress_percentage": 75}}
-                )
+        await grant_badge(db, user_id, BadgeType.REPORT_GENERATED, progress_percentage=75)
     
-    # Store report
-    report_mongo = report.dict()
-    report_mongo['created_at'] = report_mongo['created_at'].isoformat()
+    # Store report as template IDs plus names; texts are rendered on read
+    report_mongo = TEXT_TEMPLATES.dehydrate(report.dict(), compatibility_template_ids(entry), {"name1": user1.name, "name2": user2.name})
+    report_mongo["table_version"] = COMPATIBILITY_TABLE_VERSION
+    report_mongo["table_key"] = compatibility_table_key(user1, user2, result1, result2)
     await db.compatibility_reports.insert_one(report_mongo)
     
-    return report
+    return model_response(report)
+
+@api_router.get("/compatibility/reports/{report_id}", response_model=CompatibilityReport)
+async def get_compatibility_report(report_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    report_data = await repository.find_compatibility_report(db, report_id)
+    if not report_data:
+        raise HTTPException(status_code=404, detail="Relatório de compatibilidade não encontrado")
+    
+    return model_response(render_compatibility_report(report_data))
 
 @api_router.post("/users/{user_id}/share")
-async def share_with_partner(user_id: str):
+async def share_with_partner(user_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     # Update user badge and progress
-    user_data = await db.users.find_one({"id": user_id})
-    if not user_data:
+    if not await grant_badge(db, user_id, BadgeType.SHARED_WITH_PARTNER, progress_percentage=100):
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
-    badges = user_data.get('badges', [])
-    if BadgeType.SHARED_WITH_PARTNER not in badges:
-        badges.append(BadgeType.SHARED_WITH_PARTNER)
-        await db.users.update_one(
-            {"id": user_id},
-            {"$set": {"badges": badges, "progress_percentage": 100}}
-        )
-    
     return {"message": "Conquista desbloqueada: Compartilhou com parceiro!"}
 
 @api_router.post("/users/{user_id}/upgrade-premium")
-async def upgrade_to_premium(user_id: str):
+async def upgrade_to_premium(user_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     await db.users.update_one(
         {"id": user_id},
         {"$set": {"is_premium": True}}
@@ -1415,72 +1698,29 @@ async def upgrade_to_premium(user_id: str):
     return {"message": "Upgrade para Premium realizado com sucesso!"}
 
 @api_router.get("/zodiac-signs")
-async def get_zodiac_signs():
-    return {"signs": ZODIAC_DATA}
+async def get_zodiac_signs(if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None), payloads: Dict[str, StaticPayload] = Depends(get_static_payloads)):
+    return payloads["zodiac_signs"].response(if_none_match, accept_encoding)
 
 # Premium Content Routes
 @api_router.get("/premium/temperament-profiles")
-async def get_temperament_profiles():
-    return {"profiles": {k.value: v.dict() for k, v in TEMPERAMENT_PROFILES.items()}}
+async def get_temperament_profiles(if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None), payloads: Dict[str, StaticPayload] = Depends(get_static_payloads)):
+    return payloads["temperament_profiles"].response(if_none_match, accept_encoding)
 
 @api_router.get("/premium/temperament-profile/{modality}")
-async def get_temperament_profile(modality: Modality):
-    if modality in TEMPERAMENT_PROFILES:
-        return TEMPERAMENT_PROFILES[modality]
+async def get_temperament_profile(modality: Modality, content: ContentLibrary = Depends(get_content)):
+    profile = content.temperament_profiles.get(modality)
+    if profile:
+        return profile
     raise HTTPException(status_code=404, detail="Perfil de temperamento não encontrado")
 
 @api_router.get("/premium/self-knowledge-questions")
-async def get_self_knowledge_questions():
-    return {"questions": [q.dict() for q in SELF_KNOWLEDGE_QUESTIONS]}
+async def get_self_knowledge_questions(if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None), payloads: Dict[str, StaticPayload] = Depends(get_static_payloads)):
+    return payloads["self_knowledge_questions"].response(if_none_match, accept_encoding)
 
 @api_router.post("/premium/self-knowledge/submit")
-async def submit_self_knowledge(user_id: str, answers: List[SelfKnowledgeAnswer]):
+async def submit_self_knowledge(user_id: str, answers: List[SelfKnowledgeAnswer], content: ContentLibrary = Depends(get_content), db: AsyncIOMotorDatabase = Depends(get_db)):
     # Calculate insights based on answers
-    insights = {}
-    categories = {}
-    
-    for answer in answers:
-        if answer.category not in categories:
-            categories[answer.category] = {"cardinal": 0, "fixed": 0, "mutable": 0}
-        
-        # Find the question and get modality
-        question = next((q for q in SELF_KNOWLEDGE_QUESTIONS if q.id == answer.question_id), None)
-        if question:
-            option = next((opt for opt in question.options if opt["answer"] == answer.answer), None)
-            if option:
-                categories[answer.category][option["modality"]] += answer.score
-    
-    # Generate insights for each category
-    for category, scores in categories.items():
-        dominant = max(scores, key=scores.get)
-        if category == "communication":
-            if dominant == "cardinal":
-                insights[category] = "Você tem um estilo de comunicação direto e assertivo. Foque em desenvolver mais paciência e escuta ativa."
-            elif dominant == "fixed":
-                insights[category] = "Sua comunicação é estável e profunda. Pratique expressar sentimentos mais abertamente."
-            else:
-                insights[category] = "Você se adapta bem na comunicação. Desenvolva mais assertividade quando necessário."
-        elif category == "conflict":
-            if dominant == "cardinal":
-                insights[category] = "Você enfrenta conflitos diretamente. Aprenda a dar tempo para o parceiro processar."
-            elif dominant == "fixed":
-                insights[category] = "Você mantém suas posições com firmeza. Pratique mais flexibilidade em questões menores."
-            else:
-                insights[category] = "Você busca harmonia nos conflitos. Às vezes é preciso ser mais firme em questões importantes."
-        elif category == "intimacy":
-            if dominant == "cardinal":
-                insights[category] = "Você é apaixonado e intenso na intimidade. Equilibre momentos de intensidade com calma."
-            elif dominant == "fixed":
-                insights[category] = "Você constrói intimidade através da lealdade. Explore mais espontaneidade na relação."
-            else:
-                insights[category] = "Você se adapta às necessidades do parceiro. Lembre-se de expressar suas próprias necessidades também."
-        elif category == "decision_making":
-            if dominant == "cardinal":
-                insights[category] = "Você toma decisões rapidamente. Às vezes vale a pena consultar mais o parceiro."
-            elif dominant == "fixed":
-                insights[category] = "Você pondera bem as decisões. Pratique mais agilidade em decisões menores."
-            else:
-                insights[category] = "Você considera múltiplas perspectivas. Desenvolva mais confiança em suas escolhas."
+    insights = self_knowledge_insights_batch([answers], content)[0]
     
     # Store result
     result = SelfKnowledgeResult(
@@ -1490,26 +1730,23 @@ async def submit_self_knowledge(user_id: str, answers: List[SelfKnowledgeAnswer]
     )
     
     result_mongo = result.dict()
-    result_mongo['completed_at'] = result_mongo['completed_at'].isoformat()
     await db.self_knowledge_results.insert_one(result_mongo)
     
     # Award points and update progress
-    await award_points(user_id, 100, "Questionário de Autoconhecimento Completo")
+    await award_points(db, user_id, 100, "Questionário de Autoconhecimento Completo")
     
     return result
 
 @api_router.get("/premium/weekly-missions/{user_id}")
-async def get_weekly_missions(user_id: str):
+async def get_weekly_missions(user_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     # Get current week
     from datetime import datetime
     now = datetime.now()
     current_week = now.isocalendar()[1]
     current_year = now.year
     
-    # Create missions for current week if not exist
-    missions = []
-    for i, template in enumerate(WEEKLY_MISSIONS_TEMPLATE):
-        mission = WeeklyMission(
+    missions = [
+        WeeklyMission(
             id=f"mission_{current_year}_{current_week}_{i+1}",
             title=template.title,
             description=template.description,
@@ -1518,30 +1755,33 @@ async def get_weekly_missions(user_id: str):
             year=current_year,
             mission_type=template.mission_type
         )
-        missions.append(mission)
-        
-        # Check if user has this mission
-        user_mission_data = await db.user_missions.find_one({
-            "user_id": user_id,
-            "mission_id": mission.id
-        })
-        
-        if not user_mission_data:
-            # Create user mission record
-            user_mission = UserMission(
-                user_id=user_id,
-                mission_id=mission.id
-            )
-            user_mission_mongo = user_mission.dict()
-            await db.user_missions.insert_one(user_mission_mongo)
+        for i, template in enumerate(WEEKLY_MISSIONS_TEMPLATE)
+    ]
+    mission_ids = [mission.id for mission in missions]
     
-    # Get user mission progress
-    user_missions = await db.user_missions.find({"user_id": user_id}).to_list(length=None)
+    # Create missions for current week if not exist (one idempotent bulk upsert)
+    provisioning = []
+    for mission in missions:
+        user_mission_mongo = UserMission(user_id=user_id, mission_id=mission.id).dict(exclude={"user_id", "mission_id"})
+        provisioning.append(UpdateOne(
+            {"user_id": user_id, "mission_id": mission.id},
+            {"$setOnInsert": user_mission_mongo},
+            upsert=True
+        ))
+    try:
+        await db.user_missions.bulk_write(provisioning, ordered=False)
+    except BulkWriteError as e:
+        # A concurrent request provisioned the same missions first
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+            raise
+    
+    # Get user mission progress for this week only
+    user_missions = await repository.find_mission_statuses(db, user_id, mission_ids)
     
     # Combine missions with progress
     result = []
     for mission in missions:
-        user_mission = next((um for um in user_missions if um["mission_id"] == mission.id), None)
+        user_mission = user_missions.get(mission.id)
         mission_data = mission.dict()
         mission_data["completed"] = user_mission["completed"] if user_mission else False
         mission_data["completed_at"] = user_mission.get("completed_at") if user_mission else None
@@ -1550,12 +1790,9 @@ async def get_weekly_missions(user_id: str):
     return {"missions": result}
 
 @api_router.post("/premium/complete-mission/{user_id}/{mission_id}")
-async def complete_mission(user_id: str, mission_id: str):
+async def complete_mission(user_id: str, mission_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     # Find mission
-    mission_data = await db.user_missions.find_one({
-        "user_id": user_id,
-        "mission_id": mission_id
-    })
+    mission_data = await repository.find_mission_status(db, user_id, mission_id)
     
     if not mission_data:
         raise HTTPException(status_code=404, detail="Missão não encontrada")
@@ -1569,7 +1806,7 @@ async def complete_mission(user_id: str, mission_id: str):
         {
             "$set": {
                 "completed": True,
-                "completed_at": datetime.now(timezone.utc).isoformat()
+                "completed_at": datetime.now(timezone.utc)
             }
         }
     )
@@ -1582,35 +1819,30 @@ async def complete_mission(user_id: str, mission_id: str):
             break
     
     # Award points
-    await award_points(user_id, mission_points, f"Missão Completada")
+    await award_points(db, user_id, mission_points, f"Missão Completada", is_mission=True)
     
     return {"message": "Missão completada com sucesso!", "points_earned": mission_points}
 
 @api_router.get("/premium/user-progress/{user_id}")
-async def get_user_progress(user_id: str):
-    progress_data = await db.user_progress.find_one({"user_id": user_id})
+async def get_user_progress(user_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    progress_data = await repository.find_user_progress(db, user_id)
     
     if not progress_data:
-        # Create initial progress
+        # Create initial progress, unless a concurrent request or award got there first
         progress = UserProgress(user_id=user_id)
-        progress_mongo = progress.dict()
-        progress_mongo['last_activity'] = progress_mongo['last_activity'].isoformat()
-        await db.user_progress.insert_one(progress_mongo)
-        return progress
-    
-    # Parse from MongoDB
-    if isinstance(progress_data.get('last_activity'), str):
-        progress_data['last_activity'] = datetime.fromisoformat(progress_data['last_activity'])
+        if await insert_if_absent(db.user_progress, {"user_id": user_id}, progress.dict()):
+            return progress
+        progress_data = await repository.find_user_progress(db, user_id)
     
     return UserProgress(**progress_data)
 
 @api_router.get("/premium/couple-exercises/{user_id}")
-async def get_couple_exercises_with_progress(user_id: str):
+async def get_couple_exercises_with_progress(user_id: str, content: ContentLibrary = Depends(get_content), db: AsyncIOMotorDatabase = Depends(get_db)):
     # Get user's exercise progress
-    user_progress = await db.exercise_progress.find({"user_id": user_id}).to_list(length=None)
+    user_progress = await repository.find_exercise_statuses(db, user_id)
     
     exercises_with_progress = []
-    for exercise in COUPLE_EXERCISES:
+    for exercise in content.couple_exercises:
         # Find progress for this exercise
         progress = next((p for p in user_progress if p["exercise_title"] == exercise.title), None)
         
@@ -1630,30 +1862,29 @@ async def get_couple_exercises_with_progress(user_id: str):
     return {"exercises": exercises_with_progress}
 
 @api_router.get("/premium/couple-exercise/{exercise_id}")
-async def get_couple_exercise(exercise_id: str):
-    # Find exercise by title (simplified for demo)
-    exercise = next((ex for ex in COUPLE_EXERCISES if ex.title.lower().replace(" ", "_") in exercise_id), None)
+async def get_couple_exercise(exercise_id: str, content: ContentLibrary = Depends(get_content)):
+    # Exercise IDs are stable in the content pack; title slugs still work for older links
+    exercise = content.couple_exercises_by_id.get(exercise_id)
+    if not exercise:
+        exercise = next((ex for ex in content.couple_exercises if ex.title.lower().replace(" ", "_") in exercise_id), None)
     if not exercise:
         raise HTTPException(status_code=404, detail="Exercício não encontrado")
     return exercise
 
 @api_router.post("/premium/complete-exercise")
-async def complete_exercise(user_id: str, exercise_title: str, feedback: str):
+async def complete_exercise(user_id: str, exercise_title: str, feedback: str, content: ContentLibrary = Depends(get_content), db: AsyncIOMotorDatabase = Depends(get_db)):
     # Find the exercise
-    exercise = next((ex for ex in COUPLE_EXERCISES if ex.title == exercise_title), None)
+    exercise = content.couple_exercises_by_title.get(exercise_title)
     if not exercise:
         raise HTTPException(status_code=404, detail="Exercício não encontrado")
     
     # Check if exercise is unlocked
-    user_progress = await db.exercise_progress.find({"user_id": user_id}).to_list(length=None)
+    user_progress = await repository.find_exercise_statuses(db, user_id)
     if not is_exercise_unlocked(exercise.difficulty_level, user_progress):
         raise HTTPException(status_code=403, detail="Exercício ainda não está desbloqueado")
     
     # Check if already completed
-    existing_progress = await db.exercise_progress.find_one({
-        "user_id": user_id,
-        "exercise_title": exercise_title
-    })
+    existing_progress = await repository.find_exercise_status(db, user_id, exercise_title)
     
     if existing_progress and existing_progress.get("completed"):
         raise HTTPException(status_code=400, detail="Exercício já foi completado")
@@ -1665,26 +1896,28 @@ async def complete_exercise(user_id: str, exercise_title: str, feedback: str):
         "difficulty_level": exercise.difficulty_level,
         "completed": True,
         "feedback": feedback,
-        "completed_at": datetime.now(timezone.utc).isoformat()
+        "completed_at": datetime.now(timezone.utc)
     }
     
-    if existing_progress:
+    # One upsert for both cases; only a not yet completed record matches, so a
+    # concurrent completion makes the insert hit the unique index instead
+    try:
         await db.exercise_progress.update_one(
-            {"user_id": user_id, "exercise_title": exercise_title},
-            {"$set": progress_data}
+            {"user_id": user_id, "exercise_title": exercise_title, "completed": {"$ne": True}},
+            {"$set": progress_data, "$setOnInsert": {"created_at": datetime.now(timezone.utc)}},
+            upsert=True
         )
-    else:
-        progress_data["created_at"] = datetime.now(timezone.utc).isoformat()
-        await db.exercise_progress.insert_one(progress_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Exercício já foi completado")
     
     # Award points based on difficulty level
     points = exercise.difficulty_level * 50  # 50, 100, 150, 200, 250 points
-    await award_points(user_id, points, f"Exercício Completado: {exercise_title}")
+    await award_points(db, user_id, points, f"Exercício Completado: {exercise_title}")
     
     return {
         "message": "Exercício completado com sucesso!",
         "points_earned": points,
-        "next_unlocked": get_next_unlocked_exercise(exercise.difficulty_level)
+        "next_unlocked": get_next_unlocked_exercise(exercise.difficulty_level, content)
     }
 
 def is_exercise_unlocked(difficulty_level: int, user_progress: List[Dict]) -> bool:
@@ -1703,17 +1936,17 @@ def is_exercise_unlocked(difficulty_level: int, user_progress: List[Dict]) -> bo
     
     return previous_completed
 
-def get_next_unlocked_exercise(completed_difficulty: int) -> Optional[str]:
+def get_next_unlocked_exercise(completed_difficulty: int, content: Optional[ContentLibrary] = None) -> Optional[str]:
     """Get the title of the next exercise that was unlocked"""
     next_level = completed_difficulty + 1
-    next_exercise = next((ex for ex in COUPLE_EXERCISES if ex.difficulty_level == next_level), None)
+    next_exercise = (content or CONTENT_REGISTRY.current).first_exercise_by_level.get(next_level)
     return next_exercise.title if next_exercise else None
 
 @api_router.get("/premium/journey-levels/{user_id}")
-async def get_user_journey_levels(user_id: str):
+async def get_user_journey_levels(user_id: str, content: ContentLibrary = Depends(get_content), db: AsyncIOMotorDatabase = Depends(get_db)):
     # Get user progress to determine unlocked levels
-    user_data = await db.users.find_one({"id": user_id})
-    progress_data = await db.user_progress.find_one({"user_id": user_id})
+    user_data = await repository.find_user_badges(db, user_id)
+    progress_data = await repository.find_progress_summary(db, user_id)
     
     if not user_data:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
@@ -1723,7 +1956,7 @@ async def get_user_journey_levels(user_id: str):
     user_level = progress_data.get("current_level", 1) if progress_data else 1
     
     unlocked_levels = []
-    for level in JOURNEY_LEVELS:
+    for level in content.journey_levels:
         is_unlocked = True
         requirements = level.unlock_requirements
         
@@ -1743,9 +1976,9 @@ async def get_user_journey_levels(user_id: str):
     return {"levels": unlocked_levels, "current_level": user_level}
 
 @api_router.get("/premium/daily-advice/{user_id}")
-async def get_daily_advice(user_id: str):
+async def get_daily_advice(user_id: str, content: ContentLibrary = Depends(get_content), db: AsyncIOMotorDatabase = Depends(get_db)):
     # Get user's dominant modality
-    result_data = await db.questionnaire_results.find_one({"user_id": user_id})
+    result_data = await repository.find_dominant_modality(db, user_id)
     if not result_data:
         # Default advice for users without questionnaire
         modality = Modality.CARDINAL
@@ -1756,14 +1989,14 @@ async def get_daily_advice(user_id: str):
     today = datetime.now().strftime("%Y-%m-%d")
     
     # Check if advice already exists for today
-    existing_advice = await db.daily_advice.find_one({"user_id": user_id, "date": today})
+    existing_advice = await repository.find_daily_advice(db, user_id, today)
     if existing_advice:
         if isinstance(existing_advice.get('date'), str):
             return DailyAdvice(**existing_advice)
     
     # Generate new advice
     import random
-    advice_template = random.choice(DAILY_ADVICE_TEMPLATES[modality])
+    advice_template = random.choice(content.daily_advice_templates[modality])
     
     daily_advice = DailyAdvice(
         user_id=user_id,
@@ -1775,21 +2008,22 @@ async def get_daily_advice(user_id: str):
         date=today
     )
     
-    # Save to database
+    # Save to database; a concurrent request may already have stored today's advice
     advice_mongo = daily_advice.dict()
-    await db.daily_advice.insert_one(advice_mongo)
+    if not await insert_if_absent(db.daily_advice, {"user_id": user_id, "date": today}, advice_mongo):
+        return DailyAdvice(**await repository.find_daily_advice(db, user_id, today))
     
     return daily_advice
 
 @api_router.get("/premium/advanced-questions")
-async def get_advanced_self_knowledge_questions():
-    return {"questions": [q.dict() for q in ADVANCED_SELF_KNOWLEDGE]}
+async def get_advanced_self_knowledge_questions(if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None), payloads: Dict[str, StaticPayload] = Depends(get_static_payloads)):
+    return payloads["advanced_questions"].response(if_none_match, accept_encoding)
 
 @api_router.post("/premium/generate-report/{user_id}")
-async def generate_personalized_report(user_id: str, report_type: str = "weekly_progress"):
+async def generate_personalized_report(user_id: str, report_type: str = "weekly_progress", db: AsyncIOMotorDatabase = Depends(get_db)):
     # Get user data and progress
-    user_data = await db.users.find_one({"id": user_id})
-    progress_data = await db.user_progress.find_one({"user_id": user_id})
+    user_data = await repository.find_user_badges(db, user_id)
+    progress_data = await repository.find_progress_summary(db, user_id)
     
     if not user_data:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
@@ -1824,7 +2058,7 @@ async def generate_personalized_report(user_id: str, report_type: str = "weekly_
         next_steps.append("Pratique os exercícios de casal semanalmente")
     
     # Custom advice based on temperament
-    result_data = await db.questionnaire_results.find_one({"user_id": user_id})
+    result_data = await repository.find_dominant_modality(db, user_id)
     if result_data:
         modality = result_data.get("dominant_modality", "cardinal")
         if modality == "cardinal":
@@ -1852,21 +2086,20 @@ async def generate_personalized_report(user_id: str, report_type: str = "weekly_
     
     # Save to database
     report_mongo = report.dict()
-    report_mongo['generated_at'] = report_mongo['generated_at'].isoformat()
     await db.personalized_reports.insert_one(report_mongo)
     
     return report
 
 # Partner and Enhanced Compatibility Routes
 @api_router.post("/partners", response_model=PartnerProfile)
-async def create_partner(user_id: str, partner_data: PartnerCreate):
+async def create_partner(user_id: str, partner_data: PartnerCreate, db: AsyncIOMotorDatabase = Depends(get_db)):
     # Check user status and partner limits
-    user_data = await db.users.find_one({"id": user_id})
+    user_data = await repository.find_user_premium_status(db, user_id)
     if not user_data:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
     # Count existing partners
-    existing_partners_count = await db.partners.count_documents({"user_id": user_id})
+    existing_partners_count = await repository.count_partners(db, user_id)
     
     # Check limits based on premium status
     is_premium = user_data.get("is_premium", False)
@@ -1885,7 +2118,10 @@ async def create_partner(user_id: str, partner_data: PartnerCreate):
             )
     
     # Determine zodiac sign from birth date
-    zodiac_sign = determine_zodiac_from_birth_date(partner_data.birth_date)
+    try:
+        zodiac_sign = determine_zodiac_from_birth_date(partner_data.birth_date)
+    except InvalidBirthDate:
+        raise HTTPException(status_code=400, detail="Data de nascimento inválida. Use o formato AAAA-MM-DD")
     zodiac_data = ZODIAC_DATA[zodiac_sign]
     
     # Create partner profile
@@ -1902,38 +2138,30 @@ async def create_partner(user_id: str, partner_data: PartnerCreate):
     
     # Store in database
     partner_mongo = partner.dict()
-    partner_mongo['created_at'] = partner_mongo['created_at'].isoformat()
     await db.partners.insert_one(partner_mongo)
     
     # Award points for creating first connection (only for first partner)
     if existing_partners_count == 0:
-        await award_points(user_id, 150, "Primeira Conexão Criada")
+        await award_points(db, user_id, 150, "Primeira Conexão Criada")
     else:
-        await award_points(user_id, 100, f"Parceiro Adicional: {partner.name}")
+        await award_points(db, user_id, 100, f"Parceiro Adicional: {partner.name}")
     
-    return partner
+    return model_response(partner)
 
 @api_router.get("/partners/{user_id}", response_model=List[PartnerProfile])
-async def get_user_partners(user_id: str):
-    partners = await db.partners.find({"user_id": user_id}).to_list(length=None)
-    parsed_partners = []
-    
-    for partner_data in partners:
-        if isinstance(partner_data.get('created_at'), str):
-            partner_data['created_at'] = datetime.fromisoformat(partner_data['created_at'])
-        parsed_partners.append(PartnerProfile(**partner_data))
-    
-    return parsed_partners
+async def get_user_partners(user_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    partners = await repository.find_partners(db, user_id)
+    return [PartnerProfile(**partner_data) for partner_data in partners]
 
 @api_router.get("/partners/limits/{user_id}")
-async def get_partner_limits(user_id: str):
+async def get_partner_limits(user_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     # Get user data
-    user_data = await db.users.find_one({"id": user_id})
+    user_data = await repository.find_user_premium_status(db, user_id)
     if not user_data:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
     # Count existing partners
-    existing_partners_count = await db.partners.count_documents({"user_id": user_id})
+    existing_partners_count = await repository.count_partners(db, user_id)
     
     # Determine limits based on premium status
     is_premium = user_data.get("is_premium", False)
@@ -1949,112 +2177,166 @@ async def get_partner_limits(user_id: str):
     }
 
 @api_router.post("/compatibility/enhanced", response_model=EnhancedCompatibilityReport)
-async def generate_enhanced_compatibility(user_id: str, partner_id: str):
+async def generate_enhanced_compatibility(user_id: str, partner_id: str, content: ContentLibrary = Depends(get_content), db: AsyncIOMotorDatabase = Depends(get_db)):
     # Get user data
-    user_data = await db.users.find_one({"id": user_id})
+    user_data = await repository.find_user_profile(db, user_id)
     if not user_data:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
     # Get partner data
-    partner_data = await db.partners.find_one({"id": partner_id})
+    partner_data = await repository.find_partner_profile(db, partner_id)
     if not partner_data:
         raise HTTPException(status_code=404, detail="Parceiro não encontrado")
     
-    # Build user profile
-    user_zodiac_data = ZODIAC_DATA[ZodiacSign(user_data["zodiac_sign"])]
-    user_profile = {
-        "name": user_data["name"],
-        "zodiac_sign": user_zodiac_data["name"],
-        "temperament": user_zodiac_data["temperament"],
-        "element_pt": user_zodiac_data["element_pt"],
-        "quality": user_zodiac_data["quality"]
-    }
-    
-    # Build partner profile
-    partner_profile = {
-        "name": partner_data["name"],
-        "zodiac_sign": ZODIAC_DATA[ZodiacSign(partner_data["zodiac_sign"])]["name"],
-        "temperament": partner_data["temperament"],
-        "element_pt": partner_data["element"],
-        "quality": partner_data["quality"]
-    }
+    # Same profiles and scoring tables as the stored report: return it as is
+    inputs_hash = enhanced_report_inputs_hash(user_data, partner_data, content)
+    stored_report = await repository.find_enhanced_compatibility_report(db, user_id, partner_id)
+    if stored_report and stored_report.get("inputs_hash") == inputs_hash:
+        return model_response(render_enhanced_report(stored_report, content))
     
     # Calculate compatibility
-    compatibility_report = calculate_enhanced_compatibility(user_profile, partner_profile)
+    compatibility_report = calculate_enhanced_compatibility(
+        user_data["name"], ZodiacSign(user_data["zodiac_sign"]),
+        partner_data["name"], ZodiacSign(partner_data["zodiac_sign"]),
+        content
+    )
     compatibility_report.user_id = user_id
     compatibility_report.partner_id = partner_id
     
-    # Store report
-    report_mongo = compatibility_report.dict()
-    report_mongo['created_at'] = report_mongo['created_at'].isoformat()
-    await db.enhanced_compatibility_reports.insert_one(report_mongo)
+    # Store report as template IDs plus names; texts are rendered on read.
+    # One report per (user, partner): a changed input replaces the previous one
+    entry = content.enhanced_table[(ZodiacSign(user_data["zodiac_sign"]), ZodiacSign(partner_data["zodiac_sign"]))]
+    names = {"name1": user_data["name"], "name2": partner_data["name"]}
+    report_mongo = content.text_templates.dehydrate(compatibility_report.dict(), enhanced_template_ids(entry), names)
+    report_mongo["inputs_hash"] = inputs_hash
+    report_mongo["table_version"] = content.enhanced_table_version
+    pair = {"user_id": user_id, "partner_id": partner_id}
+    try:
+        await db.enhanced_compatibility_reports.replace_one(pair, report_mongo, upsert=True)
+    except DuplicateKeyError:
+        # Lost an upsert race against a concurrent generation; the document exists now
+        await db.enhanced_compatibility_reports.replace_one(pair, report_mongo)
     
     # Update user badges
-    user_badges = user_data.get('badges', [])
-    if 'first_connection_created' not in user_badges:
-        user_badges.append('first_connection_created')
-        await db.users.update_one(
-            {"id": user_id},
-            {"$set": {"badges": user_badges}}
-        )
+    await grant_badge(db, user_id, BadgeType.FIRST_CONNECTION_CREATED)
     
     # Award points
-    await award_points(user_id, 200, "Compatibilidade Avançada Gerada")
+    await award_points(db, user_id, 200, "Compatibilidade Avançada Gerada")
     
-    return compatibility_report
+    return model_response(compatibility_report)
 
-@api_router.get("/compatibility/enhanced/{user_id}/{partner_id}")
-async def get_enhanced_compatibility_report(user_id: str, partner_id: str):
-    report_data = await db.enhanced_compatibility_reports.find_one({
-        "user_id": user_id,
-        "partner_id": partner_id
-    })
+@api_router.post("/compatibility/batch", response_model=CompatibilityBatchResponse)
+async def batch_compatibility(request: CompatibilityBatchRequest, content: ContentLibrary = Depends(get_content), db: AsyncIOMotorDatabase = Depends(get_db)):
+    """Score one user against many partners/users at once; only expanded IDs get full text"""
+    if len(request.partner_ids) + len(request.user_ids) > MAX_BATCH_CANDIDATES:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_BATCH_CANDIDATES} perfis por comparação")
+    if len(request.expand) > MAX_BATCH_EXPAND:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_BATCH_EXPAND} relatórios detalhados por comparação")
+    
+    user_data = await repository.find_user_profile(db, request.user_id)
+    if not user_data:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    
+    # Partners are scoped to the requesting user, other users are looked up globally
+    candidates = []
+    if request.partner_ids:
+        partners = await repository.find_partner_profiles(db, request.user_id, request.partner_ids)
+        candidates.extend(("partner", partner) for partner in partners)
+    if request.user_ids:
+        users = await repository.find_user_profiles(db, request.user_ids)
+        candidates.extend(("user", user) for user in users if user["id"] != request.user_id)
+    
+    found_ids = {candidate["id"] for _, candidate in candidates} | {request.user_id}
+    not_found = [candidate_id for candidate_id in dict.fromkeys(request.partner_ids + request.user_ids) if candidate_id not in found_ids]
+    
+    user_sign = ZodiacSign(user_data["zodiac_sign"])
+    candidate_signs = [ZodiacSign(candidate["zodiac_sign"]) for _, candidate in candidates]
+    candidate_codes = np.fromiter((SIGN_CODES[sign] for sign in candidate_signs), dtype=np.intp, count=len(candidate_signs))
+    scores = score_sign_codes(SIGN_CODES[user_sign], candidate_codes, content)
+    affinities = affinity_for_scores(scores)
+    
+    expand = set(request.expand)
+    results = []
+    for index in np.argsort(-scores, kind="stable"):
+        kind, candidate = candidates[index]
+        report = None
+        if candidate["id"] in expand:
+            report = calculate_enhanced_compatibility(user_data["name"], user_sign, candidate["name"], candidate_signs[index], content)
+            report.user_id = request.user_id
+            report.partner_id = candidate["id"]
+        results.append(CompatibilityBatchResult(
+            id=candidate["id"],
+            kind=kind,
+            name=candidate["name"],
+            zodiac_sign=candidate_signs[index],
+            compatibility_score=int(scores[index]),
+            general_affinity=str(affinities[index]),
+            report=report
+        ))
+    
+    return model_response(CompatibilityBatchResponse(user_id=request.user_id, results=results, not_found=not_found))
+
+@api_router.get("/compatibility/enhanced/{user_id}/{partner_id}", response_model=EnhancedCompatibilityReport)
+async def get_enhanced_compatibility_report(user_id: str, partner_id: str, content: ContentLibrary = Depends(get_content), db: AsyncIOMotorDatabase = Depends(get_db)):
+    report_data = await repository.find_enhanced_compatibility_report(db, user_id, partner_id)
     
     if not report_data:
         raise HTTPException(status_code=404, detail="Relatório de compatibilidade não encontrado")
     
-    if isinstance(report_data.get('created_at'), str):
-        report_data['created_at'] = datetime.fromisoformat(report_data['created_at'])
-    
-    return EnhancedCompatibilityReport(**report_data)
+    return model_response(render_enhanced_report(report_data, content))
 
 @api_router.get("/temperaments/info")
-async def get_temperament_info():
-    return {
-        "temperaments": TEMPERAMENT_DESCRIPTIONS,
-        "zodiac_mapping": {sign.value: data for sign, data in ZODIAC_DATA.items()}
-    }
-
-async def award_points(user_id: str, points: int, reason: str):
-    """Helper function to award points to user"""
-    progress_data = await db.user_progress.find_one({"user_id": user_id})
-    
-    if not progress_data:
-        # Create initial progress
-        progress = UserProgress(user_id=user_id, total_points=points)
-        progress_mongo = progress.dict()
-        progress_mongo['last_activity'] = progress_mongo['last_activity'].isoformat()
-        await db.user_progress.insert_one(progress_mongo)
-    else:
-        # Update progress
-        new_total = progress_data.get("total_points", 0) + points
-        new_level = (new_total // 500) + 1  # Level up every 500 points
-        
-        await db.user_progress.update_one(
-            {"user_id": user_id},
-            {
-                "$set": {
-                    "total_points": new_total,
-                    "current_level": new_level,
-                    "last_activity": datetime.now(timezone.utc).isoformat()
-                },
-                "$inc": {"missions_completed": 1}
-            }
-        )
+async def get_temperament_info(if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None), payloads: Dict[str, StaticPayload] = Depends(get_static_payloads)):
+    return payloads["temperament_info"].response(if_none_match, accept_encoding)
+
+def badge_update(badge: BadgeType, progress_percentage: Optional[int] = None) -> Dict[str, Any]:
+    update = {"$addToSet": {"badges": badge.value}}
+    if progress_percentage is not None:
+        # Progress only moves forward, whatever order the badges are earned in
+        update["$max"] = {"progress_percentage": progress_percentage}
+    return update
+
+async def grant_badge(db, user_id: str, badge: BadgeType, progress_percentage: Optional[int] = None) -> bool:
+    """Grant a badge in one idempotent write; returns False if the user does not exist"""
+    result = await db.users.update_one({"id": user_id}, badge_update(badge, progress_percentage))
+    return result.matched_count > 0
+
+async def insert_if_absent(collection, key: Dict[str, Any], document: Dict[str, Any]) -> bool:
+    """Insert document unless one matching key exists; True when this call created it"""
+    try:
+        result = await collection.update_one(key, {"$setOnInsert": document}, upsert=True)
+    except DuplicateKeyError:
+        # Lost an upsert race on the unique index; the document exists now
+        return False
+    return result.upserted_id is not None
+
+POINTS_PER_LEVEL = 500  # Level up every 500 points
+
+async def award_points(db, user_id: str, points: int, reason: str, is_mission: bool = False):
+    """Helper function to award points to user in a single atomic upsert"""
+    # Pipeline update: totals are incremented and the level derived on the server,
+    # so concurrent awards cannot overwrite each other
+    update = [
+        {"$set": {
+            "total_points": {"$add": [{"$ifNull": ["$total_points", 0]}, points]},
+            "missions_completed": {"$add": [{"$ifNull": ["$missions_completed", 0]}, 1 if is_mission else 0]},
+            "weekly_streak": {"$ifNull": ["$weekly_streak", 0]},
+            "achievements": {"$ifNull": ["$achievements", []]},
+            "last_activity": datetime.now(timezone.utc)
+        }},
+        {"$set": {
+            "current_level": {"$add": [{"$toInt": {"$floor": {"$divide": ["$total_points", POINTS_PER_LEVEL]}}}, 1]}
+        }}
+    ]
+    try:
+        await db.user_progress.update_one({"user_id": user_id}, update, upsert=True)
+    except DuplicateKeyError:
+        # Lost an upsert race against another award; the document exists now
+        await db.user_progress.update_one({"user_id": user_id}, update)
 
 # Payment Routes
 @api_router.post("/payments/checkout/session", response_model=CheckoutSessionResponse)
-async def create_checkout_session(request: PremiumUpgradeRequest, http_request: Request):
+async def create_checkout_session(request: PremiumUpgradeRequest, http_request: Request, db: AsyncIOMotorDatabase = Depends(get_db)):
     try:
         # Get Stripe API key from environment
         stripe_api_key = os.environ.get('STRIPE_API_KEY')
@@ -2102,8 +2384,6 @@ async def create_checkout_session(request: PremiumUpgradeRequest, http_request:
         
         # Store transaction in database
         transaction_mongo = transaction.dict()
-        transaction_mongo['created_at'] = transaction_mongo['created_at'].isoformat()
-        transaction_mongo['updated_at'] = transaction_mongo['updated_at'].isoformat()
         await db.payment_transactions.insert_one(transaction_mongo)
         
         return session
@@ -2113,7 +2393,7 @@ async def create_checkout_session(request: PremiumUpgradeRequest, http_request:
         raise HTTPException(status_code=500, detail="Failed to create checkout session")
 
 @api_router.get("/payments/checkout/status/{session_id}", response_model=CheckoutStatusResponse)
-async def get_checkout_status(session_id: str):
+async def get_checkout_status(session_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     try:
         # Get Stripe API key from environment
         stripe_api_key = os.environ.get('STRIPE_API_KEY')
@@ -2127,7 +2407,7 @@ async def get_checkout_status(session_id: str):
         checkout_status = await stripe_checkout.get_checkout_status(session_id)
         
         # Update payment transaction in database
-        transaction_data = await db.payment_transactions.find_one({"session_id": session_id})
+        transaction_data = await repository.find_transaction_status(db, session_id)
         if transaction_data:
             # Update transaction status
             await db.payment_transactions.update_one(
@@ -2136,7 +2416,7 @@ async def get_checkout_status(session_id: str):
                     "$set": {
                         "payment_status": checkout_status.payment_status,
                         "stripe_status": checkout_status.status,
-                        "updated_at": datetime.now(timezone.utc).isoformat()
+                        "updated_at": datetime.now(timezone.utc)
                     }
                 }
             )
@@ -2164,7 +2444,7 @@ async def get_checkout_status(session_id: str):
         raise HTTPException(status_code=500, detail="Failed to get checkout status")
 
 @api_router.post("/webhook/stripe")
-async def stripe_webhook(request: Request):
+async def stripe_webhook(request: Request, db: AsyncIOMotorDatabase = Depends(get_db)):
     try:
         # Get Stripe API key from environment
         stripe_api_key = os.environ.get('STRIPE_API_KEY')
@@ -2189,7 +2469,7 @@ async def stripe_webhook(request: Request):
             session_id = webhook_response.session_id
             
             # Update payment transaction
-            transaction_data = await db.payment_transactions.find_one({"session_id": session_id})
+            transaction_data = await repository.find_transaction_status(db, session_id)
             if transaction_data:
                 await db.payment_transactions.update_one(
                     {"session_id": session_id},
@@ -2197,7 +2477,7 @@ async def stripe_webhook(request: Request):
                         "$set": {
                             "payment_status": webhook_response.payment_status,
                             "stripe_status": "completed",
-                            "updated_at": datetime.now(timezone.utc).isoformat()
+                            "updated_at": datetime.now(timezone.utc)
                         }
                     }
                 )
@@ -2222,6 +2502,110 @@ async def stripe_webhook(request: Request):
         logger.error(f"Error processing webhook: {str(e)}")
         raise HTTPException(status_code=500, detail="Webhook processing failed")
 
+# Database Indexes
+# Every query the API issues is keyed on one of these fields; without them each
+# lookup is a collection scan.
+INDEX_SPECS = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Existing databases hold duplicate emails; run dedupe_user_emails.py before deploying this index
+        IndexModel([("email", ASCENDING)], name="email_unique_ci", unique=True, collation=repository.EMAIL_COLLATION),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+    ],
+    "questionnaire_results": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "user_progress": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    "user_missions": [
+        IndexModel([("user_id", ASCENDING), ("mission_id", ASCENDING)], name="user_id_mission_id_unique", unique=True),
+    ],
+    "exercise_progress": [
+        IndexModel([("user_id", ASCENDING), ("exercise_title", ASCENDING)], name="user_id_exercise_title_unique", unique=True),
+    ],
+    "daily_advice": [
+        IndexModel([("user_id", ASCENDING), ("date", ASCENDING)], name="user_id_date_unique", unique=True),
+    ],
+    "partners": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "compatibility_reports": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "enhanced_compatibility_reports": [
+        # Replaces the non-unique user_id_partner_id; dedupe_enhanced_reports.py migrates older databases
+        IndexModel([("user_id", ASCENDING), ("partner_id", ASCENDING)], name="user_id_partner_id_unique", unique=True),
+    ],
+    "payment_transactions": [
+        IndexModel([("session_id", ASCENDING)], name="session_id_unique", unique=True),
+    ],
+}
+
+async def load_compatibility_index(database, index: UserCodeIndex):
+    """Fill the top-K index from users and their questionnaire results (latest result wins)"""
+    async for user in repository.iter_user_signs(database):
+        index.set_sign(user["id"], SIGN_CODES[ZodiacSign(user["zodiac_sign"])])
+    async for result in repository.iter_dominant_modalities(database):
+        index.set_modality(result["user_id"], MODALITY_CODES[Modality(result["dominant_modality"])])
+
+async def ensure_indexes(database) -> Dict[str, List[str]]:
+    """Create the declared indexes, skipping (and logging) any that cannot be built"""
+    created = {}
+    for collection_name, indexes in INDEX_SPECS.items():
+        created[collection_name] = []
+        for index in indexes:
+            try:
+                name = await database[collection_name].create_indexes([index])
+                created[collection_name].extend(name)
+            except OperationFailure as e:
+                # e.g. a unique index over data that already holds duplicates
+                logger.warning(f"Could not create index {index.document['name']} on {collection_name}: {str(e)}")
+    return created
+
+async def get_index_usage(database) -> Dict[str, List[Dict[str, Any]]]:
+    """Collect $indexStats for every indexed collection"""
+    usage = {}
+    for collection_name in INDEX_SPECS:
+        stats = await database[collection_name].aggregate([{"$indexStats": {}}]).to_list(length=None)
+        usage[collection_name] = [
+            {
+                "name": stat["name"],
+                "key": dict(stat["key"]),
+                "ops": stat["accesses"]["ops"],
+                "since": stat["accesses"]["since"].isoformat() if stat["accesses"].get("since") else None,
+            }
+            for stat in sorted(stats, key=lambda s: s["accesses"]["ops"], reverse=True)
+        ]
+    return usage
+
+@api_router.get("/admin/index-stats", dependencies=[Depends(require_admin)])
+async def get_index_stats(db: AsyncIOMotorDatabase = Depends(get_db)):
+    return {"collections": await get_index_usage(db)}
+
+@api_router.get("/admin/pool-stats", dependencies=[Depends(require_admin)])
+async def get_pool_stats():
+    return {
+        "max_pool_size": pool_options["maxPoolSize"],
+        "min_pool_size": pool_options["minPoolSize"],
+        **pool_metrics.snapshot()
+    }
+
+@api_router.get("/admin/content", dependencies=[Depends(require_admin)])
+async def get_content_version(content: ContentLibrary = Depends(get_content)):
+    return {"version": content.version, "reload_interval": CONTENT_RELOAD_INTERVAL}
+
+@api_router.post("/admin/content/reload", dependencies=[Depends(require_admin)])
+async def reload_content(force: bool = False, registry: ContentRegistry = Depends(get_content_registry)):
+    """Load the pack on disk now on this worker; the others pick it up on their next poll"""
+    previous = registry.current.version
+    try:
+        reloaded = await registry.reload(force=force)
+    except RELOAD_ERRORS as e:
+        raise HTTPException(status_code=422, detail=f"Pacote de conteúdo inválido: {str(e)}")
+    return {"previous_version": previous, "version": registry.current.version, "reloaded": reloaded}
+
 # Health check endpoint (without /api prefix)
 @app.get("/health")
 async def health_check():
@@ -2235,6 +2619,9 @@ async def api_health_check():
 # Include the router in the main app
 app.include_router(api_router)
 
+# Static payloads arrive already encoded and pass through; everything else is compressed per response
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MINIMUM_SIZE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -2249,7 +2636,3 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
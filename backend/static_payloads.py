@@ -0,0 +1,67 @@
+"""Pre-encoded JSON bodies for endpoints that serve module-level constants.
+
+Each payload is serialized once, the same way FastAPI's JSONResponse would
+serialize it, and gets a strong ETag from its bytes, prefixed with the content
+version it was built from when there is one. A request then costs a
+header comparison plus writing the cached bytes, or a bodiless 304 when the
+client already holds that version.
+
+Payloads large enough to be worth it are also compressed once here, with every
+supported encoding, and the variant is chosen from Accept-Encoding per request.
+Each variant has its own ETag (the identity tag plus an encoding suffix), as
+caches require for different representations. Any of them validates the
+payload, since they all decode to the same bytes, and a 304 carries the tag
+that matched so the cache freshens the copy it holds.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from compression import negotiate_encoding, precompress
+
+STATIC_CACHE_CONTROL = "public, max-age=300"
+
+class StaticPayload:
+    __slots__ = ("body", "etag", "encoded", "_etags")
+
+    def __init__(self, content: Any, version: str = ""):
+        self.body = json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{version}-{digest}"' if version else f'"{digest}"'
+        self.encoded: Dict[str, bytes] = precompress(self.body)
+        self._etags = {self.etag} | {self.variant_etag(encoding) for encoding in self.encoded}
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def matching_etag(self, if_none_match: Optional[str]) -> Optional[str]:
+        """The tag in If-None-Match that validates this payload ("*" for any); weak comparison, so W/ is accepted"""
+        if not if_none_match:
+            return None
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            tag = candidate.removeprefix("W/")
+            if candidate == "*" or tag in self._etags:
+                return tag
+        return None
+
+    def response(self, if_none_match: Optional[str] = None, accept_encoding: Optional[str] = None) -> Response:
+        encoding = negotiate_encoding(accept_encoding) if self.encoded else None
+        headers = {"ETag": self.variant_etag(encoding), "Cache-Control": STATIC_CACHE_CONTROL}
+        if self.encoded:
+            headers["Vary"] = "Accept-Encoding"
+        matched = self.matching_etag(if_none_match)
+        if matched:
+            # Echo the tag that matched, so the cache freshens the representation it actually stored
+            if matched != "*":
+                headers["ETag"] = matched
+            return Response(status_code=304, headers=headers)
+        if encoding is None:
+            return Response(content=self.body, media_type="application/json", headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(content=self.encoded[encoding], media_type="application/json", headers=headers)
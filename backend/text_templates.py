@@ -0,0 +1,92 @@
+"""Compiled text templates for report copy.
+
+Report texts use str.format-style placeholders such as {name1}. Each distinct
+text is parsed once into literal/field pieces, so rendering is a join. Reports
+are stored as template IDs plus the parameters to fill in, and rendered when
+read, so documents stay small. IDs are positional names (field plus list index),
+so an ID only means the same text under the table version that stored it:
+callers store that version with the document and rebuild documents stored
+under another one instead of rendering their IDs.
+"""
+from string import Formatter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+class CompiledTemplate:
+    __slots__ = ("text", "_parts")
+
+    def __init__(self, text: str):
+        parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, format_spec, conversion in Formatter().parse(text):
+            if format_spec or conversion:
+                raise ValueError(f"Unsupported placeholder in template: {text!r}")
+            parts.append((literal, field))
+        self.text = text
+        self._parts = tuple(parts)
+
+    def render(self, params: Mapping[str, str]) -> str:
+        return "".join(literal if field is None else literal + params[field] for literal, field in self._parts)
+
+class TemplateRegistry:
+    """Template ID -> compiled template; identical texts share one compiled template"""
+
+    def __init__(self):
+        self._by_id: Dict[str, CompiledTemplate] = {}
+        self._by_text: Dict[str, CompiledTemplate] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, template_id: str) -> bool:
+        return template_id in self._by_id
+
+    def copy(self) -> "TemplateRegistry":
+        """Independent registry starting from the same templates; compiled templates are shared"""
+        registry = TemplateRegistry()
+        registry._by_id = dict(self._by_id)
+        registry._by_text = dict(self._by_text)
+        return registry
+
+    def register(self, template_id: str, text: str) -> str:
+        compiled = self._by_text.get(text)
+        if compiled is None:
+            compiled = self._by_text[text] = CompiledTemplate(text)
+        self._by_id[template_id] = compiled
+        return template_id
+
+    def register_all(self, prefix: str, texts: Iterable[str]) -> Tuple[str, ...]:
+        return tuple(self.register(f"{prefix}.{position}", text) for position, text in enumerate(texts))
+
+    def render(self, template_id: str, params: Mapping[str, str], default: str = "") -> str:
+        """Unknown IDs (e.g. a text a later content version dropped) render as default"""
+        compiled = self._by_id.get(template_id)
+        return default if compiled is None else compiled.render(params)
+
+    def render_all(self, template_ids: Iterable[str], params: Mapping[str, str]) -> List[str]:
+        """Unknown IDs are left out rather than failing the whole document"""
+        return [self._by_id[template_id].render(params) for template_id in template_ids if template_id in self._by_id]
+
+    def dehydrate(self, document: Dict[str, Any], template_ids: Mapping[str, Any], params: Mapping[str, str]) -> Dict[str, Any]:
+        """Replace rendered text fields with their template IDs and the render parameters.
+
+        `template_ids` maps each field to a sequence of IDs, or to a dict of key -> ID.
+        """
+        for field in template_ids:
+            document.pop(field, None)
+        document["text_templates"] = {
+            field: dict(ids) if isinstance(ids, Mapping) else list(ids)
+            for field, ids in template_ids.items()
+        }
+        document["text_params"] = dict(params)
+        return document
+
+    def hydrate(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Inverse of dehydrate; documents stored with rendered text pass through unchanged"""
+        template_ids = document.pop("text_templates", None)
+        params = document.pop("text_params", None) or {}
+        if template_ids:
+            for field, ids in template_ids.items():
+                if isinstance(ids, Mapping):
+                    document[field] = {key: self.render(template_id, params) for key, template_id in ids.items()}
+                else:
+                    document[field] = self.render_all(ids, params)
+        return document
@@ -11,6 +11,9 @@ class TemperamentosAPITester:
         self.tests_passed = 0
         self.user_id = None
         self.user2_id = None
+        self.user_email = None
+        # Emails are unique per profile, so each run registers fresh addresses
+        self.run_tag = datetime.now().strftime("%Y%m%d%H%M%S")
 
     def run_test(self, name, method, endpoint, expected_status, data=None, params=None):
         """Run a single API test"""
@@ -54,8 +57,10 @@ class TemperamentosAPITester:
         """Test root API endpoint"""
         return self.run_test("Root API", "GET", "", 200)
 
-    def test_create_user(self, name="João Silva", email="joao@exemplo.com", zodiac_sign="leo", birth_date="1990-08-15"):
+    def test_create_user(self, name="João Silva", email=None, zodiac_sign="leo", birth_date="1990-08-15"):
         """Test user creation"""
+        email = email or f"joao.{self.run_tag}@exemplo.com"
+        self.user_email = email
         user_data = {
             "name": name,
             "email": email,
@@ -77,7 +82,7 @@ class TemperamentosAPITester:
         """Create a second user for compatibility testing"""
         user_data = {
             "name": "Maria Santos",
-            "email": "maria@exemplo.com", 
+            "email": f"maria.{self.run_tag}@exemplo.com",
             "zodiac_sign": "scorpio",
             "birth_date": "1992-11-05"
         }
@@ -94,6 +99,20 @@ class TemperamentosAPITester:
             return False, {}
         return self.run_test("Get User", "GET", f"users/{self.user_id}", 200)
 
+    def test_lookup_user_by_email(self):
+        """Test login lookup by email (case-insensitive)"""
+        if not self.user_email:
+            print("❌ No user email available for testing")
+            return False, {}
+        success, response = self.run_test("Lookup User by Email", "GET", "users/lookup", 200, params={"email": self.user_email.upper()})
+        if success:
+            if response.get('id') == self.user_id:
+                print(f"   ✅ Lookup returned the registered user")
+            else:
+                print(f"   ❌ Expected user {self.user_id}, got {response.get('id')}")
+                return False, response
+        return success, response
+
     def test_get_questionnaire(self):
         """Test getting questionnaire"""
         success, response = self.run_test("Get Questionnaire", "GET", "questionnaire", 200)
@@ -481,7 +500,7 @@ class TemperamentosAPITester:
         """Create a fresh free user for independent testing"""
         user_data = {
             "name": "Teste Gratuito",
-            "email": "teste.gratuito@exemplo.com",
+            "email": f"teste.gratuito.{self.run_tag}@exemplo.com",
             "zodiac_sign": "virgo",
             "birth_date": "1995-09-12"
         }
@@ -529,6 +548,7 @@ def main():
         ("Root API", tester.test_root_endpoint),
         ("Create User", tester.test_create_user),
         ("Get User", tester.test_get_user),
+        ("Lookup User by Email", tester.test_lookup_user_by_email),
         ("Get Questionnaire", tester.test_get_questionnaire),
         ("Submit Questionnaire", tester.test_submit_questionnaire),
         ("Verify Progress After Questionnaire", tester.verify_user_progress_after_questionnaire),
@@ -54,24 +54,25 @@ const LoginDialog = ({ open, onOpenChange, onLogin }) => {
     setIsLoading(true);
 
     try {
-      // For now, simulate login by finding user by email
+      // For now, simulate login by looking the user up by email
       // In a real app, this would be a proper authentication endpoint
-      const response = await axios.get(`${API}/users`);
-      const users = response.data;
-      const user = users.find(u => u.email === loginData.email);
+      const response = await axios.get(`${API}/users/lookup`, {
+        params: { email: loginData.email }
+      });
+      const user = response.data;
       
-      if (user) {
-        localStorage.setItem('userId', user.id);
-        localStorage.setItem('userEmail', user.email);
-        toast.success("Login realizado com sucesso!");
-        onLogin(user.id);
-        onOpenChange(false);
-      } else {
+      localStorage.setItem('userId', user.id);
+      localStorage.setItem('userEmail', user.email);
+      toast.success("Login realizado com sucesso!");
+      onLogin(user.id);
+      onOpenChange(false);
+    } catch (error) {
+      if (error.response?.status === 404) {
         toast.error("Usuário não encontrado. Crie um perfil primeiro.");
+      } else {
+        toast.error("Erro ao fazer login. Tente novamente.");
+        console.error("Login error:", error);
       }
-    } catch (error) {
-      toast.error("Erro ao fazer login. Tente novamente.");
-      console.error("Login error:", error);
     } finally {
       setIsLoading(false);
     }
@@ -619,30 +620,39 @@ const Dashboard = ({ userId }) => {
 
   const generateDemoCompatibilityReport = async () => {
     try {
-      // Create a demo partner user
-      const partnerData = {
-        name: "Partner Demo",
-        email: "partner@demo.com",
-        zodiac_sign: "scorpio",
-        birth_date: "1992-11-05"
-      };
-      
-      const partnerResponse = await axios.post(`${API}/users`, partnerData);
-      const partnerId = partnerResponse.data.id;
-      
-      // Submit questionnaire for partner (Fixed dominant)
-      const partnerAnswers = [
-        {"question_id": 1, "answer": "Penso bem e mantenho minha posição", "score": 3},
-        {"question_id": 2, "answer": "Valoriza estabilidade e lealdade", "score": 3},
-        {"question_id": 3, "answer": "Mantém sua posição com firmeza", "score": 3},
-        {"question_id": 4, "answer": "Prefiro estabilidade e resisto a mudanças", "score": 3},
-        {"question_id": 5, "answer": "Oferece suporte sólido e constante", "score": 3}
-      ];
-      
-      await axios.post(`${API}/questionnaire/submit`, {
-        user_id: partnerId,
-        answers: partnerAnswers
-      });
+      // One demo partner per user, found again by its per-user email on later runs
+      const partnerEmail = `partner-${userId}@demo.com`;
+      let partnerId;
+      try {
+        const existingPartner = await axios.get(`${API}/users/lookup`, { params: { email: partnerEmail } });
+        partnerId = existingPartner.data.id;
+      } catch (lookupError) {
+        if (lookupError.response?.status !== 404) throw lookupError;
+        
+        const partnerData = {
+          name: "Partner Demo",
+          email: partnerEmail,
+          zodiac_sign: "scorpio",
+          birth_date: "1992-11-05"
+        };
+        
+        const partnerResponse = await axios.post(`${API}/users`, partnerData);
+        partnerId = partnerResponse.data.id;
+        
+        // Submit questionnaire for partner (Fixed dominant)
+        const partnerAnswers = [
+          {"question_id": 1, "answer": "Penso bem e mantenho minha posição", "score": 3},
+          {"question_id": 2, "answer": "Valoriza estabilidade e lealdade", "score": 3},
+          {"question_id": 3, "answer": "Mantém sua posição com firmeza", "score": 3},
+          {"question_id": 4, "answer": "Prefiro estabilidade e resisto a mudanças", "score": 3},
+          {"question_id": 5, "answer": "Oferece suporte sólido e constante", "score": 3}
+        ];
+        
+        await axios.post(`${API}/questionnaire/submit`, {
+          user_id: partnerId,
+          answers: partnerAnswers
+        });
+      }
       
       // Generate compatibility report
       const compatibilityResponse = await axios.post(`${API}/compatibility`, {
@@ -0,0 +1,36 @@
+"""The precomputed answer indexes must score exactly like a scan of the question banks."""
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from server import (  # noqa: E402
+    CONTENT_REGISTRY, QUESTIONNAIRE_ANSWER_INDEX, QUESTIONNAIRE_QUESTIONS, QuestionnaireAnswer, build_answer_index, calculate_modality_scores
+)
+
+def test_every_option_is_indexed():
+    for question in QUESTIONNAIRE_QUESTIONS:
+        for option in question["options"]:
+            assert QUESTIONNAIRE_ANSWER_INDEX[(question["id"], option["answer"])] == (option["modality"], option["score"])
+    for question in CONTENT_REGISTRY.current.self_knowledge_questions:
+        for option in question.options:
+            assert CONTENT_REGISTRY.current.self_knowledge_answer_index[(question.id, option["answer"])] == (option["modality"], option["score"])
+
+def test_scores_ignore_unknown_questions_and_answers():
+    first = QUESTIONNAIRE_QUESTIONS[0]
+    answers = [
+        QuestionnaireAnswer(question_id=first["id"], answer=first["options"][0]["answer"], score=0),
+        QuestionnaireAnswer(question_id=first["id"], answer="Resposta inexistente", score=0),
+        QuestionnaireAnswer(question_id=9999, answer=first["options"][0]["answer"], score=0),
+    ]
+    expected = {"cardinal": 0, "fixed": 0, "mutable": 0}
+    expected[first["options"][0]["modality"]] += first["options"][0]["score"]
+    assert calculate_modality_scores(answers) == expected
+
+def test_first_duplicate_option_wins():
+    index = build_answer_index([(1, [
+        {"answer": "A", "modality": "cardinal", "score": 3},
+        {"answer": "A", "modality": "fixed", "score": 1},
+    ])])
+    assert index[(1, "A")] == ("cardinal", 3)
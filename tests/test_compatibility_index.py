@@ -0,0 +1,47 @@
+"""Top-K results from the in-memory code index must agree with brute-force scoring."""
+import os
+import random
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from compatibility_index import UserCodeIndex  # noqa: E402
+from server import COMPATIBILITY_SCORE_MATRIX, COMPATIBILITY_TABLE, MODALITY_CODES, SIGN_CODES, Modality, ZodiacSign  # noqa: E402
+
+def _populate(index, count, seed=7):
+    rng = random.Random(seed)
+    profiles = {}
+    for i in range(count):
+        sign, modality = rng.choice(list(ZodiacSign)), rng.choice(list(Modality))
+        index.set_sign(f"user-{i}", SIGN_CODES[sign])
+        index.set_modality(f"user-{i}", MODALITY_CODES[modality])
+        profiles[f"user-{i}"] = (sign, modality)
+    return profiles
+
+def test_top_k_matches_brute_force():
+    index = UserCodeIndex(initial_capacity=4)
+    profiles = _populate(index, 3000)
+    assert len(index) == 3000
+    
+    sign, modality = profiles["user-0"]
+    expected = sorted(
+        (COMPATIBILITY_TABLE[(sign, other_sign, modality, other_modality)].score for user_id, (other_sign, other_modality) in profiles.items() if user_id != "user-0"),
+        reverse=True
+    )[:25]
+    top = index.top_k("user-0", 25, COMPATIBILITY_SCORE_MATRIX)
+    assert [score for _, score in top] == expected
+    assert "user-0" not in {user_id for user_id, _ in top}
+    for user_id, score in top:
+        other_sign, other_modality = profiles[user_id]
+        assert COMPATIBILITY_TABLE[(sign, other_sign, modality, other_modality)].score == score
+
+def test_users_without_questionnaire_are_skipped():
+    index = UserCodeIndex()
+    index.set_sign("a", SIGN_CODES[ZodiacSign.ARIES])
+    index.set_modality("a", MODALITY_CODES[Modality.CARDINAL])
+    index.set_sign("b", SIGN_CODES[ZodiacSign.LEO])
+    assert index.top_k("a", 10, COMPATIBILITY_SCORE_MATRIX) == []
+    
+    index.set_modality("b", MODALITY_CODES[Modality.FIXED])
+    assert index.top_k("a", 10, COMPATIBILITY_SCORE_MATRIX) == [("b", COMPATIBILITY_TABLE[(ZodiacSign.ARIES, ZodiacSign.LEO, Modality.CARDINAL, Modality.FIXED)].score)]
@@ -0,0 +1,67 @@
+"""Golden test: the precomputed compatibility table must reproduce the original
+if/elif implementation for every sign x modality combination."""
+import json
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from server import (  # noqa: E402
+    COMPATIBILITY_TABLE, COMPATIBILITY_TABLE_VERSION, Modality, QuestionnaireResult, User, ZodiacSign,
+    calculate_compatibility, render_compatibility_report
+)
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "compatibility_golden.json")
+
+with open(GOLDEN_PATH, encoding="utf-8") as f:
+    GOLDEN = json.load(f)
+
+def _report(sign1, sign2, modality1, modality2, name1="Ana", name2="Bruno"):
+    user1 = User(name=name1, email="a@example.com", birth_date="1990-01-01", zodiac_sign=sign1)
+    user2 = User(name=name2, email="b@example.com", birth_date="1990-01-01", zodiac_sign=sign2)
+    result1 = QuestionnaireResult(user_id=user1.id, answers=[], dominant_modality=modality1, secondary_modality=None)
+    result2 = QuestionnaireResult(user_id=user2.id, answers=[], dominant_modality=modality2, secondary_modality=None)
+    return calculate_compatibility(user1, user2, result1, result2)
+
+def test_table_covers_every_combination():
+    assert len(COMPATIBILITY_TABLE) == len(ZodiacSign) ** 2 * len(Modality) ** 2 == 1296
+
+def test_matches_golden_output():
+    name1, name2 = GOLDEN["names"]
+    for key, expected_score in GOLDEN["scores"].items():
+        sign1, sign2, modality1, modality2 = key.split("|")
+        report = _report(ZodiacSign(sign1), ZodiacSign(sign2), Modality(modality1), Modality(modality2), name1, name2)
+        assert report.compatibility_score == expected_score, key
+        texts = GOLDEN["texts"][f"{modality1}|{modality2}"]
+        assert report.strengths == texts["strengths"], key
+        assert report.challenges == texts["challenges"], key
+        assert report.recommendations == texts["recommendations"], key
+        assert report.premium_insights == texts["premium_insights"], key
+
+def test_names_are_not_treated_as_templates():
+    report = _report(ZodiacSign.ARIES, ZodiacSign.TAURUS, Modality.CARDINAL, Modality.FIXED, "{name2}", "Bea {0}")
+    assert report.strengths[0] == "{name2} traz energia e novidades, Bea {0} oferece estabilidade"
+
+def _stored(report, **fields):
+    """Report document as stored: template IDs plus names, with the given extra fields"""
+    document = report.dict()
+    for field in ("strengths", "challenges", "recommendations", "premium_insights"):
+        document.pop(field)
+    return {**document, "text_params": {"name1": "Ana", "name2": "Bruno"}, **fields}
+
+def test_stored_reports_are_rebuilt_under_another_table_version():
+    report = _report(ZodiacSign.ARIES, ZodiacSign.TAURUS, Modality.CARDINAL, Modality.FIXED)
+    # A copy edit since storing left only one strength at that position
+    shifted = {"strengths": ["compatibility.cardinal.fixed.strengths.0"], "challenges": [], "recommendations": [], "premium_insights": []}
+    
+    current = _stored(report, text_templates=shifted, table_version=COMPATIBILITY_TABLE_VERSION)
+    assert render_compatibility_report(current).strengths == report.strengths[:1]
+    
+    keyed = _stored(report, compatibility_score=1, text_templates=shifted, table_version="old", table_key=["aries", "taurus", "cardinal", "fixed"])
+    assert render_compatibility_report(keyed) == report
+    
+    legacy = _stored(report, compatibility_score=42, text_templates=shifted)
+    rebuilt = render_compatibility_report(legacy)
+    assert rebuilt.compatibility_score == 42
+    assert (rebuilt.strengths, rebuilt.premium_insights) == (report.strengths, report.premium_insights)
@@ -0,0 +1,105 @@
+"""Accept-Encoding negotiation, the compression middleware and precompressed static payloads."""
+import gzip
+import json
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import Response, StreamingResponse  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from compression import (  # noqa: E402
+    COMPRESSION_MINIMUM_SIZE, SUPPORTED_ENCODINGS, CompressionMiddleware, negotiate_encoding
+)
+from static_payloads import StaticPayload  # noqa: E402
+
+LARGE = {"exercises": [{"title": f"Exercício {i}", "instructions": ["Conversem sobre o dia"] * 5} for i in range(40)]}
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/large")
+    async def large():
+        return LARGE
+
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(content=gzip.compress(b"x" * 4096), media_type="text/plain", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(200):
+                yield json.dumps({"row": i, "name": "Perfil"}) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+def test_negotiation():
+    preferred = SUPPORTED_ENCODINGS[0]
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip, deflate, br") == preferred
+    assert negotiate_encoding("*") == preferred
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("*, gzip;q=0") == ("br" if "br" in SUPPORTED_ENCODINGS else None)
+    assert negotiate_encoding("br;q=0, GZIP;q=0.5") == "gzip"
+
+def test_middleware_compresses_large_responses_only():
+    client = TestClient(build_app())
+    
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json() == LARGE
+    
+    assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+
+def test_middleware_leaves_encoded_responses_alone():
+    response = TestClient(build_app()).get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == b"x" * 4096
+
+def test_middleware_compresses_streams():
+    response = TestClient(build_app()).get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["row"] for row in rows] == list(range(200))
+
+def test_static_payload_variants():
+    payload = StaticPayload(LARGE)
+    assert len(payload.body) >= COMPRESSION_MINIMUM_SIZE
+    assert set(payload.encoded) == set(SUPPORTED_ENCODINGS)
+    assert gzip.decompress(payload.encoded["gzip"]) == payload.body
+    
+    compressed = payload.response(None, "gzip")
+    assert compressed.body == payload.encoded["gzip"]
+    assert compressed.headers["content-encoding"] == "gzip" and compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.headers["etag"] == payload.variant_etag("gzip") != payload.etag
+    
+    identity = payload.response(None, None)
+    assert identity.body == payload.body and "content-encoding" not in identity.headers
+    
+    for etag in (payload.etag, payload.variant_etag("gzip")):
+        for accept_encoding in ("gzip", None):
+            not_modified = payload.response(etag, accept_encoding)
+            assert not_modified.status_code == 304 and not_modified.headers["etag"] == etag
+    assert payload.response("*", "gzip").headers["etag"] == payload.variant_etag("gzip")
+
+def test_small_static_payload_is_not_compressed():
+    payload = StaticPayload({"a": 1})
+    assert payload.encoded == {}
+    response = payload.response(None, "gzip")
+    assert response.body == payload.body and "content-encoding" not in response.headers
@@ -0,0 +1,63 @@
+"""The content pack: manifest in sync with the sources, lazy sections and build-time checks."""
+import json
+import logging
+import os
+import shutil
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from content_pack import MANIFEST_FILE, ContentPack  # noqa: E402
+from server import CONTENT_DIR, CONTENT_REGISTRY, CONTENT_SCHEMA, ContentLibrary, Modality  # noqa: E402
+
+def _copy_pack(tmp_path):
+    directory = tmp_path / "content"
+    shutil.copytree(CONTENT_DIR, directory)
+    return directory
+
+def test_committed_manifest_matches_sources():
+    committed = json.loads((CONTENT_DIR / MANIFEST_FILE).read_bytes())
+    assert ContentPack.from_sources(CONTENT_DIR, CONTENT_SCHEMA).manifest == committed
+    assert set(committed["sections"]) == set(CONTENT_SCHEMA)
+
+def test_shipped_content_is_consistent():
+    content = CONTENT_REGISTRY.current
+    assert content.problems() == []
+    assert set(content.temperament_profiles) == set(Modality)
+    assert all(content.couple_exercises_by_id[exercise.id] is exercise for exercise in content.couple_exercises)
+
+def test_sections_load_on_first_use():
+    library = ContentLibrary(ContentPack(CONTENT_DIR))
+    assert library.pack._sections == {}
+    assert library.journey_levels
+    assert list(library.pack._sections) == ["journey_levels"]
+
+def test_edited_section_warns_and_unbuilt_pack_still_loads(tmp_path, caplog):
+    directory = _copy_pack(tmp_path)
+    path = directory / "daily_advice_templates.json"
+    advice = json.loads(path.read_bytes())
+    advice["cardinal"][0]["advice"] = "Texto novo"
+    path.write_text(json.dumps(advice, ensure_ascii=False), encoding="utf-8")
+    
+    with caplog.at_level(logging.WARNING, logger="content_pack"):
+        library = ContentLibrary(ContentPack(directory))
+        assert library.daily_advice_templates[Modality.CARDINAL][0]["advice"] == "Texto novo"
+    assert "changed since the pack was built" in caplog.text
+    
+    (directory / MANIFEST_FILE).unlink()
+    rebuilt = ContentPack(directory)
+    assert rebuilt.version == ContentPack.from_sources(directory, CONTENT_SCHEMA).version != ContentPack(CONTENT_DIR).version
+
+def test_problems_report_duplicates_and_unknown_traits(tmp_path):
+    directory = _copy_pack(tmp_path)
+    questions = json.loads((directory / "self_knowledge_questions.json").read_bytes())
+    questions.append(questions[0])
+    (directory / "self_knowledge_questions.json").write_text(json.dumps(questions), encoding="utf-8")
+    compatibility = json.loads((directory / "compatibility.json").read_bytes())
+    compatibility["element"]["Fogo"]["Éter"] = {"multiplier": 1.0, "description": "?"}
+    (directory / "compatibility.json").write_text(json.dumps(compatibility), encoding="utf-8")
+    
+    problems = ContentLibrary(ContentPack.from_sources(directory, CONTENT_SCHEMA)).problems()
+    assert "self_knowledge_questions: duplicate 1" in problems
+    assert any("'Éter'" in problem for problem in problems)
@@ -0,0 +1,119 @@
+"""Hot reload: snapshots swap only on a new pack version, and a bad pack keeps the current one."""
+import asyncio
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from content_pack import ContentPack, ContentPackError, write_manifest  # noqa: E402
+from content_registry import ContentRegistry  # noqa: E402
+from server import CONTENT_DIR, CONTENT_SCHEMA, ContentLibrary, Modality  # noqa: E402
+
+def _copy_pack(tmp_path):
+    directory = tmp_path / "content"
+    shutil.copytree(CONTENT_DIR, directory)
+    return directory
+
+def _edit_advice(directory, text):
+    path = directory / "daily_advice_templates.json"
+    advice = json.loads(path.read_bytes())
+    advice["cardinal"][0]["advice"] = text
+    path.write_text(json.dumps(advice, ensure_ascii=False), encoding="utf-8")
+
+def _publish(directory):
+    write_manifest(directory, ContentPack.from_sources(directory, CONTENT_SCHEMA).manifest)
+
+def test_reload_swaps_only_when_the_version_changes(tmp_path):
+    directory = _copy_pack(tmp_path)
+    registry = ContentRegistry(directory, ContentLibrary)
+    before = registry.current
+    assert asyncio.run(registry.reload()) is False
+    assert registry.current is before
+    
+    _edit_advice(directory, "Texto novo")
+    # Sections alone are not a new version until the manifest is written
+    assert asyncio.run(registry.reload()) is False
+    _publish(directory)
+    assert asyncio.run(registry.reload()) is True
+    
+    after = registry.current
+    assert after is not before and after.version != before.version
+    assert after.daily_advice_templates[Modality.CARDINAL][0]["advice"] == "Texto novo"
+    # A request still holding the old snapshot keeps seeing the old copy
+    assert before.daily_advice_templates[Modality.CARDINAL][0]["advice"] != "Texto novo"
+    assert asyncio.run(registry.reload(force=True)) is True
+    assert registry.current.version == after.version
+
+def test_invalid_pack_keeps_the_current_snapshot(tmp_path):
+    directory = _copy_pack(tmp_path)
+    registry = ContentRegistry(directory, ContentLibrary)
+    before = registry.current
+    
+    (directory / "journey_levels.json").write_text("[{", encoding="utf-8")
+    _publish(directory)
+    with pytest.raises(ValueError):
+        asyncio.run(registry.reload())
+    assert registry.current is before
+    # Its sections were never parsed, but it still reads the bytes of its own version
+    assert before.journey_levels
+
+def test_section_edited_after_the_manifest_is_refused(tmp_path):
+    directory = _copy_pack(tmp_path)
+    registry = ContentRegistry(directory, ContentLibrary)
+    before = registry.current
+    
+    _edit_advice(directory, "Texto novo")
+    _publish(directory)
+    _edit_advice(directory, "Texto editado depois")
+    with pytest.raises(ContentPackError):
+        asyncio.run(registry.reload())
+    assert registry.current is before
+
+def test_static_etags_change_with_the_pack_version(tmp_path):
+    directory = _copy_pack(tmp_path)
+    registry = ContentRegistry(directory, ContentLibrary)
+    before = registry.current.static_payloads["temperament_profiles"]
+    
+    _edit_advice(directory, "Texto novo")
+    _publish(directory)
+    asyncio.run(registry.reload())
+    after = registry.current.static_payloads["temperament_profiles"]
+    assert after.body == before.body
+    assert after.etag != before.etag and after.etag.startswith(f'"{registry.current.version}-')
+
+def test_malformed_manifest_is_refused(tmp_path):
+    directory = _copy_pack(tmp_path)
+    registry = ContentRegistry(directory, ContentLibrary)
+    before = registry.current
+    
+    manifest_path = directory / "manifest.json"
+    manifest = json.loads(manifest_path.read_bytes())
+    for broken in ({**manifest, "version": None}, {k: v for k, v in manifest.items() if k != "sections"}, []):
+        manifest_path.write_text(json.dumps(broken), encoding="utf-8")
+        with pytest.raises(ContentPackError):
+            asyncio.run(registry.reload())
+        assert registry.current is before
+
+def test_watch_keeps_polling_after_any_error(tmp_path):
+    registry = ContentRegistry(_copy_pack(tmp_path), ContentLibrary)
+    calls = []
+    
+    async def failing_reload():
+        calls.append(None)
+        raise RuntimeError("bug")
+    
+    async def run():
+        registry.reload = failing_reload
+        watcher = asyncio.create_task(registry.watch(0))
+        while len(calls) < 3:
+            await asyncio.sleep(0)
+        assert not watcher.done()
+        watcher.cancel()
+    
+    asyncio.run(run())
+    assert len(calls) == 3
@@ -0,0 +1,105 @@
+"""Golden test: the 144-entry enhanced compatibility table must reproduce the
+original per-request scoring for every sign pair."""
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+import server  # noqa: E402
+from content_pack import ContentPack  # noqa: E402
+from server import CONTENT_DIR, CONTENT_REGISTRY, CONTENT_SCHEMA, ContentLibrary, ZodiacSign, calculate_enhanced_compatibility  # noqa: E402
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "enhanced_compatibility_golden.json")
+
+with open(GOLDEN_PATH, encoding="utf-8") as f:
+    GOLDEN = json.load(f)
+
+def _edited_content(tmp_path, edit=None) -> ContentLibrary:
+    """Snapshot of a pack copy with edited matrices (by default the Cardinal + Cardinal quality note)"""
+    directory = tmp_path / "content"
+    shutil.copytree(CONTENT_DIR, directory)
+    path = directory / "compatibility.json"
+    compatibility = json.loads(path.read_bytes())
+    if edit is None:
+        compatibility["quality"]["Cardinal"]["Cardinal"] = {"adjustment": 0, "note": "Teste"}
+    else:
+        edit(compatibility)
+    path.write_text(json.dumps(compatibility, ensure_ascii=False), encoding="utf-8")
+    return ContentLibrary(ContentPack.from_sources(directory, CONTENT_SCHEMA))
+
+def _stored_report(content, sign1, sign2):
+    """Enhanced report document as generate_enhanced_compatibility stores it"""
+    report = calculate_enhanced_compatibility("Ana", sign1, "Bruno", sign2, content)
+    report.user_id, report.partner_id = "u1", "p1"
+    entry = content.enhanced_table[(sign1, sign2)]
+    document = content.text_templates.dehydrate(report.dict(), server.enhanced_template_ids(entry), {"name1": "Ana", "name2": "Bruno"})
+    document["table_version"] = content.enhanced_table_version
+    return report, document
+
+def test_table_covers_every_sign_pair():
+    assert len(CONTENT_REGISTRY.current.enhanced_table) == len(ZodiacSign) ** 2 == 144
+
+def test_matches_golden_output():
+    name1, name2 = GOLDEN["names"]
+    for key, expected in GOLDEN["reports"].items():
+        sign1, sign2 = key.split("|")
+        report = calculate_enhanced_compatibility(name1, ZodiacSign(sign1), name2, ZodiacSign(sign2))
+        assert report.general_affinity == expected["general_affinity"], key
+        assert report.compatibility_score == expected["compatibility_score"], key
+        assert report.potential_conflicts == expected["potential_conflicts"], key
+        assert report.strength_points == expected["strength_points"], key
+        assert report.weakness_points == expected["weakness_points"], key
+        assert report.detailed_analysis == expected["detailed_analysis"], key
+        assert report.recommendations == expected["recommendations"], key
+
+def test_table_follows_the_content_it_was_built_from(tmp_path):
+    edited = _edited_content(tmp_path)
+    report = calculate_enhanced_compatibility("Ana", ZodiacSign.ARIES, "Bruno", ZodiacSign.CANCER, content=edited)
+    assert report.detailed_analysis["quality_analysis"] == "Qualidades Cardinal + Cardinal: Teste"
+    
+    current = calculate_enhanced_compatibility("Ana", ZodiacSign.ARIES, "Bruno", ZodiacSign.CANCER)
+    assert current.detailed_analysis["quality_analysis"] == "Qualidades Cardinal + Cardinal: Ambos querem liderar"
+
+def test_vectorized_scores_match_table():
+    all_codes = np.arange(len(ZodiacSign), dtype=np.intp)
+    for user_sign in ZodiacSign:
+        scores = server.score_sign_codes(server.SIGN_CODES[user_sign], all_codes)
+        affinities = server.affinity_for_scores(scores)
+        for candidate_sign, score, affinity in zip(ZodiacSign, scores, affinities):
+            entry = CONTENT_REGISTRY.current.enhanced_table[(user_sign, candidate_sign)]
+            assert (int(score), str(affinity)) == (entry.score, entry.affinity), (user_sign, candidate_sign)
+
+def test_inputs_hash_tracks_profiles_and_table_version(tmp_path):
+    user = {"name": "Ana", "zodiac_sign": "aries"}
+    partner = {"name": "Bruno", "zodiac_sign": "cancer"}
+    original = server.enhanced_report_inputs_hash(user, partner)
+    assert server.enhanced_report_inputs_hash(dict(user), dict(partner)) == original
+    assert server.enhanced_report_inputs_hash({**user, "name": "Ana Maria"}, partner) != original
+    assert server.enhanced_report_inputs_hash(user, {**partner, "zodiac_sign": "leo"}) != original
+    
+    assert server.enhanced_report_inputs_hash(user, partner, content=_edited_content(tmp_path)) != original
+    assert server.enhanced_report_inputs_hash(user, partner) == original
+
+def test_reports_stored_under_another_table_are_recalculated(tmp_path):
+    def shorten_choleric_conflicts(compatibility):
+        pair = compatibility["temperament"]["Colérico"]["Colérico"]
+        pair["conflicts"] = pair["conflicts"][:1]
+        pair["score"] -= 10
+    
+    current = CONTENT_REGISTRY.current
+    original, document = _stored_report(current, ZodiacSign.ARIES, ZodiacSign.ARIES)
+    assert server.render_enhanced_report(dict(document), current) == original
+    
+    reloaded = _edited_content(tmp_path, shorten_choleric_conflicts)
+    assert "enhanced.aries.aries.conflicts.1" not in reloaded.text_templates
+    expected = calculate_enhanced_compatibility("Ana", ZodiacSign.ARIES, "Bruno", ZodiacSign.ARIES, reloaded)
+    for stored in (document, {key: value for key, value in document.items() if key != "table_version"}):
+        report = server.render_enhanced_report(dict(stored), reloaded)
+        assert (report.id, report.user_id, report.created_at) == (original.id, "u1", original.created_at)
+        assert report.compatibility_score == expected.compatibility_score < original.compatibility_score
+        assert report.potential_conflicts == expected.potential_conflicts and len(report.potential_conflicts) == 1
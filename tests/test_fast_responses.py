@@ -0,0 +1,25 @@
+"""model_response must send the same JSON the response_model path produced."""
+import json
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from fast_responses import model_response  # noqa: E402
+from server import User, ZodiacSign, calculate_enhanced_compatibility  # noqa: E402
+
+def test_model_response_matches_jsonable_encoder():
+    user = User(name="Ana Souza", email="ana@example.com", zodiac_sign=ZodiacSign.ARIES, birth_date="1990-04-01", badges=["profile_created"])
+    report = calculate_enhanced_compatibility("Ana Souza", ZodiacSign.ARIES, "Bruno Lima", ZodiacSign.CANCER)
+    
+    for model in (user, report):
+        response = model_response(model)
+        assert response.status_code == 200 and response.media_type == "application/json"
+        assert json.loads(response.body) == jsonable_encoder(model)
+
+def test_model_response_status_code():
+    user = User(name="Ana Souza", email="ana@example.com", zodiac_sign=ZodiacSign.ARIES, birth_date="1990-04-01")
+    assert model_response(user, status_code=201).status_code == 201
@@ -0,0 +1,48 @@
+"""Bulk import scoring must match the single-submission path."""
+import io
+import os
+import random
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from import_questionnaires import read_csv, read_ndjson  # noqa: E402
+from server import (  # noqa: E402
+    QUESTIONNAIRE_QUESTIONS, Modality, QuestionnaireAnswer, calculate_modality_scores, get_dominant_modality,
+    score_questionnaire_batch
+)
+
+def _random_answers(rng):
+    answers = []
+    for question in rng.sample(QUESTIONNAIRE_QUESTIONS, rng.randint(0, len(QUESTIONNAIRE_QUESTIONS))):
+        answer = rng.choice(question["options"])["answer"] if rng.random() > 0.1 else "Resposta desconhecida"
+        answers.append(QuestionnaireAnswer(question_id=question["id"], answer=answer, score=0))
+    return answers
+
+def test_batch_scoring_matches_scalar_path():
+    rng = random.Random(11)
+    submissions = [_random_answers(rng) for _ in range(500)]
+    for answers, (dominant, secondary) in zip(submissions, score_questionnaire_batch(submissions)):
+        expected_dominant, expected_secondary = get_dominant_modality(calculate_modality_scores(answers))
+        assert dominant == Modality(expected_dominant)
+        assert secondary == (Modality(expected_secondary) if expected_secondary else None)
+
+def test_empty_batch():
+    assert score_questionnaire_batch([]) == []
+
+def test_csv_groups_consecutive_rows_by_user():
+    stream = io.StringIO(
+        "user_id,question_id,answer,score\n"
+        "u1,1,A,3\n"
+        "u1,2,B,3\n"
+        "u2,1,C,3\n"
+    )
+    rows = list(read_csv(stream))
+    assert [(line, raw["user_id"], len(raw["answers"])) for line, raw in rows] == [(2, "u1", 2), (4, "u2", 1)]
+
+def test_ndjson_reports_bad_lines_in_place():
+    stream = io.StringIO('{"user_id": "u1", "answers": []}\n\nnot json\n')
+    rows = list(read_ndjson(stream))
+    assert rows[0] == (1, {"user_id": "u1", "answers": []})
+    assert rows[1][0] == 3 and isinstance(rows[1][1], ValueError)
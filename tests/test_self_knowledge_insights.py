@@ -0,0 +1,44 @@
+"""Table-driven self-knowledge insights, checked against a straightforward per-category reference."""
+import os
+import random
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from server import (  # noqa: E402
+    CONTENT_REGISTRY, SELF_KNOWLEDGE_CATEGORIES, SELF_KNOWLEDGE_INSIGHTS, Modality, SelfKnowledgeAnswer,
+    self_knowledge_insights_batch
+)
+
+def _reference_insights(answers):
+    categories = {}
+    for answer in answers:
+        scores = categories.setdefault(answer.category, {"cardinal": 0, "fixed": 0, "mutable": 0})
+        question = next((q for q in CONTENT_REGISTRY.current.self_knowledge_questions if q.id == answer.question_id), None)
+        option = next((opt for opt in question.options if opt["answer"] == answer.answer), None) if question else None
+        if option:
+            scores[option["modality"]] += answer.score
+    return {
+        category: SELF_KNOWLEDGE_INSIGHTS[(category, Modality(max(scores, key=scores.get)))]
+        for category, scores in categories.items()
+        if category in SELF_KNOWLEDGE_CATEGORIES
+    }
+
+def _random_answers(rng):
+    answers = []
+    for _ in range(rng.randint(0, 8)):
+        question = rng.choice(CONTENT_REGISTRY.current.self_knowledge_questions)
+        answer = rng.choice(question.options)["answer"] if rng.random() > 0.1 else "Outra resposta"
+        category = question.category if rng.random() > 0.1 else "unknown"
+        answers.append(SelfKnowledgeAnswer(question_id=question.id, answer=answer, category=category, score=rng.randint(0, 3)))
+    return answers
+
+def test_every_category_has_an_insight_per_modality():
+    assert len(SELF_KNOWLEDGE_INSIGHTS) == len(SELF_KNOWLEDGE_CATEGORIES) * len(Modality)
+
+def test_batch_matches_reference():
+    rng = random.Random(5)
+    submissions = [_random_answers(rng) for _ in range(400)]
+    for answers, insights in zip(submissions, self_knowledge_insights_batch(submissions)):
+        assert insights == _reference_insights(answers)
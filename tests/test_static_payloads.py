@@ -0,0 +1,34 @@
+"""Pre-encoded static payloads: stable bytes, strong ETags and conditional requests."""
+import json
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from static_payloads import StaticPayload  # noqa: E402
+
+def test_body_is_compact_utf8_json():
+    payload = StaticPayload({"nome": "Áries", "signs": [1, 2]})
+    assert payload.body == '{"nome":"Áries","signs":[1,2]}'.encode("utf-8")
+    assert json.loads(payload.body) == {"nome": "Áries", "signs": [1, 2]}
+
+def test_etag_depends_only_on_content():
+    assert StaticPayload({"a": 1}).etag == StaticPayload({"a": 1}).etag
+    assert StaticPayload({"a": 1}).etag != StaticPayload({"a": 2}).etag
+
+def test_etag_is_prefixed_with_the_content_version():
+    assert StaticPayload({"a": 1}, "v1").etag == StaticPayload({"a": 1}).etag.replace('"', '"v1-', 1)
+    assert StaticPayload({"a": 1}, "v1").etag != StaticPayload({"a": 1}, "v2").etag
+
+def test_conditional_responses():
+    payload = StaticPayload({"a": 1})
+    full = payload.response(None)
+    assert full.status_code == 200 and full.body == payload.body
+    assert full.headers["etag"] == payload.etag and "max-age" in full.headers["cache-control"]
+    
+    for header in (payload.etag, f"W/{payload.etag}", f'"other", {payload.etag}', "*"):
+        not_modified = payload.response(header)
+        assert not_modified.status_code == 304 and not_modified.body == b""
+        assert not_modified.headers["etag"] == payload.etag
+    assert payload.response('"other"').status_code == 200
@@ -0,0 +1,53 @@
+"""Compiled templates and the dehydrate/hydrate round trip used for stored reports."""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from text_templates import CompiledTemplate, TemplateRegistry  # noqa: E402
+
+def test_render_substitutes_fields_and_keeps_escaped_braces():
+    template = CompiledTemplate("{name1} e {name2} {{juntos}}")
+    assert template.render({"name1": "Ana", "name2": "{Bruno}"}) == "Ana e {Bruno} {juntos}"
+
+def test_format_specs_are_rejected():
+    with pytest.raises(ValueError):
+        CompiledTemplate("{score:>3}")
+
+def test_identical_texts_share_one_compiled_template():
+    registry = TemplateRegistry()
+    registry.register("a", "Olá {name1}")
+    registry.register("b", "Olá {name1}")
+    assert len(registry) == 2
+    assert registry._by_id["a"] is registry._by_id["b"]
+
+def test_round_trip_and_legacy_documents():
+    registry = TemplateRegistry()
+    ids = registry.register_all("report.strengths", ["{name1} lidera", "{name2} sustenta"])
+    analysis = {"quality": registry.register("report.quality", "Dinâmica neutra")}
+    stored = registry.dehydrate(
+        {"id": "r1", "strengths": ["Ana lidera", "Bia sustenta"], "analysis": {"quality": "Dinâmica neutra"}},
+        {"strengths": ids, "analysis": analysis},
+        {"name1": "Ana", "name2": "Bia"}
+    )
+    assert stored == {
+        "id": "r1",
+        "text_templates": {"strengths": list(ids), "analysis": analysis},
+        "text_params": {"name1": "Ana", "name2": "Bia"},
+    }
+    assert registry.hydrate(stored) == {"id": "r1", "strengths": ["Ana lidera", "Bia sustenta"], "analysis": {"quality": "Dinâmica neutra"}}
+    
+    legacy = {"id": "r0", "strengths": ["Texto já renderizado"]}
+    assert registry.hydrate(dict(legacy)) == legacy
+
+def test_unknown_ids_do_not_fail_hydration():
+    registry = TemplateRegistry()
+    known = registry.register("report.strengths.0", "{name1} lidera")
+    document = {
+        "text_templates": {"strengths": [known, "report.strengths.1"], "analysis": {"quality": "report.quality"}},
+        "text_params": {"name1": "Ana"},
+    }
+    assert registry.hydrate(document) == {"strengths": ["Ana lidera"], "analysis": {"quality": ""}}
@@ -0,0 +1,54 @@
+"""Admin user listing and export: keyset cursors (dates and not yet migrated ISO strings) and cursor limits."""
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+import repository  # noqa: E402
+from server import decode_user_cursor, encode_user_cursor, export_users, users_after_cursor  # noqa: E402
+
+class _RecordingCollection:
+    def __init__(self):
+        self.find_kwargs = None
+
+    def find(self, *args, **kwargs):
+        self.find_kwargs = kwargs
+        return self
+
+    def sort(self, *args):
+        return self
+
+class _RecordingDatabase:
+    def __init__(self):
+        self.users = _RecordingCollection()
+
+def test_cursor_round_trips_both_representations():
+    created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert decode_user_cursor(encode_user_cursor({"created_at": created_at, "id": "a"})) == (created_at, "a")
+    legacy = "2024-01-01T00:00:00+00:00"
+    assert decode_user_cursor(encode_user_cursor({"created_at": legacy, "id": "b"})) == (legacy, "b")
+
+def test_string_cursor_continues_into_dates():
+    query = users_after_cursor(encode_user_cursor({"created_at": "2024-01-01T00:00:00+00:00", "id": "b"}))
+    assert {"created_at": {"$type": "date"}} in query["$or"]
+    query = users_after_cursor(encode_user_cursor({"created_at": datetime(2024, 1, 1, tzinfo=timezone.utc), "id": "a"}))
+    assert len(query["$or"]) == 2
+
+def test_malformed_cursor_is_rejected():
+    for cursor in ("not-base64!", encode_user_cursor({"created_at": "x", "id": "b"})[:-4]):
+        with pytest.raises(HTTPException):
+            decode_user_cursor(cursor)
+
+def test_export_cursor_has_no_time_limit():
+    db = _RecordingDatabase()
+    repository.find_users(db, {})
+    assert db.users.find_kwargs["max_time_ms"] == repository.MAX_TIME_MS
+    
+    asyncio.run(export_users(cursor=None, db=db))
+    assert db.users.find_kwargs["max_time_ms"] is None
@@ -0,0 +1,57 @@
+"""Day-of-year zodiac lookup, scalar and vectorized, against the published sign date ranges."""
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from server import (  # noqa: E402
+    SIGN_CODES, ZODIAC_DATA, InvalidBirthDate, determine_zodiac_codes, determine_zodiac_from_birth_date
+)
+
+def _expected_sign(day: date):
+    for sign, data in ZODIAC_DATA.items():
+        start, end = data["dates"].split(" - ")
+        start_day, start_month = map(int, start.split("/"))
+        end_day, end_month = map(int, end.split("/"))
+        current = (day.month, day.day)
+        if (start_month, start_day) <= (end_month, end_day):
+            if (start_month, start_day) <= current <= (end_month, end_day):
+                return sign
+        elif current >= (start_month, start_day) or current <= (end_month, end_day):
+            return sign
+    raise AssertionError(f"No sign covers {day}")
+
+def _every_day_of_leap_year():
+    day = date(2000, 1, 1)
+    while day.year == 2000:
+        yield day
+        day += timedelta(days=1)
+
+def test_every_day_matches_sign_date_ranges():
+    days = list(_every_day_of_leap_year())
+    assert len(days) == 366
+    for day in days:
+        assert determine_zodiac_from_birth_date(day.isoformat()) == _expected_sign(day), day
+
+def test_vectorized_matches_scalar():
+    days = [day.isoformat() for day in _every_day_of_leap_year()]
+    codes = determine_zodiac_codes(days)
+    assert codes.tolist() == [SIGN_CODES[determine_zodiac_from_birth_date(day)] for day in days]
+
+MALFORMED = ["", "1990-13-01", "1990-02-30", "1999-02-29", "0000-01-01", "1990/01/01", "01-01-1990", "1990-1-01", "1990-01-01T00", "abcd-ef-gh", None]
+
+@pytest.mark.parametrize("value", MALFORMED)
+def test_malformed_dates_are_rejected(value):
+    with pytest.raises(InvalidBirthDate):
+        determine_zodiac_from_birth_date(value)
+
+def test_vectorized_marks_malformed_dates():
+    codes = determine_zodiac_codes(np.array(["2000-02-29"] + MALFORMED, dtype=object))
+    assert codes[0] == SIGN_CODES[determine_zodiac_from_birth_date("2000-02-29")]
+    assert (codes[1:] == -1).all()
+    assert determine_zodiac_codes([]).shape == (0,)